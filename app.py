@@ -1,17 +1,16 @@
 import streamlit as st
-import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import numpy as np
 from datetime import datetime, timedelta
 import time
-import random
 import os
 
 from data_simulator import DataSimulator
 from nudge_system import NudgeSystem
 from auth_manager import AuthManager
+from simulation_random import clock_from_env, resolve_seed
 
 # Page configuration
 st.set_page_config(
@@ -143,8 +142,11 @@ if not st.session_state.user or not st.session_state.user.get('is_logged_in', Fa
 
 # Initialize session state
 if 'data_simulator' not in st.session_state:
-    st.session_state.data_simulator = DataSimulator()
-    st.session_state.nudge_system = NudgeSystem()
+    # SIMULATION_SEED (and SIMULATION_CLOCK for a frozen clock) reproduce a session's data
+    st.session_state.simulation_seed = resolve_seed()
+    simulation_clock = clock_from_env()
+    st.session_state.data_simulator = DataSimulator(seed=st.session_state.simulation_seed, clock=simulation_clock)
+    st.session_state.nudge_system = NudgeSystem(seed=st.session_state.simulation_seed, clock=simulation_clock)
     st.session_state.last_update = datetime.now()
     st.session_state.current_page = 'Dashboard'
 
@@ -343,6 +345,7 @@ if page == "Dashboard":
     show_notification_bell()
     # Get current user data
     user_data = st.session_state.user if st.session_state.user else {}
+    rng = st.session_state.data_simulator.rng
     
     # Personalized Welcome Header
     st.markdown(f"""
@@ -366,7 +369,7 @@ if page == "Dashboard":
         st.metric(
             "📈 Your Engagement Score", 
             f"{user_data['engagement_score']:.1f}%",
-            delta=f"{random.uniform(-2, 3):.1f}%",
+            delta=f"{rng.uniform(-2, 3):.1f}%",
             help="Your overall learning engagement level"
         )
     
@@ -383,7 +386,7 @@ if page == "Dashboard":
         st.metric(
             "⏰ Total Learning Time", 
             f"{user_data['total_time']:.1f}h",
-            delta=f"+{random.uniform(1, 5):.1f}h",
+            delta=f"+{rng.uniform(1, 5):.1f}h",
             help="Your total time spent learning"
         )
     
@@ -391,7 +394,7 @@ if page == "Dashboard":
         st.metric(
             "🔥 Current Streak", 
             f"{user_data['streak']} days",
-            delta=1 if random.random() > 0.5 else 0,
+            delta=1 if rng.random() > 0.5 else 0,
             help="Your daily learning streak"
         )
     
@@ -403,12 +406,11 @@ if page == "Dashboard":
     with col1:
         st.subheader("📈 Your Learning Journey")
         
-        # Create personal engagement trend chart
-        dates = pd.date_range(end=datetime.now(), periods=14, freq='D')
-        engagement_trend = [
-            max(0, min(100, user_data['engagement_score'] + random.uniform(-15, 15)))
-            for _ in range(14)
-        ]
+        # Create personal engagement trend chart from the stored daily history
+        simulator = st.session_state.data_simulator
+        simulator.ensure_history(user_data['id'], user_data['engagement_score'], user_data['preferred_time'])
+        dates = [datetime.fromtimestamp(int(ts)) for ts in simulator.history.times(user_data['id'], last=14)]
+        engagement_trend = simulator.history.series(user_data['id'], 'engagement_score', last=14)
         
         fig_engagement = go.Figure()
         fig_engagement.add_trace(go.Scatter(
@@ -475,7 +477,7 @@ if page == "Dashboard":
         
         # Personal time spent by category
         time_categories = ['Videos', 'Assignments', 'Discussions', 'Quizzes']
-        time_values = [random.uniform(0.5, 4.0) for _ in time_categories]
+        time_values = [rng.uniform(0.5, 4.0) for _ in time_categories]
         
         fig_time = px.pie(
             values=time_values,
@@ -492,7 +494,7 @@ if page == "Dashboard":
         
         # Personal weekly activity pattern
         days = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
-        activity_hours = [random.uniform(0.5, 4.0) for _ in days]
+        activity_hours = [rng.uniform(0.5, 4.0) for _ in days]
         
         fig_activity = px.bar(
             x=days,
@@ -587,19 +589,10 @@ elif page == "Analytics":
     hours = list(range(24))
     preferred_time = user_data['preferred_time']
     
-    if preferred_time == 'morning':
-        peak_hour = 9
-    elif preferred_time == 'afternoon': 
-        peak_hour = 14
-    else:  # evening
-        peak_hour = 19
-    
-    activity = [
-        max(0, np.random.normal(
-            loc=10 if abs(hour - peak_hour) < 3 else 2,
-            scale=3
-        )) for hour in hours
-    ]
+    # Average activity by hour of day from the stored hourly history
+    simulator = st.session_state.data_simulator
+    simulator.ensure_history(user_data['id'], user_data['engagement_score'], preferred_time)
+    activity = simulator.get_hourly_pattern(user_data['id'])
     
     fig_pattern = px.line(
         x=hours,
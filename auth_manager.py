@@ -1,27 +1,408 @@
+import asyncio
 import bcrypt
 import psycopg2
+import psycopg2.extensions
 import os
 import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
 from typing import Optional, Dict, Any
 import streamlit as st
 
+from ttl_cache import RedisCacheBackend, TTLCache
+
+
+class PoolTimeoutError(psycopg2.OperationalError):
+    """Raised when no pooled connection becomes available in time"""
+
+
+class ConnectionPool:
+    """Thread-safe PostgreSQL connection pool with health checks on checkout"""
+
+    def __init__(self, dsn: Optional[str], min_size: int = 1, max_size: int = 10,
+                 timeout: float = 5.0, health_check_interval: float = 30.0):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("Pool sizes must satisfy 0 <= min_size <= max_size and max_size >= 1")
+        self.dsn = dsn
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self._cond = threading.Condition()
+        self._idle = []  # (connection, last_used) pairs, most recently used last
+        self._open = 0
+        self._in_use = 0
+        self._warmed = False
+        self._stats = {
+            'checkouts': 0,
+            'misses': 0,
+            'waits': 0,
+            'timeouts': 0,
+            'total_wait_time': 0.0,
+            'max_wait_time': 0.0,
+            'health_check_failures': 0
+        }
+
+    def _connect(self):
+        return psycopg2.connect(self.dsn)
+
+    def _warm_up(self):
+        """Open min_size connections on first use so the pool never connects at import time"""
+        with self._cond:
+            if self._warmed:
+                return
+            self._warmed = True
+            missing = max(0, self.min_size - self._open)
+            self._open += missing
+        opened = []
+        try:
+            for _ in range(missing):
+                opened.append(self._connect())
+        finally:
+            with self._cond:
+                self._open -= missing - len(opened)
+                now = time.monotonic()
+                self._idle.extend((conn, now) for conn in opened)
+                self._cond.notify_all()
+
+    def _is_healthy(self, conn, last_used: float) -> bool:
+        """Cheap liveness check; only pings the server if the connection sat idle for a while"""
+        if conn.closed:
+            return False
+        if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            return False
+        if time.monotonic() - last_used < self.health_check_interval:
+            return True
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+
+    def getconn(self, timeout: Optional[float] = None):
+        """Check out a healthy connection, opening a new one or waiting if the pool is busy"""
+        if not self._warmed:
+            self._warm_up()
+        timeout = self.timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+        waited = False
+
+        while True:
+            candidate = None
+            create = False
+            with self._cond:
+                while not self._idle and self._open >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats['timeouts'] += 1
+                        raise PoolTimeoutError(
+                            f"No database connection available after {timeout:.1f}s "
+                            f"(max_size={self.max_size})"
+                        )
+                    waited = True
+                    self._cond.wait(remaining)
+
+                if self._idle:
+                    candidate = self._idle.pop()
+                else:
+                    self._open += 1
+                    create = True
+                self._in_use += 1
+
+            if create:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._cond:
+                        self._open -= 1
+                        self._in_use -= 1
+                        self._cond.notify()
+                    raise
+                self._record_checkout(started, waited, miss=True)
+                return conn
+
+            conn, last_used = candidate
+            if self._is_healthy(conn, last_used):
+                self._record_checkout(started, waited, miss=False)
+                return conn
+
+            # Stale connection: drop it and try again with the freed slot
+            self._discard(conn)
+            with self._cond:
+                self._open -= 1
+                self._in_use -= 1
+                self._stats['health_check_failures'] += 1
+
+    def _record_checkout(self, started: float, waited: bool, miss: bool):
+        wait_time = time.monotonic() - started
+        with self._cond:
+            self._stats['checkouts'] += 1
+            if miss:
+                self._stats['misses'] += 1
+            if waited:
+                self._stats['waits'] += 1
+            self._stats['total_wait_time'] += wait_time
+            self._stats['max_wait_time'] = max(self._stats['max_wait_time'], wait_time)
+
+    def putconn(self, conn, close: bool = False):
+        """Return a connection to the pool, rolling back any unfinished transaction"""
+        if not close and not conn.closed:
+            try:
+                if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except psycopg2.Error:
+                close = True
+        if close or conn.closed:
+            self._discard(conn)
+            with self._cond:
+                self._open -= 1
+                self._in_use -= 1
+                self._cond.notify()
+            return
+        with self._cond:
+            self._idle.append((conn, time.monotonic()))
+            self._in_use -= 1
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None):
+        """Borrow a connection; commits on success, rolls back on error, always returns it"""
+        conn = self.getconn(timeout)
+        broken = False
+        try:
+            yield conn
+            conn.commit()
+        except BaseException as e:
+            broken = isinstance(e, (psycopg2.OperationalError, psycopg2.InterfaceError))
+            if not conn.closed:
+                try:
+                    conn.rollback()
+                except psycopg2.Error:
+                    broken = True
+            raise
+        finally:
+            self.putconn(conn, close=broken)
+
+    def closeall(self):
+        """Close every idle connection; checked-out connections are closed when returned"""
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+            self._warmed = False
+        for conn, _ in idle:
+            self._discard(conn)
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool statistics for monitoring"""
+        with self._cond:
+            stats = dict(self._stats)
+            stats.update({
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'open': self._open,
+                'idle': len(self._idle),
+                'in_use': self._in_use
+            })
+        checkouts = stats['checkouts']
+        stats['avg_wait_time'] = stats['total_wait_time'] / checkouts if checkouts else 0.0
+        stats['miss_rate'] = stats['misses'] / checkouts if checkouts else 0.0
+        return stats
+
+
+_pools: Dict[Any, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(dsn: Optional[str], min_size: Optional[int] = None,
+             max_size: Optional[int] = None) -> ConnectionPool:
+    """Get the process-wide pool for a DSN, creating it on first use"""
+    min_size = int(os.getenv('DB_POOL_MIN_SIZE', 1)) if min_size is None else min_size
+    max_size = int(os.getenv('DB_POOL_MAX_SIZE', 10)) if max_size is None else max_size
+    # Keyed by pid as well: connections must never be shared across a fork
+    key = (os.getpid(), dsn)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(
+                dsn,
+                min_size=min_size,
+                max_size=max_size,
+                timeout=float(os.getenv('DB_POOL_TIMEOUT', 5.0))
+            )
+            _pools[key] = pool
+        return pool
+
+
+class HashingOverloadedError(RuntimeError):
+    """Raised when the bcrypt queue is full and new work is rejected"""
+
+
+class PasswordHasher:
+    """Bounded worker pool for bcrypt so hashing never runs on the Streamlit script thread"""
+
+    def __init__(self, rounds: int = 12, max_workers: Optional[int] = None, max_queue: int = 64):
+        if not 4 <= rounds <= 31:
+            raise ValueError("bcrypt rounds must be between 4 and 31")
+        # bcrypt releases the GIL while hashing, so threads scale across cores
+        self.rounds = rounds
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix='bcrypt')
+        self._slots = threading.BoundedSemaphore(self.max_workers + max_queue)
+        self._lock = threading.Lock()
+        self._stats = {'submitted': 0, 'rejected': 0, 'pending': 0}
+
+    def _submit(self, func, *args) -> Future:
+        """Queue bcrypt work, rejecting it immediately once the queue is full"""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._stats['rejected'] += 1
+            raise HashingOverloadedError(
+                "Too many logins in progress, please try again in a moment"
+            )
+        with self._lock:
+            self._stats['submitted'] += 1
+            self._stats['pending'] += 1
+        try:
+            future = self._executor.submit(func, *args)
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(lambda _: self._release())
+        return future
+
+    def _release(self):
+        with self._lock:
+            self._stats['pending'] -= 1
+        self._slots.release()
+
+    def _hash(self, password: str) -> str:
+        salt = bcrypt.gensalt(rounds=self.rounds)
+        return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+
+    def _verify(self, password: str, hashed: str) -> bool:
+        return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+
+    def hash_async(self, password: str) -> Future:
+        """Hash a password on the worker pool"""
+        return self._submit(self._hash, password)
+
+    def verify_async(self, password: str, hashed: str) -> Future:
+        """Verify a password against its hash on the worker pool"""
+        return self._submit(self._verify, password, hashed)
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue statistics for monitoring"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats.update({
+            'rounds': self.rounds,
+            'max_workers': self.max_workers,
+            'max_queue': self.max_queue
+        })
+        return stats
+
+
+_hasher: Optional[PasswordHasher] = None
+_hasher_lock = threading.Lock()
+
+
+def get_hasher() -> PasswordHasher:
+    """Get the process-wide bcrypt worker pool, configured from the environment"""
+    global _hasher
+    with _hasher_lock:
+        if _hasher is None:
+            workers = os.getenv('BCRYPT_WORKERS')
+            _hasher = PasswordHasher(
+                rounds=int(os.getenv('BCRYPT_ROUNDS', 12)),
+                max_workers=int(workers) if workers else None,
+                max_queue=int(os.getenv('BCRYPT_MAX_QUEUE', 64))
+            )
+        return _hasher
+
+
+_caches: Dict[str, TTLCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(name: str) -> TTLCache:
+    """Get a process-wide TTL+LRU cache, shared through Redis when CACHE_REDIS_URL is set"""
+    with _caches_lock:
+        cache = _caches.get(name)
+        if cache is None:
+            redis_url = os.getenv('CACHE_REDIS_URL')
+            cache = TTLCache(
+                maxsize=int(os.getenv('USER_CACHE_SIZE', 10000)),
+                ttl=float(os.getenv('USER_CACHE_TTL', 60)),
+                backend=RedisCacheBackend(redis_url) if redis_url else None,
+                namespace=name
+            )
+            _caches[name] = cache
+        return cache
+
+
+STATS_COLUMNS = (
+    "engagement_score, daily_time, streak, dropout_risk, course_completion_rate, "
+    "total_study_hours, assignments_completed, assignments_total"
+)
+
+# Login needs the user row and its stats; one LEFT JOIN fetches both in a single round trip
+LOGIN_QUERY = (
+    "SELECT u.id, u.email, u.password_hash, u.name, "
+    + ", ".join(f"s.{column.strip()}" for column in STATS_COLUMNS.split(","))
+    + " FROM users u LEFT JOIN user_stats s ON s.user_id = u.id WHERE u.email = %s"
+)
+
+
 class AuthManager:
-    def __init__(self):
+    def __init__(self, min_pool_size: Optional[int] = None, max_pool_size: Optional[int] = None,
+                 hasher: Optional[PasswordHasher] = None):
         self.database_url = os.getenv('DATABASE_URL')
+        self.pool = get_pool(self.database_url, min_pool_size, max_pool_size)
+        self.hasher = hasher or get_hasher()
+        self.stats_cache = get_cache('user_stats')
+        self.user_cache = get_cache('users_by_email')
     
     def get_connection(self):
-        """Get database connection"""
-        return psycopg2.connect(self.database_url)
+        """Borrow a pooled database connection (use as a context manager)"""
+        return self.pool.connection()
+    
+    def pool_stats(self) -> Dict[str, Any]:
+        """Connection pool statistics (wait time, in-use, misses) for monitoring"""
+        return self.pool.stats()
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """Hit/miss statistics for the user and stats caches"""
+        return {
+            'user_stats': self.stats_cache.stats(),
+            'users_by_email': self.user_cache.stats()
+        }
+    
+    def invalidate_user(self, user_id: Optional[int] = None, email: Optional[str] = None):
+        """Drop cached data after a write so the next read goes to the database"""
+        if user_id is not None:
+            self.stats_cache.invalidate(user_id)
+        if email is not None:
+            self.user_cache.invalidate(email)
     
     def hash_password(self, password: str) -> str:
-        """Hash password using bcrypt"""
-        salt = bcrypt.gensalt()
-        hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
-        return hashed.decode('utf-8')
+        """Hash password using bcrypt on the bounded worker pool"""
+        return self.hasher.hash_async(password).result()
     
     def verify_password(self, password: str, hashed: str) -> bool:
-        """Verify password against hash"""
-        return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+        """Verify password against hash on the bounded worker pool"""
+        return self.hasher.verify_async(password, hashed).result()
     
     def create_user(self, email: str, password: str, name: Optional[str] = None) -> bool:
         """Create a new user"""
@@ -42,6 +423,8 @@ class AuthManager:
                         # Create sample stats for new user
                         self._create_sample_stats(cursor, user_id)
                     conn.commit()
+            if result:
+                self.invalidate_user(result[0], email)
             return True
         except psycopg2.IntegrityError:
             # User already exists
@@ -53,56 +436,80 @@ class AuthManager:
     def authenticate_user(self, email: str, password: str) -> Optional[Dict[str, Any]]:
         """Authenticate user and return user data"""
         try:
-            with self.get_connection() as conn:
-                with conn.cursor() as cursor:
-                    cursor.execute(
-                        "SELECT id, email, password_hash, name FROM users WHERE email = %s",
-                        (email,)
-                    )
-                    user_row = cursor.fetchone()
-                    
-                    if user_row and self.verify_password(password, user_row[2]):
-                        # Get user stats
-                        stats = self.get_user_stats(user_row[0])
-                        user_data = {
-                            'id': user_row[0],
-                            'email': user_row[1],
-                            'name': user_row[3],
-                            'is_logged_in': True,
-                            # Default values for compatibility
-                            'engagement_score': 75.0,
-                            'daily_time': 2.5,
-                            'streak': 5,
-                            'dropout_risk': 0.3,
-                            'course_completion_rate': 70.0,
-                            'total_study_hours': 45.0,
-                            'assignments_completed': 8,
-                            'assignments_total': 12,
-                            'completion_rate': 0.70,
-                            'total_time': 45.0,
-                            'age_at_enrollment': 22,
-                            'course_load': 4,
-                            'attendance_rate': 0.45,  # Low attendance to trigger alerts
-                            'first_sem_grade': 14.0,
-                            'second_sem_grade': 14.0,
-                            'evaluations_attempted': 10,
-                            'evaluations_passed': 8,
-                            'avg_session': 2.5,
-                            'learning_style': 'visual',
-                            'preferred_time': 'morning'
-                        }
-                        if stats:
-                            user_data.update(stats)
-                            # Update name from stats if available
-                            user_data['name'] = user_row[3]
-                        return user_data
+            user_row = self._fetch_login_row(email)
+            
+            if user_row and self.verify_password(password, user_row[2]):
+                return self._build_user_data(user_row)
+            return None
+        except Exception as e:
+            st.error(f"Authentication error: {str(e)}")
+            return None
+    
+    async def authenticate_user_async(self, email: str, password: str) -> Optional[Dict[str, Any]]:
+        """Authenticate user without blocking the event loop on the query or bcrypt"""
+        try:
+            loop = asyncio.get_running_loop()
+            user_row = await loop.run_in_executor(None, self._fetch_login_row, email)
+            
+            if user_row and await asyncio.wrap_future(self.hasher.verify_async(password, user_row[2])):
+                return self._build_user_data(user_row)
             return None
         except Exception as e:
             st.error(f"Authentication error: {str(e)}")
             return None
     
+    def _build_user_data(self, user_row) -> Dict[str, Any]:
+        """Build the session user dict from a joined login row"""
+        # Stats come from the same joined row; all NULL when user_stats has no entry
+        stats = self._stats_from_row(user_row[4:]) if user_row[4] is not None else None
+        if stats:
+            # Login already paid for a fresh read; reuse it for later get_user_stats calls
+            self.stats_cache.set(user_row[0], dict(stats))
+        user_data = {
+            'id': user_row[0],
+            'email': user_row[1],
+            'name': user_row[3],
+            'is_logged_in': True,
+            # Default values for compatibility
+            'engagement_score': 75.0,
+            'daily_time': 2.5,
+            'streak': 5,
+            'dropout_risk': 0.3,
+            'course_completion_rate': 70.0,
+            'total_study_hours': 45.0,
+            'assignments_completed': 8,
+            'assignments_total': 12,
+            'completion_rate': 0.70,
+            'total_time': 45.0,
+            'age_at_enrollment': 22,
+            'course_load': 4,
+            'attendance_rate': 0.45,  # Low attendance to trigger alerts
+            'first_sem_grade': 14.0,
+            'second_sem_grade': 14.0,
+            'evaluations_attempted': 10,
+            'evaluations_passed': 8,
+            'avg_session': 2.5,
+            'learning_style': 'visual',
+            'preferred_time': 'morning'
+        }
+        if stats:
+            user_data.update(stats)
+            # Update name from stats if available
+            user_data['name'] = user_row[3]
+        return user_data
+    
+    def _fetch_login_row(self, email: str):
+        """Fetch the user row joined with its stats in one query (connection released before bcrypt)"""
+        with self.get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(LOGIN_QUERY, (email,))
+                return cursor.fetchone()
+    
     def get_user_by_email(self, email: str) -> Optional[Dict[str, Any]]:
-        """Get user data by email"""
+        """Get user data by email (cached; unknown emails are not cached)"""
+        cached = self.user_cache.get(email)
+        if cached is not None:
+            return dict(cached)
         try:
             with self.get_connection() as conn:
                 with conn.cursor() as cursor:
@@ -113,11 +520,13 @@ class AuthManager:
                     user_row = cursor.fetchone()
                     
                     if user_row:
-                        return {
+                        user = {
                             'id': user_row[0],
                             'email': user_row[1],
                             'name': user_row[2]
                         }
+                        self.user_cache.set(email, user)
+                        return dict(user)
             return None
         except Exception as e:
             st.error(f"Error fetching user: {str(e)}")
@@ -125,6 +534,20 @@ class AuthManager:
     
     def _create_sample_stats(self, cursor, user_id: int):
         """Create sample engagement stats for new user"""
+        stats = self._generate_sample_stats()
+        cursor.execute("""
+            INSERT INTO user_stats (
+                user_id, engagement_score, daily_time, streak, dropout_risk,
+                course_completion_rate, total_study_hours, assignments_completed, assignments_total
+            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+        """, (
+            user_id, stats['engagement_score'], stats['daily_time'], stats['streak'],
+            stats['dropout_risk'], stats['course_completion_rate'], stats['total_study_hours'],
+            stats['assignments_completed'], stats['assignments_total']
+        ))
+    
+    def _generate_sample_stats(self) -> Dict[str, Any]:
+        """Generate sample engagement stats for a new user"""
         # Generate realistic sample stats based on different engagement levels
         engagement_level = random.choice(['high', 'moderate', 'at_risk'])
         
@@ -162,46 +585,71 @@ class AuthManager:
                 'assignments_total': 12
             }
         
-        cursor.execute("""
-            INSERT INTO user_stats (
-                user_id, engagement_score, daily_time, streak, dropout_risk,
-                course_completion_rate, total_study_hours, assignments_completed, assignments_total
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """, (
-            user_id, stats['engagement_score'], stats['daily_time'], stats['streak'],
-            stats['dropout_risk'], stats['course_completion_rate'], stats['total_study_hours'],
-            stats['assignments_completed'], stats['assignments_total']
-        ))
+        return stats
+    
+    def _stats_from_row(self, stats_row) -> Dict[str, Any]:
+        """Convert a user_stats row (in STATS_COLUMNS order) to the stats dict"""
+        return {
+            'engagement_score': float(stats_row[0]),
+            'daily_time': float(stats_row[1]),
+            'streak': int(stats_row[2]),
+            'dropout_risk': float(stats_row[3]),
+            'course_completion_rate': float(stats_row[4]),
+            'total_study_hours': float(stats_row[5]),
+            'assignments_completed': int(stats_row[6]),
+            'assignments_total': int(stats_row[7]),
+            # Add compatibility fields for existing code
+            'completion_rate': float(stats_row[4]) / 100.0,  # Convert % to decimal
+            'total_time': float(stats_row[5]),
+            'name': None  # Will be filled from user data
+        }
     
     def get_user_stats(self, user_id: int) -> Optional[Dict[str, Any]]:
-        """Get user engagement stats from database"""
+        """Get user engagement stats (cached, invalidated on write)"""
+        cached = self.stats_cache.get(user_id)
+        if cached is not None:
+            return dict(cached)
         try:
             with self.get_connection() as conn:
                 with conn.cursor() as cursor:
-                    cursor.execute("""
-                        SELECT engagement_score, daily_time, streak, dropout_risk,
-                               course_completion_rate, total_study_hours, 
-                               assignments_completed, assignments_total
-                        FROM user_stats WHERE user_id = %s
-                    """, (user_id,))
+                    cursor.execute(
+                        f"SELECT {STATS_COLUMNS} FROM user_stats WHERE user_id = %s",
+                        (user_id,)
+                    )
                     stats_row = cursor.fetchone()
                     
                     if stats_row:
-                        return {
-                            'engagement_score': float(stats_row[0]),
-                            'daily_time': float(stats_row[1]),
-                            'streak': int(stats_row[2]),
-                            'dropout_risk': float(stats_row[3]),
-                            'course_completion_rate': float(stats_row[4]),
-                            'total_study_hours': float(stats_row[5]),
-                            'assignments_completed': int(stats_row[6]),
-                            'assignments_total': int(stats_row[7]),
-                            # Add compatibility fields for existing code
-                            'completion_rate': float(stats_row[4]) / 100.0,  # Convert % to decimal
-                            'total_time': float(stats_row[5]),
-                            'name': None  # Will be filled from user data
-                        }
+                        stats = self._stats_from_row(stats_row)
+                        self.stats_cache.set(user_id, stats)
+                        return dict(stats)
             return None
         except Exception as e:
             st.error(f"Database error occurred. Please try again.")
-            return None
\ No newline at end of file
+            return None
+    
+    def update_user_stats(self, user_id: int, updates: Dict[str, Any]) -> bool:
+        """Write stats columns for a user and invalidate the cached copy"""
+        allowed = {column.strip() for column in STATS_COLUMNS.split(',')}
+        unknown = set(updates) - allowed
+        if unknown:
+            raise ValueError(f"Unknown stats columns: {', '.join(sorted(unknown))}")
+        if not updates:
+            return False
+        
+        columns = sorted(updates)
+        assignments = ', '.join(f"{column} = %s" for column in columns)
+        try:
+            with self.get_connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute(
+                        f"UPDATE user_stats SET {assignments} WHERE user_id = %s",
+                        [updates[column] for column in columns] + [user_id]
+                    )
+                    updated = cursor.rowcount > 0
+            return updated
+        except Exception as e:
+            st.error(f"Database error occurred. Please try again.")
+            return False
+        finally:
+            # Invalidate even on failure; a partially applied write must not be masked
+            self.invalidate_user(user_id)
\ No newline at end of file
@@ -0,0 +1,43 @@
+"""Measure synthetic event-stream throughput, batched and per event.
+
+Usage:
+    python benchmarks/event_stream_benchmark.py [--learners 100000] [--hours 24] [--seed 0]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from data_simulator import DataSimulator
+from event_stream import EventStream
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--learners', type=int, default=100000)
+    parser.add_argument('--hours', type=float, default=24)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    simulator = DataSimulator(seed=args.seed)
+    learners = simulator.population_user_data(simulator.generate_population(args.learners))
+    duration = args.hours * 3600
+
+    stream = EventStream(learners, seed=args.seed)
+    started = time.perf_counter()
+    count = sum(len(batch['timestamp']) for batch in stream.batches(duration=duration))
+    elapsed = time.perf_counter() - started
+    print(f"{args.learners} learners, {args.hours:g} simulated hours, {count} events")
+    print(f"batches: {elapsed:.3f}s  {count / elapsed:,.0f} events/sec")
+
+    stream.replay()
+    started = time.perf_counter()
+    count = sum(1 for _ in stream.events(duration=duration))
+    elapsed = time.perf_counter() - started
+    print(f"events:  {elapsed:.3f}s  {count / elapsed:,.0f} events/sec")
+
+
+if __name__ == '__main__':
+    main()
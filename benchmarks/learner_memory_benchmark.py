@@ -0,0 +1,67 @@
+"""Compare memory per learner: dicts vs LearnerRecord vs columnar LearnerTable.
+
+Usage:
+    python benchmarks/learner_memory_benchmark.py [--learners 200000] [--seed 0]
+"""
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from data_simulator import DataSimulator
+from engagement_analytics import EngagementAnalytics
+from learner_records import CATEGORICAL_FIELDS, LEARNER_FIELDS, LearnerRecord, LearnerTable
+
+
+def measure(build):
+    """Bytes still allocated by build()'s result, and the result itself"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return after - before, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--learners', type=int, default=200000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    simulator = DataSimulator(seed=args.seed)
+    columns = simulator.population_user_data(simulator.generate_population(args.learners))
+    columns = {field: columns[field] for field in LEARNER_FIELDS}
+
+    # Each form materializes its own values, as get_current_user_data does for dicts
+    def python_rows():
+        return zip(*(list(values) if field in CATEGORICAL_FIELDS else values.tolist()
+                     for field, values in columns.items()))
+
+    def as_dicts():
+        return [dict(zip(LEARNER_FIELDS, values)) for values in python_rows()]
+
+    def as_records():
+        return [LearnerRecord(**dict(zip(LEARNER_FIELDS, values))) for values in python_rows()]
+
+    def as_table():
+        return LearnerTable({field: values.copy() for field, values in columns.items()})
+
+    print(f"{args.learners} learners, {len(LEARNER_FIELDS)} fields")
+    results = {}
+    for label, build in [('dicts', as_dicts), ('LearnerRecord', as_records), ('LearnerTable', as_table)]:
+        size, results[label] = measure(build)
+        print(f"{label:<14} {size / 2**20:9.1f} MiB  {size / args.learners:7.0f} bytes/learner")
+
+    analytics = EngagementAnalytics(cache_size=0, seed=args.seed)
+    table_average = analytics.calculate_metrics(results['LearnerTable'])['overall_engagement']['average']
+    dict_average = analytics.calculate_metrics(results['dicts'])['overall_engagement']['average']
+    print(f"same analytics result: {abs(table_average - dict_average) < 1e-9}")
+
+
+if __name__ == '__main__':
+    main()
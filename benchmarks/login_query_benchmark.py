@@ -0,0 +1,89 @@
+"""Compare the two-query and joined single-query login lookups against PostgreSQL.
+
+Usage:
+    DATABASE_URL=postgresql://localhost/undergrad python benchmarks/login_query_benchmark.py
+
+Only the database side of login is timed; bcrypt is excluded so the numbers
+reflect round trips, not hashing cost.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from auth_manager import STATS_COLUMNS, AuthManager
+
+
+def two_query_login(auth, email):
+    """Previous login path: users lookup, then a separate user_stats query
+
+    Both queries go to the database; get_user_stats is bypassed because its
+    cache would turn the second round trip into a dictionary lookup.
+    """
+    with auth.get_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                "SELECT id, email, password_hash, name FROM users WHERE email = %s",
+                (email,)
+            )
+            user_row = cursor.fetchone()
+            cursor.execute(
+                f"SELECT {STATS_COLUMNS} FROM user_stats WHERE user_id = %s",
+                (user_row[0],)
+            )
+            stats_row = cursor.fetchone()
+    return user_row, auth._stats_from_row(stats_row) if stats_row else None
+
+
+def joined_login(auth, email):
+    """Current login path: one LEFT JOIN for user and stats"""
+    return auth._fetch_login_row(email)
+
+
+def time_path(func, auth, email, iterations, warmup):
+    for _ in range(warmup):
+        func(auth, email)
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        func(auth, email)
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        'mean_ms': statistics.mean(samples),
+        'p50_ms': samples[len(samples) // 2],
+        'p95_ms': samples[int(len(samples) * 0.95) - 1],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--email', default='benchmark.login@example.com')
+    parser.add_argument('--iterations', type=int, default=2000)
+    parser.add_argument('--warmup', type=int, default=100)
+    args = parser.parse_args()
+
+    if not os.getenv('DATABASE_URL'):
+        parser.error("DATABASE_URL must point at a PostgreSQL database")
+
+    auth = AuthManager()
+    if auth.get_user_by_email(args.email) is None:
+        auth.create_user(args.email, 'benchmark-password', 'Benchmark User')
+
+    results = {
+        'two queries': time_path(two_query_login, auth, args.email, args.iterations, args.warmup),
+        'joined query': time_path(joined_login, auth, args.email, args.iterations, args.warmup),
+    }
+    for name, stats in results.items():
+        print(f"{name:>13}: mean {stats['mean_ms']:.3f} ms  "
+              f"p50 {stats['p50_ms']:.3f} ms  p95 {stats['p95_ms']:.3f} ms")
+    speedup = results['two queries']['mean_ms'] / results['joined query']['mean_ms']
+    print(f"speedup: {speedup:.2f}x")
+    print(f"pool: {auth.pool_stats()}")
+
+
+if __name__ == '__main__':
+    main()
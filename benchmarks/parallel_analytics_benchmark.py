@@ -0,0 +1,57 @@
+"""Measure speedup of sharded multi-process analytics over the single-process columnar path.
+
+Usage:
+    python benchmarks/parallel_analytics_benchmark.py [--learners 1000000] [--repeats 3]
+
+Worker counts double from 1 up to the machine's CPU count.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from data_simulator import DataSimulator
+from engagement_analytics import EngagementAnalytics
+
+
+def synthetic_cohort(n, seed=0):
+    simulator = DataSimulator()
+    return simulator.population_user_data(simulator.generate_population(n, seed=seed), seed=seed)
+
+
+def best_of(repeats, func):
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--learners', type=int, default=1000000)
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    cohort = synthetic_cohort(args.learners)
+    analytics = EngagementAnalytics(seed=0)
+    cpus = os.cpu_count() or 1
+
+    columnar = best_of(args.repeats, lambda: analytics.calculate_metrics_columnar(cohort))
+    print(f"{args.learners} learners, {cpus} CPUs")
+    print(f"columnar, single process (baseline): {columnar:.3f}s")
+
+    worker_counts = sorted({1, cpus} | {2 ** i for i in range(cpus.bit_length()) if 2 ** i <= cpus})
+    best = None
+    for workers in worker_counts:
+        elapsed = best_of(args.repeats, lambda: analytics.calculate_metrics_parallel(cohort, workers=workers))
+        best = min(best or elapsed, elapsed)
+        print(f"sharded workers={workers:<3} {elapsed:.3f}s  speedup vs columnar {columnar / elapsed:.2f}x")
+    print(f"best sharded speedup vs columnar: {columnar / best:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""Check the KLLSketch rank error bound against exact quantiles.
+
+Usage:
+    python benchmarks/quantile_sketch_accuracy.py [--trials 50] [--size 200000]
+
+Each trial splits random data into shards and feeds them through the three
+ingestion paths (update, update_many, merge). It then compares every percentile
+from 1 to 99 with the exact rank. Exits non-zero if the worst error exceeds
+KLLSketch.rank_error_bound(k).
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from quantile_sketch import KLLSketch
+
+
+DISTRIBUTIONS = {
+    'uniform': lambda rng, n: rng.uniform(0, 100, n),
+    'normal': lambda rng, n: rng.normal(60, 15, n),
+    'lognormal': lambda rng, n: rng.lognormal(3, 1, n),
+}
+
+
+def worst_rank_error(k, data, shards, seed):
+    sketches = []
+    for index, shard in enumerate(np.array_split(data, shards)):
+        sketch = KLLSketch(k, seed=seed * shards + index)
+        if index % 2:
+            sketch.update_many(shard)
+        else:
+            for value in shard[:2000]:
+                sketch.update(value)
+            sketch.update_many(shard[2000:])
+        sketches.append(sketch)
+    merged = KLLSketch.merged(sketches)
+
+    qs = np.arange(1, 100) / 100
+    exact = np.sort(data)
+    ranks = np.searchsorted(exact, merged.quantiles(qs), side='left') / len(exact)
+    return float(np.max(np.abs(ranks - qs))), merged.size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--trials', type=int, default=50)
+    parser.add_argument('--size', type=int, default=200000)
+    parser.add_argument('--shards', type=int, default=8)
+    parser.add_argument('--k', type=int, nargs='+', default=[100, 200, 400])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    failed = False
+    for k in args.k:
+        bound = KLLSketch.rank_error_bound(k)
+        for name, generate in DISTRIBUTIONS.items():
+            started = time.perf_counter()
+            errors = []
+            for trial in range(args.trials):
+                error, size = worst_rank_error(k, generate(rng, args.size), args.shards, trial)
+                errors.append(error)
+            worst = max(errors)
+            status = 'ok' if worst <= bound else 'FAIL'
+            failed |= worst > bound
+            print(f"k={k:<4} {name:<10} worst rank error {worst:.4f} (bound {bound:.4f})  "
+                  f"retained {size} items  {time.perf_counter() - started:.1f}s  {status}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
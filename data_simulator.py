@@ -1,59 +1,277 @@
-import random
 import numpy as np
 from datetime import datetime, timedelta
 
-class DataSimulator:
-    def __init__(self):
-        """Initialize the data simulator with single user profile for personalized dashboard"""
+from learner_records import LearnerRecord, LearnerTable
+from simulation_random import SeededComponent, keyed_uniforms
+from timeseries_store import TimeSeriesStore
+
+import pandas as pd
+
+HISTORY_METRICS = ['engagement_score', 'time_spent', 'interactions', 'completed_activities']
+PEAK_HOURS = {'morning': 9, 'afternoon': 14, 'evening': 19}
+# base_metrics fields kept in a LearnerStateReducer
+STATE_METRICS = ['session_count', 'total_time', 'last_login', 'interaction_score',
+                 'evaluations_attempted', 'evaluations_passed']
+
+PROFILE_TYPES = ['high_engagement', 'moderate_engagement', 'at_risk']
+LEARNING_STYLES = ['visual', 'kinesthetic', 'auditory']
+PREFERRED_TIMES = ['morning', 'afternoon', 'evening']
+# Derived user data is recomputed once the clock enters a new bucket of this many seconds
+DERIVED_BUCKET_SECONDS = 60
+
+# Per-profile (low, high) ranges, in PROFILE_TYPES order; mirrors the single-user profiles below
+PROFILE_RANGES = {
+    'base_engagement': [(75, 95), (55, 75), (25, 55)],
+    'streak_tendency': [(0.8, 0.95), (0.6, 0.8), (0.3, 0.6)],
+    'attendance_rate': [(0.85, 0.98), (0.70, 0.85), (0.45, 0.70)],
+    'total_time': [(60, 120), (30, 80), (10, 40)],
+    'completion_rate': [(0.80, 0.95), (0.60, 0.80), (0.20, 0.60)],
+    'interaction_score': [(0.75, 0.95), (0.50, 0.75), (0.15, 0.50)],
+    'first_sem_grade': [(14, 20), (10, 16), (0, 12)],
+    'second_sem_grade': [(14, 20), (10, 16), (0, 10)],
+}
+# Integer ranges are inclusive, like self.rng.randint
+PROFILE_INT_RANGES = {
+    'age_at_enrollment': [(18, 25), (20, 28), (22, 35)],
+    'course_load': [(4, 6), (3, 5), (2, 4)],
+    'hours_since_login': [(1, 12), (6, 36), (24, 120)],
+    'session_count': [(35, 80), (20, 45), (5, 25)],
+    'evaluations_attempted': [(8, 12), (5, 10), (2, 8)],
+    'evaluations_passed': [(7, 12), (4, 8), (0, 4)],
+}
+
+class DataSimulator(SeededComponent):
+    def __init__(self, history_days=365, hourly_days=14, seed=None, rng=None, np_rng=None, clock=None,
+                 state=None):
+        """Initialize the data simulator with single user profile for personalized dashboard
+        
+        The same seed and a FrozenClock regenerate an identical dataset; see
+        SeededComponent for injecting shared generators instead. state is the
+        LearnerStateReducer that live updates are folded into: pass one with a
+        log_dir (or LearnerStateReducer.restore(log_dir)) to keep them across
+        restarts. An empty reducer is seeded with the simulated base metrics;
+        the default is an in-memory reducer.
+        """
+        self.history_days = history_days
+        self.hourly_days = hourly_days
+        self._external_state = state
+        self._init_random(seed, rng, np_rng, clock)
+        self._build()
+    
+    def _build(self):
         self.users = self._create_user_profiles()
+        self.user_index = {user['id']: user for user in self.users}
         self.base_metrics = self._initialize_base_metrics()
+        # Derived user data per id, valid until metrics change or the clock leaves
+        # derived_bucket (see DERIVED_BUCKET_SECONDS). Its random
+        # fields come from keyed_uniforms(derive_key + (epoch,), id), so a learner
+        # derives identically alone or in any batch; epoch moves on with the metrics.
+        self.derived = {}
+        self.derived_bucket = None
+        self.derive_key = (int(self.np_rng.integers(2 ** 63)),)
+        self.derive_epoch = 0
+        self._attach_state(self._external_state)
+        # Bounded per-learner history: one point per day, and hourly activity levels
+        self.history = TimeSeriesStore(HISTORY_METRICS, capacity=self.history_days)
+        self.hourly_activity = TimeSeriesStore(['activity'], capacity=self.hourly_days * 24)
+        for user in self.users:
+            current = self.get_user_by_id(user['id'])
+            self.ensure_history(user['id'], current['engagement_score'], user['preferred_time'])
+    
+    def replay(self):
+        """Rewind generators and clock and rebuild the learner state from scratch"""
+        super().replay()
+        self._build()
+    
+    def generate_population(self, n, seed=None, now=None):
+        """Generate n learners at once as columnar arrays (profiles plus base metrics)
+        
+        Categorical fields are pandas Categoricals; last_login is datetime64[us].
+        Feed the result to population_user_data for engagement and risk.
+        """
+        rng = self.np_rng if seed is None else np.random.default_rng(seed)
+        now = np.datetime64(now or self.clock(), 'us')
+        profile_codes = rng.integers(0, len(PROFILE_TYPES), n)
+        
+        population = {
+            'id': np.arange(1, n + 1),
+            'profile_type': pd.Categorical.from_codes(profile_codes, PROFILE_TYPES),
+            'learning_style': pd.Categorical.from_codes(rng.integers(0, len(LEARNING_STYLES), n), LEARNING_STYLES),
+            'preferred_time': pd.Categorical.from_codes(rng.integers(0, len(PREFERRED_TIMES), n), PREFERRED_TIMES),
+        }
+        for field, ranges in PROFILE_RANGES.items():
+            lows, highs = np.array(ranges, dtype=float).T
+            population[field] = rng.uniform(lows[profile_codes], highs[profile_codes])
+        for field, ranges in PROFILE_INT_RANGES.items():
+            lows, highs = np.array(ranges).T
+            population[field] = rng.integers(lows[profile_codes], highs[profile_codes] + 1)
+        
+        hours = population.pop('hours_since_login')
+        population['last_login'] = now - hours.astype('timedelta64[h]')
+        return population
+    
+    def _calculate_engagement_scores(self, population, now, rng, daily_variation=None):
+        """Engagement scores (clipped to 0-100) and hours since login; variation is drawn from rng unless given"""
+        time_factor = 1 + 0.1 * np.sin(now.hour * np.pi / 12)
+        hours_since_login = (np.datetime64(now, 'us') - population['last_login']) / np.timedelta64(1, 'h')
+        recency_factor = np.maximum(0.5, 1 - hours_since_login / 72)  # Decay over 3 days
+        completion_factor = 0.8 + 0.4 * population['completion_rate']
+        if daily_variation is None:
+            daily_variation = rng.uniform(0.9, 1.1, len(recency_factor))
+        
+        final_score = population['base_engagement'] * time_factor * recency_factor * completion_factor * daily_variation
+        return np.clip(final_score, 0, 100), hours_since_login
+    
+    def _calculate_dropout_risks(self, engagement_scores, hours_since_login, population):
+        """Dropout risks from engagement, inactivity, completion and interaction"""
+        completion = population['completion_rate']
+        interaction = population['interaction_score']
+        total_risk = (
+            np.select([engagement_scores < 40, engagement_scores < 60], [0.4, 0.2], 0.05)
+            + np.select([hours_since_login > 48, hours_since_login > 24], [0.3, 0.15], 0.05)
+            + np.select([completion < 0.3, completion < 0.6], [0.35, 0.15], 0.05)
+            + np.select([interaction < 0.3, interaction < 0.6], [0.2, 0.1], 0.02)
+        )
+        return np.minimum(0.95, total_risk)
+    
+    def population_user_data(self, population, seed=None, now=None):
+        """Columnar equivalent of get_current_user_data for a generated population"""
+        rng = self.np_rng if seed is None else np.random.default_rng(seed)
+        now = now or self.clock()
+        n = len(population['id'])
+        engagement_scores, hours_since_login = self._calculate_engagement_scores(population, now, rng)
+        
+        # "Today" / "Yesterday" / "N days ago" as a categorical: one small code per learner
+        days = (hours_since_login // 24).astype(np.int64)
+        max_days = int(days.max()) if n else 1
+        labels = ['Today', 'Yesterday'] + [f"{d} days ago" for d in range(2, max(2, max_days) + 1)]
+        last_active = pd.Categorical.from_codes(days.clip(0, len(labels) - 1), labels)
+        
+        user_data = {
+            field: population[field] for field in (
+                'id', 'profile_type', 'learning_style', 'preferred_time', 'age_at_enrollment',
+                'course_load', 'attendance_rate', 'total_time', 'last_login', 'session_count',
+                'interaction_score', 'first_sem_grade', 'second_sem_grade',
+                'evaluations_attempted', 'evaluations_passed'
+            )
+        }
+        user_data.update({
+            'name': np.char.add('Learner ', population['id'].astype(str)),
+            'engagement_score': engagement_scores,
+            'dropout_risk': self._calculate_dropout_risks(engagement_scores, hours_since_login, population),
+            'completion_rate': population['completion_rate'] * 100,
+            'last_active': last_active,
+            'avg_session': population['total_time'] / np.maximum(1, population['session_count']),
+            'daily_time': rng.uniform(0.5, 4.0, n),
+            'streak': np.maximum(1, (rng.uniform(1, 30, n) * population['streak_tendency']).astype(np.int64)),
+        })
+        return user_data
+    
+    def _day_start(self, moment):
+        return int(datetime(moment.year, moment.month, moment.day).timestamp())
+    
+    def ensure_history(self, user_id, base_engagement, preferred_time, days=30):
+        """Backfill simulated daily and hourly history for a learner that has none yet"""
+        if user_id in self.history:
+            return
+        now = self.clock()
+        for i in range(days):
+            date = now - timedelta(days=days-i-1)
+            
+            # Add trend and noise
+            trend = -0.5 + (i / days) * 1  # Slight upward trend
+            noise = self.rng.uniform(-5, 5)
+            self.history.append(user_id, self._day_start(date), {
+                'engagement_score': max(0, min(100, base_engagement + trend + noise)),
+                'time_spent': self.rng.uniform(0.5, 4.0),
+                'interactions': self.rng.randint(5, 50),
+                'completed_activities': self.rng.randint(0, 5)
+            })
+        
+        peak_hour = PEAK_HOURS.get(preferred_time, 19)
+        hours = self.hourly_activity.capacity
+        first_hour = int(now.replace(minute=0, second=0, microsecond=0).timestamp()) - (hours - 1) * 3600
+        for i in range(hours):
+            timestamp = first_hour + i * 3600
+            hour = datetime.fromtimestamp(timestamp).hour
+            level = max(0, self.np_rng.normal(loc=10 if abs(hour - peak_hour) < 3 else 2, scale=3))
+            self.hourly_activity.append(user_id, timestamp, {'activity': level})
+    
+    def _record_activity(self, user_id, hours_spent, interactions):
+        """Add activity to today's history point, starting a new day when needed"""
+        if user_id not in self.history:
+            return
+        today = self._day_start(self.clock())
+        times = self.history.times(user_id, last=1)
+        if times.size and times[-1] == today:
+            self.history.update_last(user_id, {
+                'time_spent': self.history.series(user_id, 'time_spent', last=1)[-1] + hours_spent,
+                'interactions': self.history.series(user_id, 'interactions', last=1)[-1] + interactions
+            })
+        else:
+            self.history.append(user_id, today, {
+                'engagement_score': self.history.latest_ewma(user_id, 'engagement_score'),
+                'time_spent': hours_spent,
+                'interactions': interactions,
+                'completed_activities': 0
+            })
+    
+    def get_hourly_pattern(self, user_id):
+        """Average activity level for each hour of the day (index 0-23)"""
+        if user_id not in self.hourly_activity:
+            return None
+        times = self.hourly_activity.times(user_id)
+        values = self.hourly_activity.series(user_id, 'activity')
+        utc_offset = int(self.clock().astimezone().utcoffset().total_seconds())
+        hours = ((times + utc_offset) // 3600) % 24
+        sums = np.bincount(hours, weights=np.nan_to_num(values), minlength=24)
+        counts = np.bincount(hours, weights=~np.isnan(values), minlength=24)
+        return np.divide(sums, counts, out=np.zeros(24), where=counts > 0)
         
     def _create_user_profiles(self):
         """Create single user profile for logged-in user based on dropout patterns"""
         # Simulate different user states - can be modified based on actual login
-        import random
-        
         # Generate a realistic user profile based on dataset patterns
-        engagement_level = random.choice(['high', 'moderate', 'at_risk'])
+        engagement_level = self.rng.choice(['high', 'moderate', 'at_risk'])
         
         if engagement_level == 'high':
             profile = {
                 'id': 1,
                 'name': 'Current User',  # Will be replaced with actual user name
                 'profile_type': 'high_engagement',
-                'base_engagement': random.uniform(75, 95),
-                'learning_style': random.choice(['visual', 'kinesthetic', 'auditory']),
-                'preferred_time': random.choice(['morning', 'afternoon', 'evening']),
-                'streak_tendency': random.uniform(0.8, 0.95),
-                'age_at_enrollment': random.randint(18, 25),
-                'course_load': random.randint(4, 6),
-                'attendance_rate': random.uniform(0.85, 0.98)
+                'base_engagement': self.rng.uniform(75, 95),
+                'learning_style': self.rng.choice(['visual', 'kinesthetic', 'auditory']),
+                'preferred_time': self.rng.choice(['morning', 'afternoon', 'evening']),
+                'streak_tendency': self.rng.uniform(0.8, 0.95),
+                'age_at_enrollment': self.rng.randint(18, 25),
+                'course_load': self.rng.randint(4, 6),
+                'attendance_rate': self.rng.uniform(0.85, 0.98)
             }
         elif engagement_level == 'moderate':
             profile = {
                 'id': 1,
                 'name': 'Current User',
                 'profile_type': 'moderate_engagement', 
-                'base_engagement': random.uniform(55, 75),
-                'learning_style': random.choice(['visual', 'kinesthetic', 'auditory']),
-                'preferred_time': random.choice(['morning', 'afternoon', 'evening']),
-                'streak_tendency': random.uniform(0.6, 0.8),
-                'age_at_enrollment': random.randint(20, 28),
-                'course_load': random.randint(3, 5),
-                'attendance_rate': random.uniform(0.70, 0.85)
+                'base_engagement': self.rng.uniform(55, 75),
+                'learning_style': self.rng.choice(['visual', 'kinesthetic', 'auditory']),
+                'preferred_time': self.rng.choice(['morning', 'afternoon', 'evening']),
+                'streak_tendency': self.rng.uniform(0.6, 0.8),
+                'age_at_enrollment': self.rng.randint(20, 28),
+                'course_load': self.rng.randint(3, 5),
+                'attendance_rate': self.rng.uniform(0.70, 0.85)
             }
         else:  # at_risk
             profile = {
                 'id': 1,
                 'name': 'Current User',
                 'profile_type': 'at_risk',
-                'base_engagement': random.uniform(25, 55),
-                'learning_style': random.choice(['visual', 'kinesthetic', 'auditory']),
-                'preferred_time': random.choice(['morning', 'afternoon', 'evening']),
-                'streak_tendency': random.uniform(0.3, 0.6),
-                'age_at_enrollment': random.randint(22, 35),
-                'course_load': random.randint(2, 4),
-                'attendance_rate': random.uniform(0.45, 0.70)
+                'base_engagement': self.rng.uniform(25, 55),
+                'learning_style': self.rng.choice(['visual', 'kinesthetic', 'auditory']),
+                'preferred_time': self.rng.choice(['morning', 'afternoon', 'evening']),
+                'streak_tendency': self.rng.uniform(0.3, 0.6),
+                'age_at_enrollment': self.rng.randint(22, 35),
+                'course_load': self.rng.randint(2, 4),
+                'attendance_rate': self.rng.uniform(0.45, 0.70)
             }
         
         return [profile]
@@ -66,199 +284,200 @@ class DataSimulator:
         # Generate realistic metrics based on profile type and dataset patterns
         if profile_type == 'high_engagement':
             metrics = {
-                'total_time': random.uniform(60, 120),
-                'completion_rate': random.uniform(0.80, 0.95),
-                'last_login': datetime.now() - timedelta(hours=random.randint(1, 12)),
-                'session_count': random.randint(35, 80),
-                'interaction_score': random.uniform(0.75, 0.95),
-                'first_sem_grade': random.uniform(14, 20),  # Based on dataset scale
-                'second_sem_grade': random.uniform(14, 20),
-                'evaluations_attempted': random.randint(8, 12),
-                'evaluations_passed': random.randint(7, 12)
+                'total_time': self.rng.uniform(60, 120),
+                'completion_rate': self.rng.uniform(0.80, 0.95),
+                'last_login': self.clock() - timedelta(hours=self.rng.randint(1, 12)),
+                'session_count': self.rng.randint(35, 80),
+                'interaction_score': self.rng.uniform(0.75, 0.95),
+                'first_sem_grade': self.rng.uniform(14, 20),  # Based on dataset scale
+                'second_sem_grade': self.rng.uniform(14, 20),
+                'evaluations_attempted': self.rng.randint(8, 12),
+                'evaluations_passed': self.rng.randint(7, 12)
             }
         elif profile_type == 'moderate_engagement':
             metrics = {
-                'total_time': random.uniform(30, 80),
-                'completion_rate': random.uniform(0.60, 0.80),
-                'last_login': datetime.now() - timedelta(hours=random.randint(6, 36)),
-                'session_count': random.randint(20, 45),
-                'interaction_score': random.uniform(0.50, 0.75),
-                'first_sem_grade': random.uniform(10, 16),
-                'second_sem_grade': random.uniform(10, 16),
-                'evaluations_attempted': random.randint(5, 10),
-                'evaluations_passed': random.randint(4, 8)
+                'total_time': self.rng.uniform(30, 80),
+                'completion_rate': self.rng.uniform(0.60, 0.80),
+                'last_login': self.clock() - timedelta(hours=self.rng.randint(6, 36)),
+                'session_count': self.rng.randint(20, 45),
+                'interaction_score': self.rng.uniform(0.50, 0.75),
+                'first_sem_grade': self.rng.uniform(10, 16),
+                'second_sem_grade': self.rng.uniform(10, 16),
+                'evaluations_attempted': self.rng.randint(5, 10),
+                'evaluations_passed': self.rng.randint(4, 8)
             }
         else:  # at_risk
             metrics = {
-                'total_time': random.uniform(10, 40),
-                'completion_rate': random.uniform(0.20, 0.60),
-                'last_login': datetime.now() - timedelta(hours=random.randint(24, 120)),
-                'session_count': random.randint(5, 25),
-                'interaction_score': random.uniform(0.15, 0.50),
-                'first_sem_grade': random.uniform(0, 12),
-                'second_sem_grade': random.uniform(0, 10),
-                'evaluations_attempted': random.randint(2, 8),
-                'evaluations_passed': random.randint(0, 4)
+                'total_time': self.rng.uniform(10, 40),
+                'completion_rate': self.rng.uniform(0.20, 0.60),
+                'last_login': self.clock() - timedelta(hours=self.rng.randint(24, 120)),
+                'session_count': self.rng.randint(5, 25),
+                'interaction_score': self.rng.uniform(0.15, 0.50),
+                'first_sem_grade': self.rng.uniform(0, 12),
+                'second_sem_grade': self.rng.uniform(0, 10),
+                'evaluations_attempted': self.rng.randint(2, 8),
+                'evaluations_passed': self.rng.randint(0, 4)
             }
         
         return {user['id']: metrics}
     
-    def _calculate_engagement_score(self, user, current_metrics):
-        """Calculate dynamic engagement score based on multiple factors"""
-        base = user['base_engagement']
-        
-        # Time-based fluctuation
-        time_factor = 1 + 0.1 * np.sin(datetime.now().hour * np.pi / 12)
-        
-        # Recent activity factor
-        hours_since_login = (datetime.now() - current_metrics['last_login']).total_seconds() / 3600
-        recency_factor = max(0.5, 1 - hours_since_login / 72)  # Decay over 3 days
-        
-        # Completion rate influence
-        completion_factor = 0.8 + 0.4 * current_metrics['completion_rate']
-        
-        # Random daily variation
-        daily_variation = random.uniform(0.9, 1.1)
-        
-        final_score = base * time_factor * recency_factor * completion_factor * daily_variation
-        return max(0, min(100, final_score))
-    
-    def _calculate_dropout_risk(self, user, engagement_score, current_metrics):
-        """Calculate dropout risk based on multiple indicators"""
-        risk_factors = []
-        
-        # Low engagement risk
-        if engagement_score < 40:
-            risk_factors.append(0.4)
-        elif engagement_score < 60:
-            risk_factors.append(0.2)
-        else:
-            risk_factors.append(0.05)
-        
-        # Inactivity risk
-        hours_since_login = (datetime.now() - current_metrics['last_login']).total_seconds() / 3600
-        if hours_since_login > 48:
-            risk_factors.append(0.3)
-        elif hours_since_login > 24:
-            risk_factors.append(0.15)
+    def _attach_state(self, reducer):
+        """Use reducer as the source of truth for STATE_METRICS"""
+        if reducer is None:
+            # Imported here: learner_state -> event_stream -> data_simulator
+            from learner_state import LearnerStateReducer
+            reducer = LearnerStateReducer()
+        self.state = reducer
+        if len(reducer):
+            self.sync_from_state(reducer)
         else:
-            risk_factors.append(0.05)
-        
-        # Low completion rate risk
-        if current_metrics['completion_rate'] < 0.3:
-            risk_factors.append(0.35)
-        elif current_metrics['completion_rate'] < 0.6:
-            risk_factors.append(0.15)
-        else:
-            risk_factors.append(0.05)
-        
-        # Low interaction risk
-        if current_metrics['interaction_score'] < 0.3:
-            risk_factors.append(0.2)
-        elif current_metrics['interaction_score'] < 0.6:
-            risk_factors.append(0.1)
-        else:
-            risk_factors.append(0.02)
-        
-        total_risk = min(0.95, sum(risk_factors))
-        return total_risk
+            self.baseline_state(reducer)
     
     def update_real_time_data(self):
-        """Update metrics to simulate real-time changes"""
-        for user_id, metrics in self.base_metrics.items():
+        """Simulate real-time activity as learner events folded into self.state
+        
+        base_metrics only change by syncing from the reducer, so a logged
+        reducer restored after a restart reproduces every live update.
+        """
+        now = self.clock()
+        events = []
+        for user_id in self.base_metrics:
             # Simulate some users being more active
-            if random.random() < 0.3:  # 30% chance of activity update
-                metrics['last_login'] = datetime.now() - timedelta(minutes=random.randint(1, 60))
-                metrics['session_count'] += random.randint(0, 2)
-                metrics['total_time'] += random.uniform(0, 2)
-                metrics['interaction_score'] = min(1.0, metrics['interaction_score'] + random.uniform(-0.1, 0.2))
+            if self.rng.random() < 0.3:  # 30% chance of activity update
+                added_time = self.rng.uniform(0, 2)
+                login = (now - timedelta(minutes=self.rng.randint(1, 60))).timestamp()
+                sessions = self.rng.randint(0, 2)
+                events.append((login, user_id, 'login', 0.0))
+                events.extend((login, user_id, 'session_start', 0.0) for _ in range(sessions))
+                events.append((login, user_id, 'session_end', added_time * 3600))
+                events.append((login, user_id, 'interaction_adjust', self.rng.uniform(-0.1, 0.2)))
+                self._record_activity(user_id, added_time, self.rng.randint(0, 5))
+        self.state.apply_events(events)
+        self.sync_from_state(self.state)
     
-    def get_current_user_data(self):
-        """Get comprehensive data for the current logged-in user"""
-        user = self.users[0]  # Single user
-        metrics = self.base_metrics[user['id']]
-        engagement_score = self._calculate_engagement_score(user, metrics)
-        dropout_risk = self._calculate_dropout_risk(user, engagement_score, metrics)
-        
-        # Calculate additional metrics
-        avg_session = metrics['total_time'] / max(1, metrics['session_count'])
-        daily_time = random.uniform(0.5, 4.0)
-        streak = max(1, int(random.uniform(1, 30) * user['streak_tendency']))
-        
-        # Determine last active status
-        hours_since_login = (datetime.now() - metrics['last_login']).total_seconds() / 3600
+    def baseline_state(self, reducer):
+        """Record current base metrics as each learner's starting state in a LearnerStateReducer"""
+        for user_id, metrics in self.base_metrics.items():
+            reducer.set_baseline(user_id, **{field: metrics[field] for field in STATE_METRICS})
+        if reducer.log_dir:
+            reducer.checkpoint()
+    
+    def sync_from_state(self, reducer):
+        """Overwrite base metrics with a reducer's folded event state (e.g. after restore)"""
+        for user_id, metrics in self.base_metrics.items():
+            state = reducer.learner_state(user_id)
+            if state is None:
+                continue
+            metrics.update({field: state[field] for field in STATE_METRICS if state[field] is not None})
+        self.derived.clear()
+        self.derive_epoch += 1
+    
+    def _last_active(self, hours_since_login):
         if hours_since_login < 24:
-            last_active = "Today"
+            return "Today"
         elif hours_since_login < 48:
-            last_active = "Yesterday"
-        else:
-            last_active = f"{int(hours_since_login/24)} days ago"
-        
-        user_data = {
-            'id': user['id'],
-            'name': user['name'],
-            'profile_type': user['profile_type'],
-            'engagement_score': engagement_score,
-            'dropout_risk': dropout_risk,
-            'total_time': metrics['total_time'],
-            'completion_rate': metrics['completion_rate'] * 100,
-            'last_login': metrics['last_login'],
-            'last_active': last_active,
-            'session_count': metrics['session_count'],
-            'avg_session': avg_session,
-            'daily_time': daily_time,
-            'streak': streak,
-            'interaction_score': metrics['interaction_score'],
-            'learning_style': user['learning_style'],
-            'preferred_time': user['preferred_time'],
-            'age_at_enrollment': user['age_at_enrollment'],
-            'course_load': user['course_load'],
-            'attendance_rate': user['attendance_rate'],
-            'first_sem_grade': metrics['first_sem_grade'],
-            'second_sem_grade': metrics['second_sem_grade'],
-            'evaluations_attempted': metrics['evaluations_attempted'],
-            'evaluations_passed': metrics['evaluations_passed']
-        }
+            return "Yesterday"
+        return f"{int(hours_since_login/24)} days ago"
+    
+    def _user_record(self, user, metrics, engagement_score, dropout_risk, hours_since_login, daily_time, streak):
+        return LearnerRecord(
+            id=user['id'],
+            name=user['name'],
+            profile_type=user['profile_type'],
+            engagement_score=engagement_score,
+            dropout_risk=dropout_risk,
+            total_time=metrics['total_time'],
+            completion_rate=metrics['completion_rate'] * 100,
+            last_login=metrics['last_login'],
+            last_active=self._last_active(hours_since_login),
+            session_count=metrics['session_count'],
+            avg_session=metrics['total_time'] / max(1, metrics['session_count']),
+            daily_time=daily_time,
+            streak=streak,
+            interaction_score=metrics['interaction_score'],
+            learning_style=user['learning_style'],
+            preferred_time=user['preferred_time'],
+            age_at_enrollment=user['age_at_enrollment'],
+            course_load=user['course_load'],
+            attendance_rate=user['attendance_rate'],
+            first_sem_grade=metrics['first_sem_grade'],
+            second_sem_grade=metrics['second_sem_grade'],
+            evaluations_attempted=metrics['evaluations_attempted'],
+            evaluations_passed=metrics['evaluations_passed']
+        )
+    
+    def get_current_user_data(self):
+        """Get comprehensive data for the current logged-in user"""
+        return self.get_user_by_id(self.users[0]['id'])  # Single user
+    
+    def get_users_data(self, user_ids=None, now=None, as_table=False):
+        """Derived data for many users (default: all) in one vectorized pass and one clock read
         
-        return user_data
+        Results are reused until metrics change or now moves to another
+        DERIVED_BUCKET_SECONDS bucket; each call returns fresh LearnerRecords,
+        or one columnar LearnerTable with as_table.
+        """
+        now = now or self.clock()
+        bucket = int(now.timestamp() // DERIVED_BUCKET_SECONDS)
+        if bucket != self.derived_bucket:
+            self.derived.clear()
+            self.derived_bucket = bucket
+        user_ids = list(self.user_index) if user_ids is None else user_ids
+        missing = [user_id for user_id in user_ids if user_id in self.user_index and user_id not in self.derived]
+        if missing:
+            users = [self.user_index[user_id] for user_id in missing]
+            metrics = [self.base_metrics[user_id] for user_id in missing]
+            columns = {
+                'base_engagement': np.array([user['base_engagement'] for user in users]),
+                'last_login': np.array([m['last_login'] for m in metrics], dtype='datetime64[us]'),
+                'completion_rate': np.array([m['completion_rate'] for m in metrics]),
+                'interaction_score': np.array([m['interaction_score'] for m in metrics]),
+            }
+            # Per learner: daily variation, daily time, streak draw
+            draws = keyed_uniforms(self.derive_key + (self.derive_epoch,), missing, 3)
+            engagement_scores, hours_since_login = self._calculate_engagement_scores(
+                columns, now, self.np_rng, daily_variation=0.9 + 0.2 * draws[:, 0]
+            )
+            dropout_risks = self._calculate_dropout_risks(engagement_scores, hours_since_login, columns)
+            daily_times = 0.5 + 3.5 * draws[:, 1]
+            streak_draws = 1 + 29 * draws[:, 2]
+            for i, (user, user_metrics) in enumerate(zip(users, metrics)):
+                self.derived[user['id']] = self._user_record(
+                    user, user_metrics, float(engagement_scores[i]), float(dropout_risks[i]),
+                    float(hours_since_login[i]), float(daily_times[i]),
+                    max(1, int(streak_draws[i] * user['streak_tendency']))
+                )
+        records = [self.derived[user_id].copy() for user_id in user_ids if user_id in self.derived]
+        return LearnerTable.from_records(records) if as_table else records
     
     def get_all_users_data(self):
         """Get data for all users (single user in this case) - for compatibility"""
-        return [self.get_current_user_data()]
+        return self.get_users_data()
     
     def get_user_by_id(self, user_id):
-        """Get specific user data by ID"""
-        all_users = self.get_all_users_data()
-        return next((user for user in all_users if user['id'] == user_id), None)
+        """Get specific user data by ID (O(1), computing only this user if needed)"""
+        if user_id not in self.user_index:
+            return None
+        return self.get_users_data([user_id])[0]
     
     def get_historical_data(self, user_id, days=30):
-        """Generate historical data for trends and analysis"""
-        user = self.get_user_by_id(user_id)
-        if not user:
+        """Get daily history for trends and analysis from the time-series store"""
+        if user_id not in self.history:
             return None
         
-        historical_data = []
-        base_engagement = user['engagement_score']
+        times = self.history.times(user_id, last=days)
+        columns = {metric: self.history.series(user_id, metric, last=days) for metric in HISTORY_METRICS}
         
-        for i in range(days):
-            date = datetime.now() - timedelta(days=days-i-1)
-            
-            # Add trend and noise
-            trend = -0.5 + (i / days) * 1  # Slight upward trend
-            noise = random.uniform(-5, 5)
-            engagement = max(0, min(100, base_engagement + trend + noise))
-            
-            daily_data = {
-                'date': date,
-                'engagement_score': engagement,
-                'time_spent': random.uniform(0.5, 4.0),
-                'interactions': random.randint(5, 50),
-                'completed_activities': random.randint(0, 5)
+        return [
+            {
+                'date': datetime.fromtimestamp(int(timestamp)),
+                'engagement_score': float(columns['engagement_score'][i]),
+                'time_spent': float(columns['time_spent'][i]),
+                'interactions': int(columns['interactions'][i]),
+                'completed_activities': int(columns['completed_activities'][i])
             }
-            
-            historical_data.append(daily_data)
-        
-        return historical_data
+            for i, timestamp in enumerate(times)
+        ]
     
     def get_user_courses(self):
         """Get enrolled courses for the current user"""
@@ -270,10 +489,10 @@ class DataSimulator:
                 'instructor': 'Dr. Sarah Johnson',
                 'credits': 3,
                 'status': 'Active',
-                'progress': random.uniform(45, 85),
-                'engagement_rate': random.uniform(60, 95),
-                'current_grade': f"{random.uniform(75, 95):.1f}%",
-                'next_assignment': f"Due in {random.randint(2, 14)} days"
+                'progress': self.rng.uniform(45, 85),
+                'engagement_rate': self.rng.uniform(60, 95),
+                'current_grade': f"{self.rng.uniform(75, 95):.1f}%",
+                'next_assignment': f"Due in {self.rng.randint(2, 14)} days"
             },
             {
                 'id': 'MATH201',
@@ -281,10 +500,10 @@ class DataSimulator:
                 'instructor': 'Prof. Michael Chen',
                 'credits': 4,
                 'status': 'Active',
-                'progress': random.uniform(35, 75),
-                'engagement_rate': random.uniform(45, 80),
-                'current_grade': f"{random.uniform(70, 90):.1f}%",
-                'next_assignment': f"Due in {random.randint(1, 7)} days"
+                'progress': self.rng.uniform(35, 75),
+                'engagement_rate': self.rng.uniform(45, 80),
+                'current_grade': f"{self.rng.uniform(70, 90):.1f}%",
+                'next_assignment': f"Due in {self.rng.randint(1, 7)} days"
             },
             {
                 'id': 'ENG102',
@@ -292,10 +511,10 @@ class DataSimulator:
                 'instructor': 'Dr. Emily Rodriguez',
                 'credits': 3,
                 'status': 'Active',
-                'progress': random.uniform(55, 90),
-                'engagement_rate': random.uniform(70, 95),
-                'current_grade': f"{random.uniform(80, 95):.1f}%",
-                'next_assignment': f"Due in {random.randint(3, 10)} days"
+                'progress': self.rng.uniform(55, 90),
+                'engagement_rate': self.rng.uniform(70, 95),
+                'current_grade': f"{self.rng.uniform(80, 95):.1f}%",
+                'next_assignment': f"Due in {self.rng.randint(3, 10)} days"
             },
             {
                 'id': 'PHYS101',
@@ -303,19 +522,18 @@ class DataSimulator:
                 'instructor': 'Dr. Robert Kim',
                 'credits': 4,
                 'status': 'At Risk',
-                'progress': random.uniform(25, 55),
-                'engagement_rate': random.uniform(30, 65),
-                'current_grade': f"{random.uniform(60, 75):.1f}%",
-                'next_assignment': f"Due in {random.randint(1, 3)} days"
+                'progress': self.rng.uniform(25, 55),
+                'engagement_rate': self.rng.uniform(30, 65),
+                'current_grade': f"{self.rng.uniform(60, 75):.1f}%",
+                'next_assignment': f"Due in {self.rng.randint(1, 3)} days"
             }
         ]
         
-        # Adjust courses based on user's dropout risk
-        user_data = self.get_current_user_data()
-        if user_data['dropout_risk'] > 0.6:
+        # Adjust courses based on user's dropout risk (reuses the current derived data)
+        if self.get_current_user_data()['dropout_risk'] > 0.6:
             # Make more courses at risk
             for course in courses[-2:]:
-                course['engagement_rate'] = random.uniform(25, 55)
+                course['engagement_rate'] = self.rng.uniform(25, 55)
                 course['status'] = 'At Risk'
         
         return courses
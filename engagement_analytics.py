@@ -1,19 +1,149 @@
 import numpy as np
 import pandas as pd
+from bisect import bisect_right
+from collections import Counter
 from datetime import datetime, timedelta
-import random
+import hashlib
+import heapq
+import math
+import os
+from operator import itemgetter
 
-class EngagementAnalytics:
-    def __init__(self):
-        """Initialize the engagement analytics engine"""
+from learner_records import LearnerTable
+from learner_snapshots import load_snapshot, snapshot_info
+from parallel_analytics import calculate_metrics_parallel
+from quantile_sketch import KLLSketch
+from simulation_random import SeededComponent
+from trend_engine import engagement_slopes, series_from_history
+from ttl_cache import TTLCache
+
+class EngagementAnalytics(SeededComponent):
+    SKETCH_FIELDS = ['engagement_score', 'total_time', 'interaction_score']
+    PERCENTILES = [0.1, 0.25, 0.5, 0.75, 0.9]
+    
+    def __init__(self, use_sketches=False, sketch_k=200, cache_size=32, seed=None, rng=None, np_rng=None):
+        """Initialize the engagement analytics engine
+        
+        With use_sketches the median comes from a KLL sketch (see KLLSketch for the
+        rank error bound) instead of an exact np.median. Results are memoized per
+        snapshot in an LRU of cache_size entries (0 disables it). seed/rng make the
+        simulated precision/recall figures and the sketch estimates reproducible
+        (see SeededComponent).
+        """
+        self._init_random(seed, rng, np_rng)
+        # Fixed per instance, so the same data always yields the same sketch estimates
+        self.sketch_seed = self.seed if self.seed is not None else self.rng.getrandbits(63)
         self.risk_thresholds = {
             'low': 0.3,
             'medium': 0.6,
             'high': 0.8
         }
+        self.use_sketches = use_sketches
+        self.sketch_k = sketch_k
+        # Snapshots don't expire by age, only by LRU eviction
+        self.results_cache = TTLCache(maxsize=cache_size, ttl=math.inf) if cache_size else None
+        # Per-user engagement slopes (points/day) fitted from historical series
+        self.trend_slopes = pd.Series(dtype=float)
+    
+    def set_engagement_history(self, user_ids, series, window=None, halflife=None):
+        """Fit per-user trends from daily engagement series, one row per user id
+        
+        window limits the fit to the most recent days; halflife (in days) weights
+        recent days exponentially more.
+        """
+        slopes = engagement_slopes(series, window=window, halflife=halflife)
+        self.trend_slopes = pd.Series(slopes, index=pd.Index(user_ids)).dropna()
+        if self.results_cache is not None:
+            # Trends are not part of the snapshot fingerprint
+            self.results_cache.clear()
+    
+    def load_history_from_simulator(self, simulator, user_ids, days=30, window=None, halflife=None):
+        """Fit trends from DataSimulator.get_historical_data for the given users"""
+        histories = [simulator.get_historical_data(user_id, days) for user_id in user_ids]
+        self.set_engagement_history(user_ids, series_from_history(histories), window, halflife)
+    
+    def engagement_trend(self, user_ids):
+        """Mean fitted slope over the given users (0 when none have history)"""
+        if self.trend_slopes.empty:
+            return 0.0
+        trend = self.trend_slopes.reindex(pd.Index(user_ids)).mean()
+        return 0.0 if pd.isna(trend) else float(trend)
+    
+    def user_trend(self, user_id):
+        """Fitted slope for one user, or None without history"""
+        return self.trend_slopes.get(user_id)
+    
+    def fingerprint(self, users_data):
+        """Cheap content hash of the fields the panels read (COLUMNAR_FIELDS and id)
+        
+        Other fields (names, grades, ...) are not hashed. For a list of records
+        this is still one pass per field; callers that already know when the
+        cohort changes should pass version= to calculate_metrics or
+        generate_insights, which skips hashing altogether.
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        columnar = isinstance(users_data, (pd.DataFrame, dict))
+        for field in self.COLUMNAR_FIELDS + ['id']:
+            if columnar:
+                if field not in users_data:
+                    continue
+                values = users_data[field]
+                if isinstance(getattr(values, 'dtype', None), pd.CategoricalDtype):
+                    values = pd.Categorical(values)
+                    digest.update(pd.util.hash_array(np.asarray(values.categories, dtype=object)).tobytes())
+                    values = values.codes
+                values = np.asarray(values)
+                if values.dtype == object:
+                    values = pd.util.hash_pandas_object(pd.Series(values), index=False).to_numpy()
+            elif field in self.LABEL_FIELDS:
+                # A handful of distinct labels: hash first-appearance codes plus the labels themselves
+                labels = np.fromiter(map(itemgetter(field), users_data), dtype=object,
+                                     count=len(users_data))
+                values, uniques = pd.factorize(labels, sort=False)
+                digest.update(pd.util.hash_array(np.asarray(uniques, dtype=object)).tobytes())
+            elif field == 'id':
+                # Optional (no trend without it) and usually, but not necessarily, numeric
+                ids = [user.get('id') for user in users_data]
+                try:
+                    values = np.asarray(ids, dtype=float)
+                except (TypeError, ValueError):
+                    values = pd.util.hash_array(np.asarray(ids, dtype=object))
+            else:
+                values = np.fromiter(map(itemgetter(field), users_data), dtype=float, count=len(users_data))
+            digest.update(field.encode())
+            digest.update(values.tobytes())
+        return digest.hexdigest()
+    
+    def _memoized(self, panel, users_data, compute, version=None):
+        """Compute a panel once per snapshot; version (e.g. a refresh counter) skips hashing
+        
+        Cached results are shared between callers and must be treated as read-only.
+        """
+        if self.results_cache is None:
+            return compute(users_data)
+        key = (panel, version if version is not None else self.fingerprint(users_data))
+        result = self.results_cache.get(key)
+        if result is None:
+            result = compute(users_data)
+            self.results_cache.set(key, result)
+        return result
+    
+    def cache_stats(self):
+        """Hit/miss statistics for memoized results"""
+        return self.results_cache.stats() if self.results_cache is not None else {}
+    
+    def _as_columns(self, users_data):
+        """LearnerTables are analysed through their column arrays"""
+        return users_data.columns if isinstance(users_data, LearnerTable) else users_data
+    
+    def calculate_metrics(self, users_data, version=None):
+        """Calculate comprehensive engagement metrics (memoized per snapshot)"""
+        return self._memoized('metrics', self._as_columns(users_data), self._compute_metrics, version)
+    
+    def _compute_metrics(self, users_data):
+        if isinstance(users_data, (pd.DataFrame, dict)):
+            return self.calculate_metrics_columnar(users_data)
         
-    def calculate_metrics(self, users_data):
-        """Calculate comprehensive engagement metrics"""
         metrics = {
             'overall_engagement': self._calculate_overall_engagement(users_data),
             'risk_distribution': self._calculate_risk_distribution(users_data),
@@ -23,33 +153,107 @@ class EngagementAnalytics:
         }
         return metrics
     
+    def load_snapshot(self, path):
+        """Load only the columns the metrics need from an Arrow/Parquet learner snapshot"""
+        available = set(snapshot_info(path)['columns'])
+        fields = [field for field in self.COLUMNAR_FIELDS + ['id'] if field in available]
+        return load_snapshot(path, columns=fields)
+    
+    def calculate_metrics_from_snapshot(self, path):
+        """Calculate metrics for a snapshot file, memoized by path and modification time"""
+        version = (os.path.abspath(path), os.stat(path).st_mtime_ns)
+        return self._memoized('metrics', path, lambda p: self._compute_metrics(self.load_snapshot(p)), version)
+    
+    def calculate_metrics_parallel(self, users_data, workers=None, shards=None, seed=None):
+        """Calculate metrics over shards in a process pool (for very large cohorts)
+        
+        seed drives the shard sketches and defaults to this instance's sketch_seed.
+        """
+        users_data = self._as_columns(users_data)
+        if isinstance(users_data, (pd.DataFrame, dict)):
+            user_ids = users_data['id'] if 'id' in users_data else []
+        else:
+            user_ids = [user.get('id') for user in users_data]
+        return calculate_metrics_parallel(
+            users_data, self.risk_thresholds, workers=workers, shards=shards,
+            sketch_k=self.sketch_k, seed=self.sketch_seed if seed is None else seed, trend=self.engagement_trend(user_ids), rng=self.rng
+        )
+    
     def _calculate_overall_engagement(self, users_data):
         """Calculate overall engagement statistics"""
         engagement_scores = [user['engagement_score'] for user in users_data]
         
         return {
             'average': np.mean(engagement_scores),
-            'median': np.median(engagement_scores),
+            'median': self._median(engagement_scores),
             'std_dev': np.std(engagement_scores),
             'min': np.min(engagement_scores),
             'max': np.max(engagement_scores),
             'trend': self._calculate_engagement_trend(users_data)
         }
     
-    def _calculate_engagement_trend(self, users_data):
-        """Calculate engagement trend over time"""
-        # Simulate trend calculation (in real app, this would use historical data)
-        trends = []
-        for user in users_data:
-            if user['profile_type'] == 'high_engagement':
-                trend = random.uniform(0.5, 2.0)  # Positive trend
-            elif user['profile_type'] == 'moderate_engagement':
-                trend = random.uniform(-0.5, 1.0)  # Mixed trend
-            else:
-                trend = random.uniform(-2.0, 0.5)  # Negative trend
-            trends.append(trend)
+    def _median(self, values):
+        """Exact median, or the sketch estimate in sketch mode"""
+        if self.use_sketches:
+            sketch = self._sketch('median')
+            sketch.update_many(values)
+            return sketch.quantile(0.5)
+        return np.median(values)
+    
+    def _sketch(self, purpose):
+        """Empty KLLSketch seeded from sketch_seed and its purpose (a field name)"""
+        return KLLSketch(self.sketch_k, seed=f"{self.sketch_seed}:{purpose}")
+    
+    def build_sketches(self, users_data):
+        """Mergeable quantile sketches of engagement, learning time and interaction
         
-        return np.mean(trends)
+        Build one set per course or shard, combine them with merge_sketches, and
+        read medians, percentiles and distributions with summarize_sketches.
+        """
+        users_data = self._as_columns(users_data)
+        if isinstance(users_data, (pd.DataFrame, dict)):
+            columns = {field: users_data[field] for field in self.SKETCH_FIELDS}
+        else:
+            columns = {field: [user[field] for user in users_data] for field in self.SKETCH_FIELDS}
+        sketches = {}
+        for field, values in columns.items():
+            sketch = self._sketch(field)
+            sketch.update_many(np.asarray(values, dtype=float))
+            sketches[field] = sketch
+        return sketches
+    
+    def merge_sketches(self, sketch_sets):
+        """Combine per-course or per-shard sketch sets from build_sketches"""
+        sketch_sets = list(sketch_sets)
+        return {
+            field: KLLSketch.merged((sketches[field] for sketches in sketch_sets),
+                                    seed=f"{self.sketch_seed}:merge:{field}")
+            for field in self.SKETCH_FIELDS
+        }
+    
+    def summarize_sketches(self, sketches):
+        """Median, percentiles and bucket distributions from (possibly merged) sketches"""
+        engagement = sketches['engagement_score']
+        percentiles = dict(zip(
+            [f"p{int(q * 100)}" for q in self.PERCENTILES],
+            engagement.quantiles(self.PERCENTILES)
+        ))
+        return {
+            'count': engagement.count,
+            'median': percentiles['p50'],
+            'percentiles': percentiles,
+            'time_distribution': sketches['total_time'].bucket_counts(
+                [10, 30, 60], ['0-10h', '10-30h', '30-60h', '60h+']
+            ),
+            'interaction_distribution': sketches['interaction_score'].bucket_counts(
+                [0.4, 0.7], ['low', 'medium', 'high']
+            ),
+            'rank_error': engagement.rank_error
+        }
+    
+    def _calculate_engagement_trend(self, users_data):
+        """Calculate engagement trend over time from fitted historical slopes"""
+        return self.engagement_trend([user.get('id') for user in users_data])
     
     def _calculate_risk_distribution(self, users_data):
         """Calculate distribution of dropout risk levels"""
@@ -181,9 +385,9 @@ class EngagementAnalytics:
         
         return {
             'overall_accuracy': adjusted_accuracy,
-            'precision': adjusted_accuracy * random.uniform(0.95, 1.05),
-            'recall': adjusted_accuracy * random.uniform(0.9, 1.0),
-            'f1_score': adjusted_accuracy * random.uniform(0.92, 1.02)
+            'precision': adjusted_accuracy * self.rng.uniform(0.95, 1.05),
+            'recall': adjusted_accuracy * self.rng.uniform(0.9, 1.0),
+            'f1_score': adjusted_accuracy * self.rng.uniform(0.92, 1.02)
         }
     
     def _assess_data_quality(self, users_data):
@@ -207,10 +411,15 @@ class EngagementAnalytics:
         
         return np.mean(quality_factors)
     
-    def generate_insights(self, users_data):
+    def generate_insights(self, users_data, version=None):
         """Generate actionable insights from the analytics"""
+        return self._memoized(
+            'insights', self._as_columns(users_data), lambda data: self._build_insights(data, version), version
+        )
+    
+    def _build_insights(self, users_data, version=None):
         insights = []
-        metrics = self.calculate_metrics(users_data)
+        metrics = self.calculate_metrics(users_data, version)
         
         # Engagement insights
         avg_engagement = metrics['overall_engagement']['average']
@@ -243,3 +452,418 @@ class EngagementAnalytics:
             })
         
         return insights
+    
+    # Columnar engine: same output as the dict-based methods above, computed with array ops
+    
+    COLUMNAR_FIELDS = [
+        'engagement_score', 'dropout_risk', 'total_time', 'avg_session', 'daily_time',
+        'interaction_score', 'session_count', 'profile_type', 'preferred_time', 'last_active'
+    ]
+    LABEL_FIELDS = ('profile_type', 'preferred_time', 'last_active')
+    
+    def _to_columns(self, data):
+        """Normalize a DataFrame or dict of sequences into a dict of NumPy arrays"""
+        fields = self.COLUMNAR_FIELDS + (['id'] if 'id' in data else [])
+        if isinstance(data, pd.DataFrame):
+            # Categorical columns (e.g. from snapshots) stay encoded instead of expanding to strings
+            return {
+                field: data[field].array if isinstance(data[field].dtype, pd.CategoricalDtype)
+                else data[field].to_numpy()
+                for field in fields
+            }
+        return {
+            field: data[field] if isinstance(data[field], pd.Categorical) else np.asarray(data[field])
+            for field in fields
+        }
+    
+    def _group_codes(self, values):
+        """Encode labels as integer codes ordered by first appearance (matches dict insertion order)"""
+        if isinstance(values, pd.Categorical):
+            order = pd.unique(values.codes[values.codes >= 0])
+            remap = np.zeros(len(values.categories), dtype=np.intp)
+            remap[order] = np.arange(len(order))
+            return [str(values.categories[code]) for code in order], remap[values.codes]
+        codes, uniques = pd.factorize(values, sort=False)
+        return [str(label) for label in uniques], codes
+    
+    def _bucket_counts(self, values, edges, labels):
+        """Count values per bucket; edges are exclusive upper bounds like the dict-based loops"""
+        counts = np.bincount(np.digitize(values, edges), minlength=len(labels))
+        return {label: int(count) for label, count in zip(labels, counts)}
+    
+    def calculate_metrics_columnar(self, data):
+        """Calculate metrics from a LearnerTable, DataFrame or dict of NumPy arrays with vectorized ops"""
+        columns = self._to_columns(self._as_columns(data))
+        engagement = columns['engagement_score'].astype(float)
+        risk = columns['dropout_risk'].astype(float)
+        total_times = columns['total_time'].astype(float)
+        sessions = columns['avg_session'].astype(float)
+        interactions = columns['interaction_score'].astype(float)
+        total_users = len(engagement)
+        
+        profile_labels, profile_codes = self._group_codes(columns['profile_type'])
+        
+        # Risk levels
+        risk_counts = self._bucket_counts(
+            risk, [self.risk_thresholds['low'], self.risk_thresholds['medium']], ['low', 'medium', 'high']
+        )
+        
+        # Session means per profile type via one weighted bincount
+        session_sums = np.bincount(profile_codes, weights=sessions, minlength=len(profile_labels))
+        session_counts = np.bincount(profile_codes, minlength=len(profile_labels))
+        
+        # Peak hours: counts sorted descending, ties kept in first-appearance order
+        time_labels, time_codes = self._group_codes(columns['preferred_time'])
+        time_counts = np.bincount(time_codes, minlength=len(time_labels))
+        peak_hours = sorted(
+            ((label, int(count)) for label, count in zip(time_labels, time_counts)),
+            key=lambda x: x[1], reverse=True
+        )
+        
+        correlation = np.corrcoef(interactions, engagement)[0, 1] if total_users > 1 else 0
+        
+        # Data quality for prediction accuracy
+        completeness = np.count_nonzero(columns['session_count'] > 5) / total_users
+        recency = np.count_nonzero(pd.Series(columns['last_active']).isin(['Today', 'Yesterday']).to_numpy()) / total_users
+        variance_score = min(1.0, float(np.std(engagement)) / 30)
+        adjusted_accuracy = 0.85 * np.mean([completeness, recency, variance_score])
+        
+        return {
+            'overall_engagement': {
+                'average': np.mean(engagement),
+                'median': self._median(engagement),
+                'std_dev': np.std(engagement),
+                'min': np.min(engagement),
+                'max': np.max(engagement),
+                'trend': self.engagement_trend(columns.get('id', []))
+            },
+            'risk_distribution': {
+                'counts': risk_counts,
+                'percentages': {
+                    level: (count / total_users) * 100
+                    for level, count in risk_counts.items()
+                }
+            },
+            'time_analytics': {
+                'total_learning_time': {
+                    'sum': float(np.sum(total_times)),
+                    'average': np.mean(total_times),
+                    'distribution': self._bucket_counts(
+                        total_times, [10, 30, 60], ['0-10h', '10-30h', '30-60h', '60h+']
+                    )
+                },
+                'average_session_length': {
+                    'overall': np.mean(sessions),
+                    'by_user_type': {
+                        label: session_sums[code] / session_counts[code]
+                        for code, label in enumerate(profile_labels)
+                    }
+                },
+                'daily_engagement': {
+                    'average': np.mean(columns['daily_time'].astype(float)),
+                    'peak_hours': peak_hours
+                }
+            },
+            'interaction_patterns': {
+                'average_interaction': np.mean(interactions),
+                'interaction_distribution': self._bucket_counts(
+                    interactions, [0.4, 0.7], ['low', 'medium', 'high']
+                ),
+                'engagement_correlation': correlation
+            },
+            'prediction_accuracy': {
+                'overall_accuracy': adjusted_accuracy,
+                'precision': adjusted_accuracy * self.rng.uniform(0.95, 1.05),
+                'recall': adjusted_accuracy * self.rng.uniform(0.9, 1.0),
+                'f1_score': adjusted_accuracy * self.rng.uniform(0.92, 1.02)
+            }
+        }
+    
+
+
+class OrderStatistics:
+    """Exact median, min and max of a multiset with O(log n) add and remove
+    
+    The lower half sits in a max-heap and the upper half in a min-heap, and two
+    more heaps track min and max. Removal is lazy: a removed value is counted
+    and discarded when it surfaces at a heap top. The heaps are rebuilt when
+    dead entries outnumber live ones, which keeps memory O(n) and costs
+    amortized O(log n) per update.
+    """
+    
+    def __init__(self):
+        self.counts = Counter()  # live value -> multiplicity
+        self.size = 0
+        self._rebuild()
+    
+    def _rebuild(self):
+        values = sorted(self.counts.elements())
+        half = (len(values) + 1) // 2
+        self.low = [-value for value in reversed(values[:half])]  # max-heap via negation; reversed is a valid heap
+        self.high = values[half:]  # ascending order is a valid min-heap
+        self.low_size, self.high_size = half, len(values) - half
+        self.mins = list(values)
+        self.maxs = [-value for value in reversed(values)]
+        self.low_dead, self.high_dead, self.min_dead, self.max_dead = Counter(), Counter(), Counter(), Counter()
+    
+    @staticmethod
+    def _prune(heap, dead, sign):
+        while heap and dead[sign * heap[0]]:
+            dead[sign * heap[0]] -= 1
+            heapq.heappop(heap)
+    
+    def _balance(self):
+        if self.low_size > self.high_size + 1:
+            self._prune(self.low, self.low_dead, -1)
+            heapq.heappush(self.high, -heapq.heappop(self.low))
+            self.low_size -= 1
+            self.high_size += 1
+        elif self.high_size > self.low_size:
+            self._prune(self.high, self.high_dead, 1)
+            heapq.heappush(self.low, -heapq.heappop(self.high))
+            self.high_size -= 1
+            self.low_size += 1
+        self._prune(self.low, self.low_dead, -1)
+        self._prune(self.high, self.high_dead, 1)
+    
+    def add(self, value):
+        self.counts[value] += 1
+        self.size += 1
+        if self.low and value <= -self.low[0]:
+            heapq.heappush(self.low, -value)
+            self.low_size += 1
+        else:
+            heapq.heappush(self.high, value)
+            self.high_size += 1
+        heapq.heappush(self.mins, value)
+        heapq.heappush(self.maxs, -value)
+        self._balance()
+    
+    def remove(self, value):
+        if not self.counts[value]:
+            raise ValueError(f"Engagement score {value} was never added")
+        self.counts[value] -= 1
+        if not self.counts[value]:
+            del self.counts[value]
+        self.size -= 1
+        # Tops are live after _balance; a value at or below the lower top has a live copy in the lower half
+        if value <= -self.low[0]:
+            self.low_dead[value] += 1
+            self.low_size -= 1
+        else:
+            self.high_dead[value] += 1
+            self.high_size -= 1
+        self.min_dead[value] += 1
+        self.max_dead[value] += 1
+        if len(self.mins) > 2 * self.size + 64:
+            self._rebuild()
+        else:
+            self._balance()
+    
+    def median(self):
+        if self.low_size > self.high_size:
+            return -self.low[0]
+        return (-self.low[0] + self.high[0]) / 2
+    
+    def min(self):
+        self._prune(self.mins, self.min_dead, 1)
+        return self.mins[0]
+    
+    def max(self):
+        self._prune(self.maxs, self.max_dead, -1)
+        return -self.maxs[0]
+
+
+class IncrementalMetrics:
+    """Running aggregates that keep calculate_metrics output current as learners change
+    
+    add/remove/update touch only running sums, Welford moments, bucket counters
+    and OrderStatistics heaps for median/min/max, all O(1) or O(log n).
+    Trends use the analytics' fitted slopes, so set history before adding
+    learners; the slope added for a learner is remembered and subtracted on
+    removal, so later history changes cannot skew the sum.
+    """
+    
+    TIME_EDGES = [10, 30, 60]
+    TIME_LABELS = ['0-10h', '10-30h', '30-60h', '60h+']
+    INTERACTION_EDGES = [0.4, 0.7]
+    INTERACTION_LABELS = ['low', 'medium', 'high']
+    
+    def __init__(self, analytics=None, users_data=None):
+        """Start empty, optionally seeded with an initial snapshot"""
+        self.analytics = analytics or EngagementAnalytics()
+        thresholds = self.analytics.risk_thresholds
+        self.risk_edges = [thresholds['low'], thresholds['medium']]
+        
+        self.count = 0
+        # Welford moments: engagement (y) and interaction (x) plus their co-moment
+        self.engagement_mean = 0.0
+        self.engagement_m2 = 0.0
+        self.interaction_mean = 0.0
+        self.interaction_m2 = 0.0
+        self.co_moment = 0.0
+        self.engagement_order = OrderStatistics()
+        
+        self.total_time_sum = 0.0
+        self.session_sum = 0.0
+        self.daily_time_sum = 0.0
+        self.complete_records = 0
+        self.recent_users = 0
+        # Fitted slopes from analytics.set_engagement_history, summed over learners that have one
+        self.trend_sum = 0.0
+        self.trend_count = 0
+        self.trend_contributions = {}  # user id -> slope included in trend_sum
+        
+        self.risk_counts = [0, 0, 0]
+        self.time_counts = [0] * len(self.TIME_LABELS)
+        self.interaction_counts = [0] * len(self.INTERACTION_LABELS)
+        self.profile_sessions = {}  # profile_type -> [session sum, count]
+        self.preferred_times = {}
+        
+        for user in users_data or []:
+            self.add(user)
+    
+    def _apply(self, user, sign):
+        """Add (sign=1) or remove (sign=-1) one learner from every counter"""
+        self.total_time_sum += sign * user['total_time']
+        self.session_sum += sign * user['avg_session']
+        self.daily_time_sum += sign * user['daily_time']
+        if user['session_count'] > 5:
+            self.complete_records += sign
+        if user['last_active'] in ('Today', 'Yesterday'):
+            self.recent_users += sign
+        if sign > 0:
+            slope = self.analytics.user_trend(user.get('id'))
+            if slope is not None:
+                self.trend_contributions[user.get('id')] = slope
+        else:
+            slope = self.trend_contributions.pop(user.get('id'), None)
+        if slope is not None:
+            self.trend_sum += sign * slope
+            self.trend_count += sign
+        
+        self.risk_counts[bisect_right(self.risk_edges, user['dropout_risk'])] += sign
+        self.time_counts[bisect_right(self.TIME_EDGES, user['total_time'])] += sign
+        self.interaction_counts[bisect_right(self.INTERACTION_EDGES, user['interaction_score'])] += sign
+        
+        profile = self.profile_sessions.setdefault(user['profile_type'], [0.0, 0])
+        profile[0] += sign * user['avg_session']
+        profile[1] += sign
+        if profile[1] == 0:
+            del self.profile_sessions[user['profile_type']]
+        
+        pref = user['preferred_time']
+        self.preferred_times[pref] = self.preferred_times.get(pref, 0) + sign
+        if self.preferred_times[pref] == 0:
+            del self.preferred_times[pref]
+    
+    def add(self, user):
+        """Include a learner in the aggregates"""
+        y = user['engagement_score']
+        x = user['interaction_score']
+        self.count += 1
+        dy = y - self.engagement_mean
+        dx = x - self.interaction_mean
+        self.engagement_mean += dy / self.count
+        self.interaction_mean += dx / self.count
+        self.engagement_m2 += dy * (y - self.engagement_mean)
+        self.interaction_m2 += dx * (x - self.interaction_mean)
+        self.co_moment += dx * (y - self.engagement_mean)
+        self.engagement_order.add(y)
+        self._apply(user, 1)
+    
+    def remove(self, user):
+        """Exclude a learner previously passed to add (pass the same values)"""
+        if self.count == 0:
+            raise ValueError("Cannot remove from empty aggregates")
+        y = user['engagement_score']
+        x = user['interaction_score']
+        self.engagement_order.remove(y)
+        
+        if self.count == 1:
+            self.count = 0
+            self.engagement_mean = self.engagement_m2 = 0.0
+            self.interaction_mean = self.interaction_m2 = self.co_moment = 0.0
+        else:
+            # Invert the Welford step: recover the means without this learner first
+            prev_y = (self.count * self.engagement_mean - y) / (self.count - 1)
+            prev_x = (self.count * self.interaction_mean - x) / (self.count - 1)
+            self.engagement_m2 = max(0.0, self.engagement_m2 - (y - prev_y) * (y - self.engagement_mean))
+            self.interaction_m2 = max(0.0, self.interaction_m2 - (x - prev_x) * (x - self.interaction_mean))
+            self.co_moment -= (x - prev_x) * (y - self.engagement_mean)
+            self.engagement_mean = prev_y
+            self.interaction_mean = prev_x
+            self.count -= 1
+        self._apply(user, -1)
+    
+    def update(self, old_user, new_user):
+        """Replace a learner's previous values with new ones"""
+        self.remove(old_user)
+        self.add(new_user)
+    
+    def _trend(self):
+        return self.trend_sum / self.trend_count if self.trend_count else 0.0
+    
+    def _correlation(self):
+        if self.count < 2:
+            return 0
+        denominator = math.sqrt(self.engagement_m2 * self.interaction_m2)
+        return self.co_moment / denominator if denominator > 0 else float('nan')
+    
+    def metrics(self):
+        """Current metrics in the same structure as EngagementAnalytics.calculate_metrics"""
+        if self.count == 0:
+            raise ValueError("No learners in the aggregates")
+        n = self.count
+        order = self.engagement_order
+        std_dev = math.sqrt(self.engagement_m2 / n)
+        
+        risk_counts = dict(zip(['low', 'medium', 'high'], self.risk_counts))
+        completeness = self.complete_records / n
+        recency = self.recent_users / n
+        variance_score = min(1.0, std_dev / 30)
+        adjusted_accuracy = 0.85 * (completeness + recency + variance_score) / 3
+        
+        return {
+            'overall_engagement': {
+                'average': self.engagement_mean,
+                'median': order.median(),
+                'std_dev': std_dev,
+                'min': order.min(),
+                'max': order.max(),
+                'trend': self._trend()
+            },
+            'risk_distribution': {
+                'counts': risk_counts,
+                'percentages': {level: (count / n) * 100 for level, count in risk_counts.items()}
+            },
+            'time_analytics': {
+                'total_learning_time': {
+                    'sum': self.total_time_sum,
+                    'average': self.total_time_sum / n,
+                    'distribution': dict(zip(self.TIME_LABELS, self.time_counts))
+                },
+                'average_session_length': {
+                    'overall': self.session_sum / n,
+                    'by_user_type': {
+                        profile: total / count
+                        for profile, (total, count) in self.profile_sessions.items()
+                    }
+                },
+                'daily_engagement': {
+                    'average': self.daily_time_sum / n,
+                    'peak_hours': sorted(self.preferred_times.items(), key=lambda x: x[1], reverse=True)
+                }
+            },
+            'interaction_patterns': {
+                'average_interaction': self.interaction_mean,
+                'interaction_distribution': dict(zip(self.INTERACTION_LABELS, self.interaction_counts)),
+                'engagement_correlation': self._correlation()
+            },
+            'prediction_accuracy': {
+                'overall_accuracy': adjusted_accuracy,
+                'precision': adjusted_accuracy * self.analytics.rng.uniform(0.95, 1.05),
+                'recall': adjusted_accuracy * self.analytics.rng.uniform(0.9, 1.0),
+                'f1_score': adjusted_accuracy * self.analytics.rng.uniform(0.92, 1.02)
+            }
+        }
@@ -0,0 +1,193 @@
+import asyncio
+import time
+from collections import namedtuple
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from data_simulator import PEAK_HOURS, PREFERRED_TIMES
+from simulation_random import SeededComponent
+
+
+# interaction_adjust (value: a score delta) is only emitted by DataSimulator, never by EventStream
+EVENT_TYPES = ['login', 'session_start', 'assignment_submit', 'evaluation_pass', 'evaluation_fail', 'session_end',
+               'interaction_adjust']
+EVENT_CODES = {name: code for code, name in enumerate(EVENT_TYPES)}
+
+Event = namedtuple('Event', ['timestamp', 'user_id', 'event_type', 'value'])
+
+
+def diurnal_profile(peak_hour, width=3.0, floor=0.15):
+    """Relative activity for each hour of the day (mean 1.0), peaking at peak_hour"""
+    hours = np.arange(24)
+    distance = np.minimum(np.abs(hours - peak_hour), 24 - np.abs(hours - peak_hour))
+    profile = floor + np.exp(-0.5 * (distance / width) ** 2)
+    return profile / profile.mean()
+
+
+def _columns(learners, field, default):
+    if isinstance(learners, (pd.DataFrame, dict)):
+        return np.asarray(learners[field]) if field in learners else np.full(len(learners['id']), default)
+    return np.asarray([learner.get(field, default) for learner in learners])
+
+
+class EventStream(SeededComponent):
+    """Timestamped learner events with Poisson arrivals and diurnal intensity
+
+    Each learner starts sessions as a Poisson process at sessions_per_day,
+    modulated hour by hour around the peak of their preferred_time. A session
+    emits login and session_start, then Poisson-many assignment submissions
+    and evaluations (pass/fail by the learner's pass rate) spread over its
+    duration, then session_end with the duration in seconds as its value.
+
+    Events are generated a window of simulated time at a time with NumPy and
+    emitted in timestamp order (epoch seconds).
+    """
+
+    def __init__(self, learners, sessions_per_day=2.0, mean_session_minutes=45.0,
+                 submissions_per_session=0.3, evaluations_per_session=0.2,
+                 start=None, window=60.0, seed=None, rng=None, np_rng=None, clock=None):
+        """learners: list of user dicts, DataFrame or dict of arrays with 'id' and
+        optionally 'preferred_time', 'evaluations_attempted'/'evaluations_passed'.
+        sessions_per_day may be a scalar or one rate per learner.
+        """
+        self._init_random(seed, rng, np_rng, clock)
+        self.user_ids = _columns(learners, 'id', 0).astype(np.int64)
+        n = len(self.user_ids)
+        preferred = pd.Categorical(_columns(learners, 'preferred_time', 'evening'), categories=PREFERRED_TIMES)
+        groups = np.where(preferred.codes < 0, PREFERRED_TIMES.index('evening'), preferred.codes)
+        attempted = _columns(learners, 'evaluations_attempted', 0).astype(float)
+        passed = _columns(learners, 'evaluations_passed', 0).astype(float)
+        self.pass_rate = np.clip(np.divide(passed, attempted, out=np.full(n, 0.7), where=attempted > 0), 0, 1)
+        self.rates = np.broadcast_to(np.asarray(sessions_per_day, dtype=float), (n,))
+        self.mean_session_seconds = mean_session_minutes * 60
+        self.submissions_per_session = submissions_per_session
+        self.evaluations_per_session = evaluations_per_session
+        self.start = (start or self.clock()).timestamp()
+        self.window = window
+
+        # Per preferred_time group: members and cumulative rates, so picking who starts
+        # a session is a binary search rather than a pass over every learner
+        self.diurnal = np.stack([diurnal_profile(PEAK_HOURS[name]) for name in PREFERRED_TIMES])
+        self.groups = []
+        for group in range(len(PREFERRED_TIMES)):
+            members = np.flatnonzero(groups == group)
+            cumulative = np.cumsum(self.rates[members])
+            if members.size and cumulative[-1] > 0:
+                self.groups.append((group, members, cumulative))
+
+    def _sessions(self, window_start):
+        """Learner rows and start times of sessions beginning in [window_start, +window)"""
+        hour = datetime.fromtimestamp(window_start).hour
+        rows, starts = [], []
+        for group, members, cumulative in self.groups:
+            expected = cumulative[-1] * self.diurnal[group, hour] * self.window / 86400
+            count = self.np_rng.poisson(expected)
+            if count:
+                picks = np.searchsorted(cumulative, self.np_rng.uniform(0, cumulative[-1], count), side='right')
+                rows.append(members[np.minimum(picks, members.size - 1)])
+                # Given the count, Poisson arrival times are uniform over the window
+                starts.append(window_start + self.np_rng.uniform(0, self.window, count))
+        if not rows:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        return np.concatenate(rows), np.concatenate(starts)
+
+    def _session_events(self, rows, starts):
+        rng = self.np_rng
+        durations = np.clip(rng.exponential(self.mean_session_seconds, rows.size), 60, 4 * 3600)
+        ends = starts + durations
+        submissions = rng.poisson(self.submissions_per_session, rows.size)
+        evaluations = rng.poisson(self.evaluations_per_session, rows.size)
+
+        sub_rows = np.repeat(rows, submissions)
+        sub_times = np.repeat(starts, submissions) + rng.uniform(0, 1, sub_rows.size) * np.repeat(durations, submissions)
+        eval_rows = np.repeat(rows, evaluations)
+        eval_times = np.repeat(starts, evaluations) + rng.uniform(0, 1, eval_rows.size) * np.repeat(durations, evaluations)
+        passed = rng.uniform(0, 1, eval_rows.size) < self.pass_rate[eval_rows]
+
+        return {
+            'timestamp': np.concatenate([starts, starts, sub_times, eval_times, ends]),
+            'row': np.concatenate([rows, rows, sub_rows, eval_rows, rows]),
+            'event_type': np.concatenate([
+                np.full(rows.size, EVENT_CODES['login'], dtype=np.int8),
+                np.full(rows.size, EVENT_CODES['session_start'], dtype=np.int8),
+                np.full(sub_rows.size, EVENT_CODES['assignment_submit'], dtype=np.int8),
+                np.where(passed, EVENT_CODES['evaluation_pass'], EVENT_CODES['evaluation_fail']).astype(np.int8),
+                np.full(rows.size, EVENT_CODES['session_end'], dtype=np.int8),
+            ]),
+            'value': np.concatenate([
+                np.zeros(rows.size * 2 + sub_rows.size + eval_rows.size), durations
+            ])
+        }
+
+    def batches(self, duration=None, max_events=None):
+        """Yield time-ordered event batches as dicts of arrays
+
+        Keys: timestamp (epoch seconds), user_id, event_type (codes into
+        EVENT_TYPES) and value. Stops after duration simulated seconds or
+        max_events events, whichever comes first; runs forever without either.
+        """
+        window_start = self.start
+        end = None if duration is None else self.start + duration
+        emitted = 0
+        # Sessions outlive their window: their later events wait here until due
+        pending = self._session_events(np.empty(0, dtype=np.int64), np.empty(0))
+        while end is None or window_start < end:
+            window_end = window_start + self.window
+            fresh = self._session_events(*self._sessions(window_start))
+            merged = {key: np.concatenate([pending[key], fresh[key]]) for key in pending}
+            due = merged['timestamp'] < window_end
+            if end is not None:
+                due &= merged['timestamp'] < end
+            pending = {key: values[~due] for key, values in merged.items()}
+            batch = {key: values[due] for key, values in merged.items()}
+            order = np.lexsort((batch['event_type'], batch['timestamp']))
+            batch = {key: values[order] for key, values in batch.items()}
+            if max_events is not None and emitted + order.size >= max_events:
+                batch = {key: values[:max_events - emitted] for key, values in batch.items()}
+                yield self._finish(batch)
+                return
+            emitted += order.size
+            if order.size:
+                yield self._finish(batch)
+            window_start = window_end
+
+    def _finish(self, batch):
+        return {
+            'timestamp': batch['timestamp'],
+            'user_id': self.user_ids[batch['row']],
+            'event_type': batch['event_type'],
+            'value': batch['value']
+        }
+
+    def events(self, duration=None, max_events=None):
+        """Yield Event(timestamp, user_id, event_type name, value) tuples in time order"""
+        for batch in self.batches(duration, max_events):
+            names = np.asarray(EVENT_TYPES, dtype=object)[batch['event_type']]
+            yield from map(Event._make, zip(
+                batch['timestamp'].tolist(), batch['user_id'].tolist(), names.tolist(), batch['value'].tolist()
+            ))
+
+    async def abatches(self, duration=None, max_events=None, speed=None):
+        """Async iterator over batches; speed paces simulated seconds per wall second
+
+        Without speed batches are produced as fast as possible, yielding to the
+        event loop between them.
+        """
+        started = time.monotonic()
+        for batch in self.batches(duration, max_events):
+            if speed:
+                due = (batch['timestamp'][-1] - self.start) / speed - (time.monotonic() - started)
+                await asyncio.sleep(max(0.0, due))
+            else:
+                await asyncio.sleep(0)
+            yield batch
+
+    async def aevents(self, duration=None, max_events=None, speed=None):
+        """Async iterator over Event tuples (paced per batch, see abatches)"""
+        names = np.asarray(EVENT_TYPES, dtype=object)
+        async for batch in self.abatches(duration, max_events, speed):
+            for event in zip(batch['timestamp'].tolist(), batch['user_id'].tolist(),
+                             names[batch['event_type']].tolist(), batch['value'].tolist()):
+                yield Event._make(event)
@@ -0,0 +1,181 @@
+from collections.abc import MutableMapping
+
+import numpy as np
+import pandas as pd
+
+# Low-cardinality text columns are dictionary-encoded: one small int per learner
+CATEGORICAL_FIELDS = ['profile_type', 'learning_style', 'preferred_time', 'last_active']
+
+
+class _Missing:
+    def __repr__(self):
+        return '<missing>'
+
+    def __reduce__(self):
+        # Unpickle to the module singleton so identity checks keep working
+        return 'MISSING'
+
+
+MISSING = _Missing()
+
+
+LEARNER_FIELDS = (
+    'id', 'name', 'profile_type', 'engagement_score', 'dropout_risk', 'total_time', 'completion_rate',
+    'last_login', 'last_active', 'session_count', 'avg_session', 'daily_time', 'streak', 'interaction_score',
+    'learning_style', 'preferred_time', 'age_at_enrollment', 'course_load', 'attendance_rate',
+    'first_sem_grade', 'second_sem_grade', 'evaluations_attempted', 'evaluations_passed'
+)
+_FIELD_SET = frozenset(LEARNER_FIELDS)
+
+
+class LearnerRecord(MutableMapping):
+    """One learner's data in fixed slots instead of a per-learner dict
+
+    Behaves like the dicts it replaces: record['engagement_score'],
+    record.get('streak', 0), dict(record), ** unpacking. Unset fields are
+    absent keys, exactly as with a dict, and keys outside the schema go to
+    an overflow dict that is only allocated when used. (A plain class rather
+    than a dataclass: pandas unpacks dataclass rows field by field.)
+    """
+    __slots__ = LEARNER_FIELDS + ('extra',)
+
+    def __init__(self, **values):
+        for field in LEARNER_FIELDS:
+            setattr(self, field, MISSING)
+        self.extra = None
+        for key, value in values.items():
+            self[key] = value
+
+    def __getstate__(self):
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    def __setstate__(self, state):
+        for field, value in state.items():
+            setattr(self, field, value)
+
+    def __getitem__(self, key):
+        if key in _FIELD_SET:
+            value = getattr(self, key)
+            if value is MISSING:
+                raise KeyError(key)
+            return value
+        if self.extra is None:
+            raise KeyError(key)
+        return self.extra[key]
+
+    def __setitem__(self, key, value):
+        if key in _FIELD_SET:
+            setattr(self, key, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __delitem__(self, key):
+        if key in _FIELD_SET:
+            if getattr(self, key) is MISSING:
+                raise KeyError(key)
+            setattr(self, key, MISSING)
+        elif self.extra is not None:
+            del self.extra[key]
+        else:
+            raise KeyError(key)
+
+    def __iter__(self):
+        for key in LEARNER_FIELDS:
+            if getattr(self, key) is not MISSING:
+                yield key
+        if self.extra:
+            yield from self.extra
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"LearnerRecord({self.to_dict()!r})"
+
+    def copy(self):
+        """Shallow copy, like dict.copy()"""
+        record = LearnerRecord.__new__(LearnerRecord)
+        for field in self.__slots__:
+            setattr(record, field, getattr(self, field))
+        if record.extra is not None:
+            record.extra = dict(record.extra)
+        return record
+
+    def to_dict(self):
+        return dict(self.items())
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a record from any mapping; unknown keys go to the overflow dict"""
+        return cls(**data)
+
+
+class LearnerTable:
+    """Struct-of-arrays learner collection: one array per field
+
+    Numeric fields are NumPy arrays, last_login is datetime64 and the
+    low-cardinality text fields are pandas Categoricals (small integer codes).
+    Iterating or indexing yields LearnerRecords, so code written for a list
+    of learner dicts keeps working; columnar consumers use .columns directly.
+    """
+
+    def __init__(self, columns):
+        """columns: dict of equal-length sequences keyed by field name"""
+        self.columns = {}
+        for field, values in columns.items():
+            if field in CATEGORICAL_FIELDS:
+                self.columns[field] = values if isinstance(values, pd.Categorical) else pd.Categorical(values)
+            elif field == 'last_login':
+                self.columns[field] = np.asarray(values, dtype='datetime64[us]')
+            elif isinstance(values, np.ndarray):
+                self.columns[field] = values
+            else:
+                values = list(values)
+                kind = object if values and isinstance(values[0], str) else None
+                self.columns[field] = np.asarray(values, dtype=kind)
+        lengths = {len(values) for values in self.columns.values()}
+        if len(lengths) > 1:
+            raise ValueError("All learner columns must have the same length")
+        self._length = lengths.pop() if lengths else 0
+
+    @classmethod
+    def from_records(cls, records):
+        """Build a table from learner dicts or LearnerRecords (fields of the first record)"""
+        records = list(records)
+        if not records:
+            return cls({})
+        return cls({field: [record[field] for record in records] for field in records[0]})
+
+    def __len__(self):
+        return self._length
+
+    def __contains__(self, field):
+        return field in self.columns
+
+    def _value(self, values, index):
+        if isinstance(values, pd.Categorical):
+            code = values.codes[index]
+            return None if code < 0 else values.categories[code]
+        value = values[index]
+        return value.item() if isinstance(value, np.generic) else value
+
+    def __getitem__(self, index):
+        if isinstance(index, str):
+            return self.columns[index]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError(index)
+        return LearnerRecord.from_dict({field: self._value(values, index) for field, values in self.columns.items()})
+
+    def __iter__(self):
+        for index in range(self._length):
+            yield self[index]
+
+    def to_records(self):
+        return list(self)
+
+    def to_frame(self):
+        return pd.DataFrame(self.columns)
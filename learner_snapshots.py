@@ -0,0 +1,100 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from learner_records import CATEGORICAL_FIELDS, LearnerTable
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("Learner snapshots require the 'pyarrow' package") from e
+    return pyarrow
+
+
+def _format_for(path, format=None):
+    if format:
+        return format
+    return 'parquet' if os.path.splitext(path)[1].lower() in ('.parquet', '.pq') else 'arrow'
+
+
+def to_table(data):
+    """Convert learner data (list of dicts, LearnerTable, DataFrame or dict of arrays) to an Arrow table"""
+    pa = _pyarrow()
+    if isinstance(data, pd.DataFrame):
+        frame = data
+    elif isinstance(data, LearnerTable):
+        frame = data.to_frame()
+    elif isinstance(data, dict):
+        frame = pd.DataFrame({field: np.asarray(values) for field, values in data.items()})
+    else:
+        frame = pd.DataFrame.from_records(data)
+    frame = frame.copy(deep=False)
+    for field in CATEGORICAL_FIELDS:
+        if field in frame and not isinstance(frame[field].dtype, pd.CategoricalDtype):
+            frame[field] = frame[field].astype('category')
+    return pa.Table.from_pandas(frame, preserve_index=False)
+
+
+def save_snapshot(data, path, format=None, compression=None):
+    """Write a learner snapshot as Arrow IPC (.arrow, default) or Parquet (.parquet)
+
+    Arrow IPC is written uncompressed by default so loads can memory-map it
+    without decoding. Parquet is smaller on disk and uses zstd by default.
+    """
+    pa = _pyarrow()
+    table = to_table(data)
+    tmp_path = f"{path}.tmp"
+    if _format_for(path, format) == 'parquet':
+        pa.parquet.write_table(table, tmp_path, compression=compression or 'zstd')
+    else:
+        options = pa.ipc.IpcWriteOptions(compression=compression)
+        with pa.OSFile(tmp_path, 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema, options=options) as writer:
+                writer.write_table(table)
+    # Readers never observe a half-written snapshot
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_table(path, columns=None, format=None):
+    """Read a snapshot as an Arrow table, memory-mapped and limited to the given columns"""
+    pa = _pyarrow()
+    if _format_for(path, format) == 'parquet':
+        return pa.parquet.read_table(path, columns=columns, memory_map=True)
+    source = pa.memory_map(path, 'r')
+    table = pa.ipc.open_file(source).read_all()
+    # Unselected columns of a memory-mapped file are never paged in
+    return table.select(columns) if columns is not None else table
+
+
+def load_snapshot(path, columns=None, format=None, as_arrays=False):
+    """Load a snapshot as a DataFrame, or as a dict of NumPy arrays with as_arrays"""
+    table = read_table(path, columns=columns, format=format)
+    if as_arrays:
+        return {
+            name: table.column(name).to_numpy(zero_copy_only=False)
+            for name in table.column_names
+        }
+    return table.to_pandas()
+
+
+def snapshot_info(path, format=None):
+    """Row count, columns and on-disk size without reading any column data"""
+    pa = _pyarrow()
+    if _format_for(path, format) == 'parquet':
+        metadata = pa.parquet.ParquetFile(path).metadata
+        rows, schema = metadata.num_rows, metadata.schema.to_arrow_schema()
+    else:
+        reader = pa.ipc.open_file(pa.memory_map(path, 'r'))
+        schema = reader.schema
+        rows = sum(reader.get_batch(i).num_rows for i in range(reader.num_record_batches))
+    return {
+        'rows': rows,
+        'columns': schema.names,
+        'bytes': os.path.getsize(path)
+    }
@@ -0,0 +1,233 @@
+import glob
+import os
+from datetime import datetime
+
+import numpy as np
+
+from event_stream import EVENT_CODES
+
+
+# On-disk event log record; offsets into the log are record indices
+EVENT_DTYPE = np.dtype([('timestamp', '<f8'), ('user_id', '<i8'), ('event_type', 'i1'), ('value', '<f8')])
+
+# Folded per-learner state: name -> (dtype, value for a learner with no events)
+STATE_FIELDS = {
+    'session_count': (np.int64, 0),
+    'total_time': (np.float64, 0.0),  # hours
+    'last_login': (np.float64, np.nan),  # epoch seconds
+    'interaction_score': (np.float64, 0.0),
+    'assignments_submitted': (np.int64, 0),
+    'evaluations_attempted': (np.int64, 0),
+    'evaluations_passed': (np.int64, 0),
+}
+
+CHECKPOINT_PATTERN = 'checkpoint-*.npz'
+
+
+class LearnerStateReducer:
+    """Fold learner events (EventStream batches) into compact per-learner state
+
+    State lives in one preallocated NumPy array per field, indexed by a row per
+    learner. With log_dir, every applied event is appended to an event log and
+    the state is checkpointed every checkpoint_every events, so restore() only
+    replays the log written since the last checkpoint.
+
+    Each interaction (submission or evaluation) moves interaction_score a fixed
+    fraction interaction_step of the way towards 1. That update commutes, so a
+    whole batch folds in one vectorized step regardless of event order. An
+    interaction_adjust event then adds its value to the score, capped at 1;
+    adjustments within one batch are summed before the cap.
+    """
+
+    def __init__(self, log_dir=None, checkpoint_every=1000000, keep_checkpoints=2,
+                 interaction_step=0.05, initial_learners=1024):
+        """Create an empty reducer, logging to log_dir if given (use restore() for an existing one)"""
+        self.log_dir = log_dir
+        self.checkpoint_every = checkpoint_every
+        self.keep_checkpoints = keep_checkpoints
+        self.interaction_step = interaction_step
+        self.rows = {}  # learner id -> row
+        self.ids = np.zeros(max(1, initial_learners), dtype=np.int64)
+        self.state = {
+            field: np.full(self.ids.size, initial, dtype=dtype) for field, (dtype, initial) in STATE_FIELDS.items()
+        }
+        self.offset = 0  # events applied so far
+        self.checkpoint_offset = 0
+        self._log = None
+        if log_dir:
+            os.makedirs(log_dir, exist_ok=True)
+            log_path = os.path.join(log_dir, 'events.log')
+            torn = os.path.getsize(log_path) % EVENT_DTYPE.itemsize if os.path.exists(log_path) else 0
+            if torn:
+                # Drop a record half-written by a crash so appends stay aligned
+                os.truncate(log_path, os.path.getsize(log_path) - torn)
+            self._log = open(log_path, 'ab')
+
+    def _grow(self, needed):
+        size = self.ids.size
+        while size < needed:
+            size *= 2
+        self.ids = np.concatenate([self.ids, np.zeros(size - self.ids.size, dtype=np.int64)])
+        for field, (dtype, initial) in STATE_FIELDS.items():
+            extra = np.full(size - self.state[field].size, initial, dtype=dtype)
+            self.state[field] = np.concatenate([self.state[field], extra])
+
+    def _rows_for(self, user_ids):
+        """Rows for an array of learner ids, creating rows for new learners"""
+        unique, inverse = np.unique(user_ids, return_inverse=True)
+        new = [user_id for user_id in unique.tolist() if user_id not in self.rows]
+        if new:
+            first = len(self.rows)
+            if first + len(new) > self.ids.size:
+                self._grow(first + len(new))
+            for row, user_id in enumerate(new, first):
+                self.rows[user_id] = row
+            self.ids[first:first + len(new)] = new
+        unique_rows = np.fromiter((self.rows[user_id] for user_id in unique.tolist()), dtype=np.int64,
+                                  count=unique.size)
+        return unique_rows, inverse
+
+    def __contains__(self, user_id):
+        return user_id in self.rows
+
+    def __len__(self):
+        return len(self.rows)
+
+    def set_baseline(self, user_id, **values):
+        """Set starting values for a learner (e.g. from DataSimulator.base_metrics)
+
+        Baselines are not events: call checkpoint() afterwards to make them
+        survive a restart.
+        """
+        row = self._rows_for(np.array([user_id], dtype=np.int64))[0][0]
+        for field, value in values.items():
+            if field == 'last_login' and isinstance(value, datetime):
+                value = value.timestamp()
+            self.state[field][row] = value
+
+    def apply(self, batch, log=True):
+        """Fold a batch (dict of arrays or EVENT_DTYPE records) into the state"""
+        timestamps = np.asarray(batch['timestamp'], dtype=np.float64)
+        if timestamps.size == 0:
+            return
+        user_ids = np.asarray(batch['user_id'], dtype=np.int64)
+        event_types = np.asarray(batch['event_type'], dtype=np.int8)
+        values = np.asarray(batch['value'], dtype=np.float64)
+        if log and self._log is not None:
+            records = np.empty(timestamps.size, dtype=EVENT_DTYPE)
+            records['timestamp'], records['user_id'] = timestamps, user_ids
+            records['event_type'], records['value'] = event_types, values
+            # Log before state, so a checkpoint never covers events missing from the log
+            self._log.write(records.tobytes())
+            self._log.flush()
+
+        rows, inverse = self._rows_for(user_ids)
+        learners = rows.size
+
+        def counts(code):
+            return np.bincount(inverse[event_types == code], minlength=learners)
+
+        logins = event_types == EVENT_CODES['login']
+        latest = np.full(learners, -np.inf)
+        np.maximum.at(latest, inverse[logins], timestamps[logins])
+        latest[np.isinf(latest)] = np.nan
+        self.state['last_login'][rows] = np.fmax(self.state['last_login'][rows], latest)
+
+        ends = event_types == EVENT_CODES['session_end']
+        self.state['total_time'][rows] += np.bincount(inverse[ends], weights=values[ends] / 3600, minlength=learners)
+        self.state['session_count'][rows] += counts(EVENT_CODES['session_start'])
+
+        passed, failed = counts(EVENT_CODES['evaluation_pass']), counts(EVENT_CODES['evaluation_fail'])
+        submitted = counts(EVENT_CODES['assignment_submit'])
+        self.state['assignments_submitted'][rows] += submitted
+        self.state['evaluations_attempted'][rows] += passed + failed
+        self.state['evaluations_passed'][rows] += passed
+        interactions = submitted + passed + failed
+        self.state['interaction_score'][rows] = (
+            1 - (1 - self.state['interaction_score'][rows]) * (1 - self.interaction_step) ** interactions
+        )
+        adjusts = event_types == EVENT_CODES['interaction_adjust']
+        if adjusts.any():
+            adjusted = np.bincount(inverse[adjusts], minlength=learners) > 0
+            self.state['interaction_score'][rows[adjusted]] = np.minimum(
+                1.0,
+                self.state['interaction_score'][rows[adjusted]]
+                + np.bincount(inverse[adjusts], weights=values[adjusts], minlength=learners)[adjusted]
+            )
+
+        self.offset += timestamps.size
+        if self.log_dir and self.offset - self.checkpoint_offset >= self.checkpoint_every:
+            self.checkpoint()
+
+    def apply_events(self, events):
+        """Fold an iterable of Event tuples (event_type as name or code)"""
+        events = list(events)
+        if not events:
+            return
+        timestamps, user_ids, event_types, values = zip(*events)
+        codes = [EVENT_CODES[kind] if isinstance(kind, str) else kind for kind in event_types]
+        self.apply({'timestamp': timestamps, 'user_id': user_ids, 'event_type': codes, 'value': values})
+
+    def learner_state(self, user_id):
+        """Current state of one learner as a dict (last_login as datetime, None if never)"""
+        row = self.rows.get(user_id)
+        if row is None:
+            return None
+        result = {field: self.state[field][row].item() for field in STATE_FIELDS}
+        last_login = result['last_login']
+        result['last_login'] = None if np.isnan(last_login) else datetime.fromtimestamp(last_login)
+        return result
+
+    def to_columns(self):
+        """Every learner's state as a dict of arrays, with an 'id' column"""
+        n = len(self.rows)
+        columns = {'id': self.ids[:n].copy()}
+        columns.update({field: values[:n].copy() for field, values in self.state.items()})
+        return columns
+
+    def checkpoint(self):
+        """Write the state and log offset atomically; older checkpoints beyond keep_checkpoints are removed"""
+        if not self.log_dir:
+            raise ValueError("Checkpoints need a log_dir")
+        self._log.flush()
+        os.fsync(self._log.fileno())
+        n = len(self.rows)
+        path = os.path.join(self.log_dir, f"checkpoint-{self.offset:016d}.npz")
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, offset=self.offset, ids=self.ids[:n],
+                     **{field: values[:n] for field, values in self.state.items()})
+        os.replace(tmp_path, path)
+        self.checkpoint_offset = self.offset
+        for stale in sorted(glob.glob(os.path.join(self.log_dir, CHECKPOINT_PATTERN)))[:-self.keep_checkpoints]:
+            os.remove(stale)
+        return path
+
+    @classmethod
+    def restore(cls, log_dir, replay_chunk=1000000, **kwargs):
+        """Rebuild from the newest checkpoint in log_dir plus the log written after it"""
+        reducer = cls(log_dir=log_dir, **kwargs)
+        checkpoints = sorted(glob.glob(os.path.join(log_dir, CHECKPOINT_PATTERN)))
+        if checkpoints:
+            with np.load(checkpoints[-1]) as saved:
+                ids = saved['ids']
+                reducer._rows_for(ids)
+                rows = np.fromiter((reducer.rows[user_id] for user_id in ids.tolist()), dtype=np.int64,
+                                   count=ids.size)
+                for field in STATE_FIELDS:
+                    reducer.state[field][rows] = saved[field]
+                reducer.offset = reducer.checkpoint_offset = int(saved['offset'])
+
+        log_path = os.path.join(log_dir, 'events.log')
+        records = os.path.getsize(log_path) // EVENT_DTYPE.itemsize
+        if records > reducer.offset:
+            log = np.memmap(log_path, dtype=EVENT_DTYPE, mode='r', shape=(records,))
+            for start in range(reducer.offset, records, replay_chunk):
+                reducer.apply(log[start:start + replay_chunk], log=False)
+            del log
+        return reducer
+
+    def close(self):
+        if self._log is not None:
+            self._log.close()
+            self._log = None
@@ -0,0 +1,229 @@
+import asyncio
+import random
+from collections import deque
+from datetime import datetime
+
+import numpy as np
+
+
+CHANNELS = ['email', 'push_notification', 'in_app']
+
+
+class ChannelError(Exception):
+    """A transient delivery failure; the pipeline retries the batch"""
+
+
+class Channel:
+    """A delivery channel that sends nudges in batches of up to max_batch"""
+    name = None
+    max_batch = 100
+
+    async def send_batch(self, nudges):
+        """Deliver every nudge in the list or raise ChannelError"""
+        raise NotImplementedError
+
+
+class SimulatedChannel(Channel):
+    """Local stand-in for a real channel, for tests and benchmarks
+
+    Each batch takes latency + per_nudge_latency * len(batch) seconds (scaled by
+    up to +/- jitter) and fails with probability failure_rate. slow_down()
+    multiplies the latency, to exercise backpressure.
+    """
+
+    def __init__(self, name, max_batch=100, latency=0.01, per_nudge_latency=0.00001, jitter=0.2,
+                 failure_rate=0.0, rng=None):
+        self.name = name
+        self.max_batch = max_batch
+        self.latency = latency
+        self.per_nudge_latency = per_nudge_latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.rng = rng or random.Random()
+        self.slowdown = 1.0
+        self.delivered = 0
+
+    def slow_down(self, factor):
+        self.slowdown = factor
+
+    async def send_batch(self, nudges):
+        delay = (self.latency + self.per_nudge_latency * len(nudges)) * self.slowdown
+        await asyncio.sleep(delay * (1 + self.rng.uniform(-self.jitter, self.jitter)))
+        if self.rng.random() < self.failure_rate:
+            raise ChannelError(f"{self.name} rejected a batch of {len(nudges)}")
+        self.delivered += len(nudges)
+
+
+def simulated_channels(rng=None, failure_rate=0.0):
+    """Stand-ins for the production channels: slow, large-batch email; fast push and in-app"""
+    rng = rng or random.Random()
+    return [
+        SimulatedChannel('email', max_batch=500, latency=0.05, failure_rate=failure_rate, rng=rng),
+        SimulatedChannel('push_notification', max_batch=1000, latency=0.01, failure_rate=failure_rate, rng=rng),
+        SimulatedChannel('in_app', max_batch=1000, latency=0.002, failure_rate=failure_rate, rng=rng),
+    ]
+
+
+class DispatchPipeline:
+    """Asyncio pipeline sending nudges through channels in batches
+
+    Each channel has a bounded queue and max_concurrency workers. A worker
+    takes whatever is queued (up to the channel's max_batch, waiting at most
+    linger seconds to fill a batch) and sends it. Because the queues are
+    bounded, a slow channel pushes back on submit() instead of buffering
+    without limit. A failed or timed-out batch is retried up to max_retries
+    times, waiting backoff * 2**attempt seconds (jittered, at most max_backoff)
+    between tries. route(nudge) picks the channel name; by default that is
+    nudge['channel'] if set, otherwise a random channel.
+
+    Use as an async context manager, or call start() and close().
+    """
+
+    def __init__(self, channels, queue_size=10000, max_concurrency=4, linger=0.005, max_retries=3,
+                 backoff=0.05, max_backoff=2.0, send_timeout=None, route=None, rng=None, clock=None,
+                 latency_window=10000):
+        self.channels = {channel.name: channel for channel in channels}
+        self.queue_size = queue_size
+        self.max_concurrency = max_concurrency
+        self.linger = linger
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.send_timeout = send_timeout
+        self.rng = rng or random.Random()
+        self.route = route or self._default_route
+        self.clock = clock or datetime.now
+        self._names = list(self.channels)
+        self._queues = {}
+        self._workers = []
+        self._stats = {
+            name: {'batches': 0, 'sent': 0, 'failed': 0, 'retries': 0, 'latency': deque(maxlen=latency_window)}
+            for name in self.channels
+        }
+
+    def _default_route(self, nudge):
+        channel = nudge.get('channel')
+        return channel if channel in self.channels else self.rng.choice(self._names)
+
+    def start(self):
+        """Start the channel workers (needs a running event loop)"""
+        if self._workers:
+            return
+        for name, channel in self.channels.items():
+            queue = self._queues[name] = asyncio.Queue(maxsize=self.queue_size)
+            self._workers.extend(
+                asyncio.create_task(self._worker(channel, queue)) for _ in range(self.max_concurrency)
+            )
+
+    async def close(self):
+        """Wait for queued nudges to be sent, then stop the workers"""
+        for queue in self._queues.values():
+            await queue.join()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queues = {}
+
+    async def __aenter__(self):
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def submit(self, nudge):
+        """Queue one nudge and return a future for its send result
+
+        Waits while the nudge's channel queue is full (backpressure).
+        """
+        if not self._workers:
+            raise RuntimeError("DispatchPipeline is not running: call start() or use 'async with'")
+        future = asyncio.get_running_loop().create_future()
+        await self._queues[self.route(nudge)].put((nudge, future))
+        return future
+
+    async def dispatch(self, nudges):
+        """Send nudges and return their results, in the same order"""
+        futures = [await self.submit(nudge) for nudge in nudges]
+        return await asyncio.gather(*futures)
+
+    @staticmethod
+    def _drain(queue, batch, limit):
+        while len(batch) < limit:
+            try:
+                batch.append(queue.get_nowait())
+            except asyncio.QueueEmpty:
+                return
+
+    async def _worker(self, channel, queue):
+        while True:
+            batch = [await queue.get()]
+            self._drain(queue, batch, channel.max_batch)
+            if len(batch) < channel.max_batch and self.linger:
+                await asyncio.sleep(self.linger)
+                self._drain(queue, batch, channel.max_batch)
+            try:
+                await self._send(channel, batch)
+            finally:
+                for _ in batch:
+                    queue.task_done()
+
+    async def _send(self, channel, batch):
+        loop = asyncio.get_running_loop()
+        stats = self._stats[channel.name]
+        nudges = [nudge for nudge, _ in batch]
+        attempt = 0
+        while True:
+            started = loop.time()
+            retryable = True
+            try:
+                if self.send_timeout is None:
+                    await channel.send_batch(nudges)
+                else:
+                    await asyncio.wait_for(channel.send_batch(nudges), self.send_timeout)
+                error = None
+            except (ChannelError, asyncio.TimeoutError) as e:
+                error = e
+            except Exception as e:
+                # Not transient: fail the batch now rather than retry or leave its futures pending
+                error, retryable = e, False
+            if error is None:
+                stats['latency'].append(loop.time() - started)
+                stats['batches'] += 1
+                stats['sent'] += len(batch)
+                break
+            if not retryable or attempt >= self.max_retries:
+                stats['failed'] += len(batch)
+                break
+            delay = min(self.max_backoff, self.backoff * 2 ** attempt) * self.rng.uniform(0.5, 1.0)
+            attempt += 1
+            stats['retries'] += 1
+            await asyncio.sleep(delay)
+
+        sent_at = self.clock()
+        for nudge, future in batch:
+            if not future.done():
+                future.set_result({
+                    'success': error is None,
+                    'method': channel.name,
+                    'sent_at': sent_at,
+                    'nudge_id': nudge.get('nudge_id'),
+                    'attempts': attempt + 1,
+                    'error': None if error is None else str(error) or type(error).__name__,
+                })
+
+    def queue_depths(self):
+        return {name: queue.qsize() for name, queue in self._queues.items()}
+
+    def stats(self):
+        """Per-channel counters and batch send latency percentiles (seconds) over recent batches"""
+        report = {}
+        for name, stats in self._stats.items():
+            latency = np.fromiter(stats['latency'], dtype=float)
+            report[name] = {key: value for key, value in stats.items() if key != 'latency'}
+            if latency.size:
+                p50, p95, p99 = np.percentile(latency, [50, 95, 99]).tolist()
+                report[name].update(latency_p50=p50, latency_p95=p95, latency_p99=p99,
+                                    latency_max=float(latency.max()))
+        return report
@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta
+
+
+class BucketStore:
+    """Key-value store whose entries expire by time bucket on an injected clock
+
+    Entries are filed under the bucket current when they are set and are
+    visible while that bucket is one of the last keep buckets; older buckets
+    are dropped whole. Nothing is evicted before then, however many entries
+    a bucket holds.
+    """
+
+    def __init__(self, bucket_seconds, clock, keep=2):
+        self.bucket_seconds = bucket_seconds
+        self.clock = clock
+        self.keep = keep
+        self._buckets = {}  # bucket number -> {key: value}
+
+    def _current(self):
+        current = int(self.clock().timestamp() // self.bucket_seconds)
+        for bucket in [bucket for bucket in self._buckets if bucket <= current - self.keep]:
+            del self._buckets[bucket]
+        return current
+
+    def get(self, key, default=None):
+        self._current()
+        for entries in self._buckets.values():
+            if key in entries:
+                return entries[key]
+        return default
+
+    def set(self, key, value):
+        self._buckets.setdefault(self._current(), {})[key] = value
+
+    def __len__(self):
+        return sum(len(entries) for entries in self._buckets.values())
+
+    def clear(self):
+        self._buckets.clear()
+
+
+class NudgeIndex:
+    """Recently generated and sent nudges, for deduplication and idempotent sends
+
+    A nudge is identified by (user_id, type, condition, threshold, time bucket).
+    Generating that nudge again within the same bucket returns a copy of the
+    stored one, with the same message, created_at and nudge_id, so dashboard
+    reruns neither rebuild nor resend it. The id is derived from the key, so two
+    distinct nudges never share an id and a rerun reproduces it. Both
+    indexes are BucketStores on the same clock as the keys: an entry lives
+    for the rest of its bucket and the next one, so memory does not grow
+    with the number of refreshes and a live sent id is never forgotten.
+    """
+
+    def __init__(self, bucket=timedelta(hours=6), clock=None):
+        self.bucket = bucket.total_seconds()
+        self.clock = clock or datetime.now
+        self.generated = BucketStore(self.bucket, self.clock)  # key -> nudge
+        self.sent = BucketStore(self.bucket, self.clock)  # nudge_id -> send result
+
+    def key(self, user_id, nudge_type, condition, threshold, when):
+        return (user_id, nudge_type, condition, threshold, int(when.timestamp() // self.bucket))
+
+    @staticmethod
+    def nudge_id(key):
+        return 'nudge:' + ':'.join(str(part) for part in key)
+
+    def clear(self):
+        self.generated.clear()
+        self.sent.clear()
@@ -0,0 +1,162 @@
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from learner_records import LearnerTable
+
+
+PRIORITY_ORDER = {'high': 3, 'medium': 2, 'low': 1}
+
+# Conditions not yet backed by data, simulated as a fixed chance per evaluation
+CHANCE_CONDITIONS = {
+    'no_assessment': 0.3,  # time since last assessment
+    'peer_active': 0.4,  # peer activity
+    'mentor_available': 0.6,  # mentor availability
+}
+
+
+@lru_cache(maxsize=4096)
+def inactive_hours(last_active):
+    """Hours of inactivity implied by a last_active label, parsed once per distinct label
+
+    'Today' is NaN so that no inactivity threshold matches it.
+    """
+    if last_active == 'Today':
+        return float('nan')
+    if last_active == 'Yesterday':
+        return 24.0
+    first = last_active.split()[0]
+    return int(first) * 24.0 if first.isdigit() else 24.0
+
+
+def _inactive_hours_column(labels):
+    """Vectorized inactive_hours: parse each distinct label once, then index by code"""
+    if isinstance(labels, pd.Categorical):
+        codes, uniques = labels.codes, labels.categories
+    else:
+        codes, uniques = pd.factorize(np.asarray(labels, dtype=object))
+    hours = np.array([inactive_hours(str(label)) for label in uniques] + [np.nan])
+    return hours[np.where(codes >= 0, codes, len(uniques))]
+
+
+# condition -> (scalar predicate(user, threshold), vector predicate(columns, threshold))
+CONDITIONS = {
+    'hours_inactive': (
+        lambda user, t: inactive_hours(user['last_active']) >= t,
+        lambda c, t: _inactive_hours_column(c('last_active')) >= t
+    ),
+    'engagement_drop': (
+        lambda user, t: user['engagement_score'] < (100 - t),
+        lambda c, t: c('engagement_score') < (100 - t)
+    ),
+    'streak_risk': (
+        lambda user, t: user['streak'] <= t,
+        lambda c, t: c('streak') <= t
+    ),
+    'completion_rate_low': (
+        lambda user, t: (user['completion_rate'] / 100) < t,
+        lambda c, t: (c('completion_rate') / 100) < t
+    ),
+    'time_spent_high': (
+        lambda user, t: user['avg_session'] > t,
+        lambda c, t: c('avg_session') > t
+    ),
+    'engagement_moderate': (
+        lambda user, t: user['engagement_score'] > t,
+        lambda c, t: c('engagement_score') > t
+    ),
+    'streak_high': (
+        lambda user, t: user['streak'] >= t,
+        lambda c, t: c('streak') >= t
+    ),
+    'dropout_risk_high': (
+        lambda user, t: user['dropout_risk'] > t,
+        lambda c, t: c('dropout_risk') > t
+    ),
+    'struggle_detected': (
+        lambda user, t: user['completion_rate'] < 40,  # Low completion suggests struggle
+        lambda c, t: c('completion_rate') < 40
+    ),
+}
+
+
+def column_getter(users_data):
+    """field -> array accessor for a DataFrame, dict of arrays or LearnerTable"""
+    if isinstance(users_data, pd.DataFrame):
+        return lambda field: (users_data[field].array if isinstance(users_data[field].dtype, pd.CategoricalDtype)
+                              else users_data[field].to_numpy())
+    columns = users_data.columns if isinstance(users_data, LearnerTable) else users_data
+    return lambda field: columns[field] if isinstance(columns[field], pd.Categorical) else np.asarray(columns[field])
+
+
+class CompiledTrigger:
+    """One nudge trigger with its predicates bound to the threshold"""
+    __slots__ = ('nudge_type', 'condition', 'threshold', 'priority', 'matches', 'mask')
+
+    def __init__(self, nudge_type, trigger):
+        self.nudge_type = nudge_type
+        self.condition = trigger['condition']
+        self.threshold = trigger['threshold']
+        self.priority = trigger['priority']
+        threshold = self.threshold
+        chance = CHANCE_CONDITIONS.get(self.condition)
+        if chance is not None:
+            self.matches = lambda user, rng: rng.random() < chance
+            self.mask = lambda column, n, np_rng: np_rng.random(n) < chance
+        elif self.condition in CONDITIONS:
+            scalar, vector = CONDITIONS[self.condition]
+            self.matches = lambda user, rng: bool(scalar(user, threshold))
+            self.mask = lambda column, n, np_rng: np.asarray(vector(column, threshold), dtype=bool)
+        else:
+            # Unknown conditions never fire
+            self.matches = lambda user, rng: False
+            self.mask = lambda column, n, np_rng: np.zeros(n, dtype=bool)
+
+
+class RuleEngine:
+    """nudge_rules compiled once into per-trigger predicates
+
+    matches() evaluates one learner dict; masks() evaluates every trigger over
+    columnar learners as NumPy boolean masks, one vectorized pass per trigger.
+    Generators are passed per call so a replayed NudgeSystem stays in sync.
+    """
+
+    def __init__(self, rules):
+        self.triggers = {
+            nudge_type: [CompiledTrigger(nudge_type, trigger) for trigger in rule['triggers']]
+            for nudge_type, rule in rules.items()
+        }
+        # Flat rule order; candidates refer to triggers by index into this list
+        self.trigger_list = [trigger for triggers in self.triggers.values() for trigger in triggers]
+
+    def matches(self, user, nudge_type, rng):
+        """Triggers of nudge_type that fire for one learner"""
+        return [trigger for trigger in self.triggers[nudge_type] if trigger.matches(user, rng)]
+
+    def masks(self, users_data, np_rng):
+        """(trigger, boolean mask over learners) for every trigger, in rule order"""
+        column = column_getter(users_data)
+        n = len(column('id'))
+        return [(trigger, trigger.mask(column, n, np_rng)) for trigger in self.trigger_list]
+
+    def candidates(self, users_data, np_rng, per_user=None):
+        """Every firing (learner row, trigger) pair, each learner's in generate order
+
+        That order is highest priority first, ties in rule order, as
+        generate_nudges_for_user sorts them. per_user keeps only the first few
+        per learner. Returns arrays 'row', 'trigger' (index into trigger_list)
+        and 'priority' (PRIORITY_ORDER value).
+        """
+        masks = self.masks(users_data, np_rng)
+        rows = np.concatenate([np.flatnonzero(mask) for _, mask in masks])
+        triggers = np.concatenate([np.full(np.count_nonzero(mask), i) for i, (_, mask) in enumerate(masks)])
+        priorities = np.array([PRIORITY_ORDER[trigger.priority] for trigger in self.trigger_list])[triggers]
+        order = np.lexsort((triggers, -priorities, rows))
+        rows, triggers, priorities = rows[order], triggers[order], priorities[order]
+        if per_user is not None and rows.size:
+            starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+            rank = np.arange(rows.size) - np.repeat(starts, np.diff(np.r_[starts, rows.size]))
+            keep = rank < per_user
+            rows, triggers, priorities = rows[keep], triggers[keep], priorities[keep]
+        return {'row': rows, 'trigger': triggers, 'priority': priorities}
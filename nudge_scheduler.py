@@ -0,0 +1,254 @@
+import heapq
+import itertools
+from collections import deque
+from datetime import datetime, timedelta
+
+from nudge_rules import PRIORITY_ORDER
+
+
+# preferred_time -> (start hour, end hour) of the overnight window in which the learner is not nudged.
+# Morning learners go quiet early, evening learners late.
+QUIET_HOURS = {'morning': (21, 6), 'afternoon': (23, 8), 'evening': (1, 10)}
+DEFAULT_QUIET_HOURS = (22, 7)
+
+# Minimum time between two nudges of one type to the same learner
+DEFAULT_COOLDOWNS = {
+    'reminder': timedelta(hours=12),
+    'assessment': timedelta(hours=24),
+    'challenge': timedelta(hours=24),
+    'mentor': timedelta(hours=48),
+}
+
+
+def quiet_until(when, preferred_time):
+    """End of the quiet window containing when, or None if when is outside it"""
+    start, end = QUIET_HOURS.get(preferred_time, DEFAULT_QUIET_HOURS)
+    hour = when.hour
+    quiet = start <= hour < end if start < end else (hour >= start or hour < end)
+    if not quiet:
+        return None
+    resume = when.replace(hour=end, minute=0, second=0, microsecond=0)
+    if resume <= when:
+        resume += timedelta(days=1)
+    return resume
+
+
+class ScheduledNudge:
+    """Heap entry for one nudge; cancelling only flips active (lazy deletion)"""
+    __slots__ = ('id', 'nudge', 'priority', 'due', 'preferred_time', 'active')
+
+    def __init__(self, entry_id, nudge, due, preferred_time):
+        self.id = entry_id
+        self.nudge = nudge
+        self.priority = PRIORITY_ORDER[nudge['priority']]
+        self.due = due  # epoch seconds
+        self.preferred_time = preferred_time
+        self.active = True
+
+
+class NudgeScheduler:
+    """Priority queue of pending nudges with per-learner rate limits, cooldowns and quiet hours
+
+    Nudges wait in a heap keyed by due time until they are due, then move to
+    a ready heap keyed by (priority, due time), highest priority first.
+    pop_due(k) hands out the top k that may be sent now. A nudge blocked by
+    quiet hours, the learner's rate limit or its type's cooldown goes back to
+    the waiting heap with its due time moved to when it becomes sendable. It
+    is never dropped. Insert is O(log n) and cancel is O(1) (entries are
+    skipped when popped). The cost of a dispatch grows with the nudges it
+    examines, not with the number queued.
+
+    A learner has at most one pending nudge per type; scheduling another
+    keeps whichever has the higher priority.
+
+    Send history only needs to reach back one rate window or cooldown, so
+    older records are pruned once the history has doubled since the last
+    prune; it stays proportional to the learners nudged recently.
+    """
+
+    def __init__(self, max_per_learner=3, rate_window=timedelta(days=1), cooldowns=None,
+                 quiet_hours=True, clock=None):
+        self.max_per_learner = max_per_learner
+        self.rate_window = rate_window.total_seconds()
+        self.cooldowns = {
+            nudge_type: cooldown.total_seconds()
+            for nudge_type, cooldown in (DEFAULT_COOLDOWNS if cooldowns is None else cooldowns).items()
+        }
+        self.quiet_hours = quiet_hours
+        self.clock = clock or datetime.now
+        self._ids = itertools.count(1)
+        self.clear()
+
+    def clear(self):
+        """Drop every pending nudge and forget send history"""
+        self._waiting = []  # (due, id, entry)
+        self._ready = []  # (-priority, due, id, entry)
+        self._entries = {}  # id -> entry
+        self._pending = {}  # (user_id, nudge type) -> entry
+        self._stale = 0  # cancelled entries still sitting in a heap
+        self._sent = {}  # user_id -> deque of send times inside rate_window
+        self._last_sent = {}  # (user_id, nudge type) -> last send time
+        self._sent_preferred_times = {}  # (user_id, nudge type) -> preferred_time of that send, for requeue
+        self._history_limit = 64  # prune send history once _last_sent grows past this
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, entry_id):
+        return entry_id in self._entries
+
+    def schedule(self, nudge, due=None, preferred_time=None):
+        """Queue a nudge dict (as built by NudgeSystem) and return its entry id
+
+        due defaults to now; preferred_time selects the learner's quiet hours.
+        """
+        key = (nudge['user_id'], nudge['type'])
+        existing = self._pending.get(key)
+        if existing is not None:
+            if PRIORITY_ORDER[nudge['priority']] <= existing.priority:
+                return existing.id
+            self.cancel(existing.id)
+        due = (due or self.clock()).timestamp()
+        entry = ScheduledNudge(next(self._ids), nudge, due, preferred_time)
+        self._entries[entry.id] = entry
+        self._pending[key] = entry
+        heapq.heappush(self._waiting, (due, entry.id, entry))
+        return entry.id
+
+    def cancel(self, entry_id):
+        """Withdraw a queued nudge; False if it was already sent or cancelled"""
+        entry = self._entries.pop(entry_id, None)
+        if entry is None:
+            return False
+        entry.active = False
+        del self._pending[(entry.nudge['user_id'], entry.nudge['type'])]
+        self._stale += 1
+        if self._stale > 64 and self._stale > len(self._entries):
+            self._compact()
+        return True
+
+    def cancel_user(self, user_id):
+        """Withdraw every queued nudge for a learner (e.g. once they are back); returns how many"""
+        entries = [entry for (pending_user, _), entry in self._pending.items() if pending_user == user_id]
+        for entry in entries:
+            self.cancel(entry.id)
+        return len(entries)
+
+    def _compact(self):
+        # Rebuild the heaps without cancelled entries once they outnumber live ones
+        self._waiting = [item for item in self._waiting if item[-1].active]
+        self._ready = [item for item in self._ready if item[-1].active]
+        heapq.heapify(self._waiting)
+        heapq.heapify(self._ready)
+        self._stale = 0
+
+    def _promote(self, now):
+        """Move nudges whose due time has passed to the ready heap"""
+        while self._waiting and self._waiting[0][0] <= now:
+            due, entry_id, entry = heapq.heappop(self._waiting)
+            if entry.active:
+                heapq.heappush(self._ready, (-entry.priority, due, entry_id, entry))
+            else:
+                self._stale -= 1
+
+    def _hold_until(self, entry, now):
+        """Earliest time (epoch seconds) the entry may be sent, or None if it may be sent now"""
+        user_id, nudge_type = entry.nudge['user_id'], entry.nudge['type']
+        holds = []
+        sent = self._sent.get(user_id)
+        if sent:
+            while sent and sent[0] <= now - self.rate_window:
+                sent.popleft()
+            if len(sent) >= self.max_per_learner:
+                holds.append(sent[0] + self.rate_window)
+        last = self._last_sent.get((user_id, nudge_type))
+        cooldown = self.cooldowns.get(nudge_type, 0)
+        if last is not None and now < last + cooldown:
+            holds.append(last + cooldown)
+        if self.quiet_hours:
+            resume = quiet_until(datetime.fromtimestamp(now), entry.preferred_time)
+            if resume is not None:
+                holds.append(resume.timestamp())
+        return max(holds) if holds else None
+
+    def pop_due(self, k=10, now=None):
+        """Remove and return up to k nudges that may be sent now, highest priority first
+
+        Each returned nudge counts against its learner's rate limit and its
+        type's cooldown.
+        """
+        now = (now or self.clock()).timestamp()
+        self._promote(now)
+        due = []
+        while self._ready and len(due) < k:
+            _, _, entry_id, entry = heapq.heappop(self._ready)
+            if not entry.active:
+                self._stale -= 1
+                continue
+            hold = self._hold_until(entry, now)
+            if hold is not None:
+                entry.due = hold
+                heapq.heappush(self._waiting, (hold, entry_id, entry))
+                continue
+            user_id, nudge_type = entry.nudge['user_id'], entry.nudge['type']
+            self._sent.setdefault(user_id, deque()).append(now)
+            self._last_sent[(user_id, nudge_type)] = now
+            self._sent_preferred_times[(user_id, nudge_type)] = entry.preferred_time
+            del self._entries[entry_id]
+            del self._pending[(user_id, nudge_type)]
+            entry.active = False
+            due.append(entry.nudge)
+        if len(self._last_sent) > self._history_limit:
+            self._prune_history(now)
+        return due
+
+    def requeue(self, nudge, delay=timedelta(minutes=10), now=None):
+        """Take back a nudge from pop_due that failed to send and schedule it again after delay
+
+        The failed send no longer counts against the learner's rate limit or
+        the type's cooldown, and the nudge keeps its quiet hours. Returns the
+        new entry id.
+        """
+        key = (nudge['user_id'], nudge['type'])
+        sent_at = self._last_sent.pop(key, None)
+        preferred_time = self._sent_preferred_times.pop(key, None)
+        sent = self._sent.get(nudge['user_id'])
+        if sent_at is not None and sent and sent_at in sent:
+            sent.remove(sent_at)
+        return self.schedule(nudge, due=(now or self.clock()) + delay, preferred_time=preferred_time)
+
+    def _prune_history(self, now):
+        # Forget sends that no longer count against a rate limit or cooldown
+        for user_id, sent in list(self._sent.items()):
+            while sent and sent[0] <= now - self.rate_window:
+                sent.popleft()
+            if not sent:
+                del self._sent[user_id]
+        self._last_sent = {
+            key: last for key, last in self._last_sent.items()
+            if now < last + self.cooldowns.get(key[1], 0)
+        }
+        self._sent_preferred_times = {
+            key: preferred_time for key, preferred_time in self._sent_preferred_times.items()
+            if key in self._last_sent
+        }
+        self._history_limit = 2 * len(self._last_sent) + 64
+
+    def peek(self, k=10, now=None):
+        """Top k due nudges without removing them or applying send limits
+
+        Walks the ready heap from its root with a small frontier heap, so it
+        costs O(k log k) rather than sorting the queue.
+        """
+        self._promote((now or self.clock()).timestamp())
+        heap = self._ready
+        top = []
+        frontier = [(heap[0], 0)] if heap else []
+        while frontier and len(top) < k:
+            item, index = heapq.heappop(frontier)
+            if item[-1].active:
+                top.append(item[-1].nudge)
+            for child in (2 * index + 1, 2 * index + 2):
+                if child < len(heap):
+                    heapq.heappush(frontier, (heap[child], child))
+        return top
@@ -1,11 +1,41 @@
-import random
-from datetime import datetime, timedelta
+from datetime import timedelta
 
-class NudgeSystem:
-    def __init__(self):
-        """Initialize the nudge system with templates and rules"""
+import numpy as np
+import pandas as pd
+
+from learner_records import LearnerTable
+from nudge_dispatch import CHANNELS, DispatchPipeline, simulated_channels
+from nudge_index import NudgeIndex
+from nudge_rules import PRIORITY_ORDER, RuleEngine, column_getter
+from nudge_scheduler import NudgeScheduler
+from nudge_templates import TemplateSet
+from simulation_random import SeededComponent
+
+class NudgeSystem(SeededComponent):
+    def __init__(self, seed=None, rng=None, np_rng=None, clock=None, personalization=None, scheduler=None,
+                 nudge_index=None):
+        """Initialize the nudge system with templates and rules
+        
+        personalization maps template slots ('mentor_name', 'peer', ...) to
+        callables returning that learner's value; unset slots fall back to a
+        fixed per-learner choice from nudge_templates.DEFAULT_SLOT_OPTIONS.
+        scheduler defaults to a NudgeScheduler on this system's clock, and
+        nudge_index (deduplication of generated and sent nudges) to a NudgeIndex
+        on the same clock.
+        """
+        self._init_random(seed, rng, np_rng, clock)
         self.nudge_templates = self._initialize_nudge_templates()
         self.nudge_rules = self._initialize_nudge_rules()
+        self.rule_engine = RuleEngine(self.nudge_rules)
+        self.template_set = TemplateSet(self.nudge_templates, personalization)
+        self.scheduler = scheduler or NudgeScheduler(clock=self.clock)
+        self.nudge_index = nudge_index or NudgeIndex(clock=self.clock)
+    
+    def replay(self):
+        """Rewind generators and clock and empty the nudge queue and index"""
+        super().replay()
+        self.scheduler.clear()
+        self.nudge_index.clear()
         
     def _initialize_nudge_templates(self):
         """Initialize nudge message templates"""
@@ -76,70 +106,19 @@ class NudgeSystem:
     
     def _check_triggers(self, user_data, nudge_type):
         """Check if any triggers are met for a specific nudge type"""
-        triggers = self.nudge_rules[nudge_type]['triggers']
-        triggered = []
-        
-        for trigger in triggers:
-            condition = trigger['condition']
-            threshold = trigger['threshold']
-            priority = trigger['priority']
-            
-            if self._evaluate_condition(user_data, condition, threshold):
-                triggered.append({
-                    'condition': condition,
-                    'priority': priority,
-                    'reason': self._get_trigger_reason(condition, threshold, user_data)
-                })
-        
-        return triggered
+        return [
+            {
+                'condition': trigger.condition,
+                'threshold': trigger.threshold,
+                'priority': trigger.priority,
+                'reason': self._get_trigger_reason(trigger.condition, trigger.threshold, user_data)
+            }
+            for trigger in self.rule_engine.matches(user_data, nudge_type, self.rng)
+        ]
     
-    def _evaluate_condition(self, user_data, condition, threshold):
-        """Evaluate if a specific condition is met"""
-        if condition == 'hours_inactive':
-            if user_data['last_active'] == 'Today':
-                return False
-            elif user_data['last_active'] == 'Yesterday':
-                return threshold <= 24
-            else:
-                # Extract days from "X days ago"
-                days = int(user_data['last_active'].split()[0]) if user_data['last_active'].split()[0].isdigit() else 1
-                return (days * 24) >= threshold
-                
-        elif condition == 'engagement_drop':
-            return user_data['engagement_score'] < (100 - threshold)
-            
-        elif condition == 'streak_risk':
-            return user_data['streak'] <= threshold
-            
-        elif condition == 'completion_rate_low':
-            return (user_data['completion_rate'] / 100) < threshold
-            
-        elif condition == 'time_spent_high':
-            return user_data['avg_session'] > threshold
-            
-        elif condition == 'no_assessment':
-            # Simulate time since last assessment
-            return random.random() < 0.3  # 30% chance
-            
-        elif condition == 'engagement_moderate':
-            return user_data['engagement_score'] > threshold
-            
-        elif condition == 'peer_active':
-            return random.random() < 0.4  # 40% chance of peer activity
-            
-        elif condition == 'streak_high':
-            return user_data['streak'] >= threshold
-            
-        elif condition == 'dropout_risk_high':
-            return user_data['dropout_risk'] > threshold
-            
-        elif condition == 'struggle_detected':
-            return user_data['completion_rate'] < 40  # Low completion suggests struggle
-            
-        elif condition == 'mentor_available':
-            return random.random() < 0.6  # 60% chance mentor is available
-        
-        return False
+    def trigger_masks(self, users_data):
+        """(trigger, boolean mask) per trigger over columnar learners (LearnerTable, DataFrame, dict of arrays)"""
+        return self.rule_engine.masks(users_data, self.np_rng)
     
     def _get_trigger_reason(self, condition, threshold, user_data):
         """Get human-readable reason for trigger"""
@@ -160,27 +139,68 @@ class NudgeSystem:
         
         return reasons.get(condition, f"Condition {condition} triggered")
     
+    def set_personalization(self, slot, source):
+        """Use source(user_data) -> str to fill {slot} in nudge messages"""
+        self.template_set.set_source(slot, source)
+    
     def _generate_nudge_message(self, nudge_type, user_data, trigger_info):
         """Generate a personalized nudge message"""
-        templates = self.nudge_templates[nudge_type]
-        base_message = random.choice(templates)
-        
-        # Personalize the message
-        replacements = {
-            '{activity}': random.choice(['Python Assignment', 'Data Analysis Quiz', 'Project Milestone']),
-            '{topic}': random.choice(['Machine Learning', 'Data Structures', 'Web Development']),
-            '{peer}': random.choice(['Alex', 'Maya', 'Jordan']),
-            '{task}': random.choice(['Algorithm Challenge', 'Code Review', 'Project Setup']),
-            '{mentor_name}': random.choice(['Dr. Smith', 'Prof. Johnson', 'Dr. Brown'])
-        }
-        
-        for placeholder, replacement in replacements.items():
-            base_message = base_message.replace(placeholder, replacement)
-        
-        return base_message
+        template = self.rng.choice(self.template_set.templates[nudge_type])
+        return self.template_set.render(template, user_data)
+    
+    def render_messages(self, nudge_type, users):
+        """One personalized nudge_type message per learner, rendered in bulk"""
+        users = list(users)
+        choices = self.np_rng.integers(len(self.template_set.templates[nudge_type]), size=len(users))
+        return self.template_set.render_bulk(nudge_type, users, choices)
+    
+    def _is_columnar(self, users_data):
+        return isinstance(users_data, (LearnerTable, pd.DataFrame, dict))
+    
+    def _nudges_from_candidates(self, users_data, candidates):
+        """Materialize nudge dicts for (row, trigger) candidates of columnar learners"""
+        if not isinstance(users_data, LearnerTable):
+            column = column_getter(users_data)
+            users_data = LearnerTable({field: column(field) for field in users_data})
+        triggers = self.rule_engine.trigger_list
+        records = {}
+        nudges = []
+        by_type = {}
+        for row, trigger_index in zip(candidates['row'].tolist(), candidates['trigger'].tolist()):
+            user_data = records.get(row)
+            if user_data is None:
+                user_data = records[row] = users_data[row]
+            trigger = triggers[trigger_index]
+            nudge = self._indexed_nudge(user_data, trigger.nudge_type, {
+                'condition': trigger.condition,
+                'threshold': trigger.threshold,
+                'priority': trigger.priority,
+                'reason': self._get_trigger_reason(trigger.condition, trigger.threshold, user_data)
+            }, render=False)
+            nudges.append(nudge)
+            if nudge['message'] is None:
+                by_type.setdefault(trigger.nudge_type, []).append(len(nudges) - 1)
+        # Messages are rendered per nudge type in bulk rather than one at a time
+        for nudge_type, positions in by_type.items():
+            users = [records[row] for row in candidates['row'][positions].tolist()]
+            for position, message in zip(positions, self.render_messages(nudge_type, users)):
+                nudges[position]['message'] = message
+        return [dict(nudge) for nudge in nudges]
     
     def get_active_nudges(self, users_data):
-        """Get currently active nudges for all users"""
+        """Get currently active nudges for all users
+        
+        Columnar learners (LearnerTable, DataFrame, dict of arrays) are matched
+        with one vectorized pass per trigger instead of per-user rule checks.
+        """
+        if self._is_columnar(users_data):
+            candidates = self.rule_engine.candidates(users_data, self.np_rng, per_user=2)
+            # Priority first, then learner order, then each learner's own order
+            order = np.lexsort((np.arange(candidates['row'].size), -candidates['priority']))
+            return self._nudges_from_candidates(
+                users_data, {key: values[order] for key, values in candidates.items()}
+            )
+        
         active_nudges = []
         
         for user in users_data:
@@ -189,13 +209,15 @@ class NudgeSystem:
             active_nudges.extend(user_nudges[:2])
         
         # Sort by priority
-        priority_order = {'high': 3, 'medium': 2, 'low': 1}
-        active_nudges.sort(key=lambda x: priority_order[x['priority']], reverse=True)
+        active_nudges.sort(key=lambda x: PRIORITY_ORDER[x['priority']], reverse=True)
         
         return active_nudges
     
     def get_all_nudges(self, users_data):
-        """Get all possible nudges for all users"""
+        """Get all possible nudges for all users (vectorized for columnar learners)"""
+        if self._is_columnar(users_data):
+            return self._nudges_from_candidates(users_data, self.rule_engine.candidates(users_data, self.np_rng))
+        
         all_nudges = []
         
         for user in users_data:
@@ -204,6 +226,84 @@ class NudgeSystem:
         
         return all_nudges
     
+    def queue_nudges(self, users_data, per_user=2):
+        """Schedule each learner's top per_user nudges; returns their scheduler entry ids
+        
+        Safe to call on every refresh: the scheduler keeps one pending nudge
+        per learner and type, and send limits apply when they are dispatched.
+        """
+        if self._is_columnar(users_data):
+            nudges = self._nudges_from_candidates(
+                users_data, self.rule_engine.candidates(users_data, self.np_rng, per_user=per_user)
+            )
+            column = column_getter(users_data)
+            preferred_times = dict(zip(column('id').tolist(), list(column('preferred_time'))))
+        else:
+            users_data = list(users_data)
+            nudges = [nudge for user in users_data for nudge in self.generate_nudges_for_user(user)[:per_user]]
+            preferred_times = {user['id']: user.get('preferred_time') for user in users_data}
+        return [
+            self.scheduler.schedule(nudge, preferred_time=preferred_times.get(nudge['user_id']))
+            for nudge in nudges if self.nudge_index.sent.get(nudge['nudge_id']) is None
+        ]
+    
+    def dispatch_nudges(self, k=10):
+        """Send up to k due nudges, highest priority first; returns (nudge, send result) pairs"""
+        return [(nudge, self.send_nudge(nudge)) for nudge in self.scheduler.pop_due(k)]
+    
+    def make_dispatch_pipeline(self, channels=None, **options):
+        """DispatchPipeline on this system's generator and clock; channels default to simulated stand-ins"""
+        return DispatchPipeline(channels or simulated_channels(rng=self.rng), rng=self.rng, clock=self.clock,
+                                **options)
+    
+    async def adispatch_nudges(self, pipeline, k=1000, retry_delay=timedelta(minutes=10)):
+        """Send up to k due nudges through a running DispatchPipeline; returns (nudge, send result) pairs
+        
+        Successful sends are recorded like send_nudge's, so later sends of the
+        same nudge are no-ops. A nudge that still fails after the pipeline's
+        retries goes back to the scheduler, due again after retry_delay, and
+        does not count against the learner's send limits.
+        """
+        nudges = [nudge for nudge in self.scheduler.pop_due(k) if self.nudge_index.sent.get(nudge['nudge_id']) is None]
+        results = await pipeline.dispatch(nudges)
+        for nudge, result in zip(nudges, results):
+            if result['success']:
+                self.nudge_index.sent.set(nudge['nudge_id'], result)
+            else:
+                self.scheduler.requeue(nudge, delay=retry_delay)
+        return list(zip(nudges, results))
+    
+    def _make_nudge(self, user_data, nudge_type, trigger):
+        """Copy of the nudge for this trigger in the current time bucket, generating it if needed
+        
+        Callers may edit the copy; the deduplicated nudge in the index is untouched.
+        """
+        return dict(self._indexed_nudge(user_data, nudge_type, trigger))
+    
+    def _indexed_nudge(self, user_data, nudge_type, trigger, render=True):
+        """The nudge stored in nudge_index for this trigger and time bucket (shared: do not hand out)
+        
+        With render=False a new nudge's message is left for a bulk render.
+        """
+        now = self.clock()
+        key = self.nudge_index.key(user_data['id'], nudge_type, trigger['condition'], trigger.get('threshold'), now)
+        nudge = self.nudge_index.generated.get(key)
+        if nudge is not None:
+            return nudge
+        nudge = {
+            'nudge_id': self.nudge_index.nudge_id(key),
+            'user': user_data['name'],
+            'user_id': user_data['id'],
+            'type': nudge_type,
+            'message': self._generate_nudge_message(nudge_type, user_data, trigger) if render else None,
+            'priority': trigger['priority'],
+            'trigger_reason': trigger['reason'],
+            'created_at': now,
+            'status': 'pending'
+        }
+        self.nudge_index.generated.set(key, nudge)
+        return nudge
+    
     def generate_nudges_for_user(self, user_data):
         """Generate all applicable nudges for a specific user"""
         user_nudges = []
@@ -212,46 +312,45 @@ class NudgeSystem:
             triggers = self._check_triggers(user_data, nudge_type)
             
             for trigger in triggers:
-                message = self._generate_nudge_message(nudge_type, user_data, trigger)
-                
-                nudge = {
-                    'user': user_data['name'],
-                    'user_id': user_data['id'],
-                    'type': nudge_type,
-                    'message': message,
-                    'priority': trigger['priority'],
-                    'trigger_reason': trigger['reason'],
-                    'created_at': datetime.now(),
-                    'status': 'pending'
-                }
-                
-                user_nudges.append(nudge)
+                user_nudges.append(self._make_nudge(user_data, nudge_type, trigger))
         
         # Sort by priority within user nudges
-        priority_order = {'high': 3, 'medium': 2, 'low': 1}
-        user_nudges.sort(key=lambda x: priority_order[x['priority']], reverse=True)
+        user_nudges.sort(key=lambda x: PRIORITY_ORDER[x['priority']], reverse=True)
         
         return user_nudges
     
     def send_nudge(self, nudge):
-        """Simulate sending a nudge to a user"""
+        """Simulate sending a nudge to a user
+        
+        Idempotent: sending a nudge again (same nudge_id) returns the first
+        send's result instead of delivering it twice.
+        """
+        nudge_id = nudge.get('nudge_id') or self.nudge_index.nudge_id(self.nudge_index.key(
+            nudge['user_id'], nudge['type'], nudge.get('condition'), nudge.get('threshold'),
+            nudge.get('created_at') or self.clock()
+        ))
+        result = self.nudge_index.sent.get(nudge_id)
+        if result is not None:
+            return result
         # In a real system, this would integrate with email, SMS, push notifications, etc.
-        return {
+        result = {
             'success': True,
-            'method': random.choice(['email', 'push_notification', 'in_app']),
-            'sent_at': datetime.now(),
-            'nudge_id': f"nudge_{random.randint(1000, 9999)}"
+            'method': self.rng.choice(CHANNELS),
+            'sent_at': self.clock(),
+            'nudge_id': nudge_id
         }
+        self.nudge_index.sent.set(nudge_id, result)
+        return result
     
     def track_nudge_effectiveness(self, nudge, user_response):
         """Track the effectiveness of sent nudges"""
         # In a real system, this would track user responses and adjust nudge strategies
         effectiveness_metrics = {
             'nudge_id': nudge.get('nudge_id', 'unknown'),
-            'response_time': random.uniform(0.5, 24.0),  # Hours to respond
+            'response_time': self.rng.uniform(0.5, 24.0),  # Hours to respond
             'response_type': user_response,  # 'engaged', 'dismissed', 'no_response'
-            'engagement_change': random.uniform(-5, 15),  # Change in engagement score
-            'recorded_at': datetime.now()
+            'engagement_change': self.rng.uniform(-5, 15),  # Change in engagement score
+            'recorded_at': self.clock()
         }
         
         return effectiveness_metrics
@@ -320,7 +419,7 @@ class NudgeSystem:
                 'message': condition['message'],
                 'priority': condition['priority'],
                 'trigger_reason': condition['reason'],
-                'created_at': datetime.now(),
+                'created_at': self.clock(),
                 'status': 'urgent',
                 'is_urgent': True
             }
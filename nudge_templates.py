@@ -0,0 +1,144 @@
+import re
+import zlib
+
+import numpy as np
+
+
+SLOT_PATTERN = re.compile(r'\{(\w+)\}')
+
+# Fallback values for template slots when no learner-specific source is registered
+DEFAULT_SLOT_OPTIONS = {
+    'activity': ['Python Assignment', 'Data Analysis Quiz', 'Project Milestone'],
+    'topic': ['Machine Learning', 'Data Structures', 'Web Development'],
+    'peer': ['Alex', 'Maya', 'Jordan'],
+    'task': ['Algorithm Challenge', 'Code Review', 'Project Setup'],
+    'mentor_name': ['Dr. Smith', 'Prof. Johnson', 'Dr. Brown'],
+}
+
+
+class CompiledTemplate:
+    """A message template split once into literal segments and slot names
+
+    "Quick reminder: You have {activity} due soon." becomes literals
+    ('Quick reminder: You have ', ' due soon.') and slots ('activity',).
+    Templates without slots render to the original string with no work.
+    """
+    __slots__ = ('text', 'literals', 'slots')
+
+    def __init__(self, text):
+        parts = SLOT_PATTERN.split(text)
+        self.text = text
+        self.literals = tuple(parts[0::2])
+        self.slots = tuple(parts[1::2])
+
+    def render(self, values):
+        """Fill slots from a mapping; slots missing from it are left as '{slot}'"""
+        if not self.slots:
+            return self.text
+        pieces = [self.literals[0]]
+        for slot, literal in zip(self.slots, self.literals[1:]):
+            pieces.append(values.get(slot, '{' + slot + '}'))
+            pieces.append(literal)
+        return ''.join(pieces)
+
+    def render_many(self, slot_values, count):
+        """Render count messages from per-slot value sequences (each of length count)"""
+        if not self.slots:
+            return [self.text] * count
+        if len(self.slots) == 1:
+            head, tail = self.literals
+            return [head + value + tail for value in slot_values[self.slots[0]]]
+        columns = [slot_values[slot] for slot in self.slots]
+        literals = self.literals
+        messages = []
+        for values in zip(*columns):
+            pieces = [literals[0]]
+            for value, literal in zip(values, literals[1:]):
+                pieces.append(value)
+                pieces.append(literal)
+            messages.append(''.join(pieces))
+        return messages
+
+
+class StableChoice:
+    """Personalization source that gives each learner one fixed option, chosen by id
+
+    A learner keeps the same mentor or peer across renders instead of a new
+    random name every time.
+    """
+
+    def __init__(self, options):
+        self.options = list(options)
+        self._options = np.asarray(self.options, dtype=object)
+
+    def _index(self, user_id):
+        if isinstance(user_id, (int, np.integer)):
+            return int(user_id) % len(self.options)
+        return zlib.crc32(str(user_id).encode()) % len(self.options)
+
+    def __call__(self, user):
+        return self.options[self._index(user['id'])]
+
+    def many(self, users):
+        """Values for a sequence of learners in one pass"""
+        ids = [user['id'] for user in users]
+        if ids and all(isinstance(user_id, (int, np.integer)) for user_id in ids):
+            return self._options[np.asarray(ids, dtype=np.int64) % len(self.options)].tolist()
+        return [self.options[self._index(user_id)] for user_id in ids]
+
+
+def default_sources():
+    return {slot: StableChoice(options) for slot, options in DEFAULT_SLOT_OPTIONS.items()}
+
+
+def slot_values(source, users):
+    """Evaluate a source for many learners, using its batch form when it has one"""
+    many = getattr(source, 'many', None)
+    return many(users) if many is not None else [source(user) for user in users]
+
+
+class TemplateSet:
+    """Compiled templates per nudge type plus the personalization sources that fill them
+
+    A source is any callable taking a learner mapping and returning the slot
+    text (e.g. the learner's mentor); it may also offer many(users) for bulk
+    rendering.
+    """
+
+    def __init__(self, templates, sources=None):
+        self.templates = {
+            nudge_type: [CompiledTemplate(text) for text in texts] for nudge_type, texts in templates.items()
+        }
+        self.sources = default_sources()
+        self.sources.update(sources or {})
+
+    def set_source(self, slot, source):
+        self.sources[slot] = source
+
+    def render(self, template, user):
+        """Render one template for one learner, evaluating only the slots it uses"""
+        if not template.slots:
+            return template.text
+        return template.render({slot: self.sources[slot](user) for slot in template.slots if slot in self.sources})
+
+    def render_bulk(self, nudge_type, users, choices):
+        """Render one message per learner; choices[i] is the template index for users[i]
+
+        Learners are grouped by template so each slot source runs once per
+        group, and slot-free templates are shared rather than rebuilt.
+        """
+        templates = self.templates[nudge_type]
+        choices = np.asarray(choices)
+        messages = [None] * len(users)
+        for index in np.unique(choices).tolist():
+            rows = np.flatnonzero(choices == index).tolist()
+            template = templates[index]
+            group = [users[row] for row in rows]
+            values = {
+                slot: slot_values(self.sources[slot], group) if slot in self.sources
+                else ['{' + slot + '}'] * len(group)
+                for slot in template.slots
+            }
+            for row, message in zip(rows, template.render_many(values, len(group))):
+                messages[row] = message
+        return messages
@@ -0,0 +1,259 @@
+import math
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from quantile_sketch import KLLSketch
+
+
+NUMERIC_FIELDS = [
+    'engagement_score', 'dropout_risk', 'total_time', 'avg_session',
+    'daily_time', 'interaction_score', 'session_count'
+]
+TIME_EDGES = [10, 30, 60]
+TIME_LABELS = ['0-10h', '10-30h', '30-60h', '60h+']
+INTERACTION_EDGES = [0.4, 0.7]
+INTERACTION_LABELS = ['low', 'medium', 'high']
+RECENT_LABELS = ['Today', 'Yesterday']
+
+
+def _column_getter(data):
+    """field -> column accessor that keeps categorical columns as pd.Categorical"""
+    if isinstance(data, pd.DataFrame):
+        return lambda field: (data[field].array if isinstance(data[field].dtype, pd.CategoricalDtype)
+                              else data[field].to_numpy())
+    if isinstance(data, dict):
+        return lambda field: data[field] if isinstance(data[field], pd.Categorical) else np.asarray(data[field])
+    return lambda field: np.asarray([user[field] for user in data])
+
+
+def _codes(values):
+    """(integer codes, labels) for a label column, labels in first-appearance order like calculate_metrics
+
+    A Categorical's codes are remapped through a small lookup table rather
+    than re-encoding its labels.
+    """
+    if isinstance(values, pd.Categorical) and not (values.codes < 0).any():
+        order = pd.unique(values.codes)
+        remap = np.zeros(len(values.categories), dtype=np.intp)
+        remap[order] = np.arange(len(order))
+        return remap[values.codes], [str(values.categories[code]) for code in order]
+    codes, uniques = pd.factorize(np.asarray(values, dtype=object), sort=False)
+    return codes, [str(label) for label in uniques]
+
+
+def _encode(data):
+    """Columnar arrays with categoricals as integer codes
+
+    Float columns are used without copying and Categorical codes are only
+    remapped, so for columnar input this costs little before the shards
+    start. Label codes follow first appearance (see _codes).
+    """
+    column = _column_getter(data)
+    arrays = {field: np.ascontiguousarray(column(field), dtype=float) for field in NUMERIC_FIELDS}
+    labels = {}
+    for field in ('profile_type', 'preferred_time'):
+        arrays[field], labels[field] = _codes(column(field))
+    last_active = column('last_active')
+    if isinstance(last_active, pd.Categorical):
+        recent = np.append(last_active.categories.isin(RECENT_LABELS), False).astype(np.int8)
+        arrays['recent'] = recent[last_active.codes]  # code -1 (missing) picks the trailing False
+    else:
+        arrays['recent'] = pd.Series(last_active).isin(RECENT_LABELS).to_numpy().astype(np.int8)
+    return arrays, labels
+
+
+def _partial(arrays, labels, risk_edges, sketch_k, seed):
+    """Mergeable aggregates for one shard"""
+    engagement = arrays['engagement_score']
+    interaction = arrays['interaction_score']
+    sessions = arrays['avg_session']
+    profiles = arrays['profile_type']
+    n_profiles = len(labels['profile_type'])
+
+    sketch = KLLSketch(sketch_k, seed=seed)
+    sketch.update_many(engagement)
+
+    return {
+        'count': len(engagement),
+        'engagement_sum': float(engagement.sum()),
+        'engagement_sq': float(np.dot(engagement, engagement)),
+        'engagement_min': float(engagement.min()) if len(engagement) else math.inf,
+        'engagement_max': float(engagement.max()) if len(engagement) else -math.inf,
+        'interaction_sum': float(interaction.sum()),
+        'interaction_sq': float(np.dot(interaction, interaction)),
+        'cross_sum': float(np.dot(interaction, engagement)),
+        'total_time_sum': float(arrays['total_time'].sum()),
+        'session_sum': float(sessions.sum()),
+        'daily_time_sum': float(arrays['daily_time'].sum()),
+        'complete_records': int(np.count_nonzero(arrays['session_count'] > 5)),
+        'recent_users': int(arrays['recent'].sum()),
+        'risk_counts': np.bincount(np.digitize(arrays['dropout_risk'], risk_edges), minlength=3),
+        'time_counts': np.bincount(np.digitize(arrays['total_time'], TIME_EDGES), minlength=4),
+        'interaction_counts': np.bincount(np.digitize(interaction, INTERACTION_EDGES), minlength=3),
+        'profile_session_sums': np.bincount(profiles, weights=sessions, minlength=n_profiles),
+        'profile_counts': np.bincount(profiles, minlength=n_profiles),
+        'time_pref_counts': np.bincount(arrays['preferred_time'], minlength=len(labels['preferred_time'])),
+        'sketch': sketch
+    }
+
+
+def _partial_from_shared(specs, start, stop, labels, risk_edges, sketch_k, seed):
+    """Worker entry point: attach to the shared columns and aggregate rows [start, stop)"""
+    blocks = []
+    arrays = {}
+    try:
+        for field, (name, dtype, length) in specs.items():
+            block = shared_memory.SharedMemory(name=name)
+            blocks.append(block)
+            arrays[field] = np.ndarray((length,), dtype=dtype, buffer=block.buf)[start:stop]
+        return _partial(arrays, labels, risk_edges, sketch_k, seed)
+    finally:
+        arrays.clear()
+        for block in blocks:
+            block.close()
+
+
+def _merge(partials, seed):
+    total = dict(partials[0])
+    total['sketch'] = KLLSketch(partials[0]['sketch'].k, seed=seed)
+    total['sketch'].merge(partials[0]['sketch'])
+    for part in partials[1:]:
+        for key, value in part.items():
+            if key == 'engagement_min':
+                total[key] = min(total[key], value)
+            elif key == 'engagement_max':
+                total[key] = max(total[key], value)
+            elif key == 'sketch':
+                total[key].merge(value)
+            else:
+                total[key] = total[key] + value
+    return total
+
+
+def _finalize(total, labels, median, trend, rng):
+    n = total['count']
+    engagement_mean = total['engagement_sum'] / n
+    interaction_mean = total['interaction_sum'] / n
+    engagement_var = max(0.0, total['engagement_sq'] / n - engagement_mean ** 2)
+    interaction_var = max(0.0, total['interaction_sq'] / n - interaction_mean ** 2)
+    covariance = total['cross_sum'] / n - engagement_mean * interaction_mean
+    std_dev = math.sqrt(engagement_var)
+    if n < 2:
+        correlation = 0
+    elif engagement_var > 0 and interaction_var > 0:
+        correlation = covariance / math.sqrt(engagement_var * interaction_var)
+    else:
+        correlation = float('nan')
+
+    risk_counts = {level: int(count) for level, count in zip(['low', 'medium', 'high'], total['risk_counts'])}
+    peak_hours = sorted(
+        ((label, int(count)) for label, count in zip(labels['preferred_time'], total['time_pref_counts'])
+         if count),
+        key=lambda x: x[1], reverse=True
+    )
+    adjusted_accuracy = 0.85 * (total['complete_records'] / n + total['recent_users'] / n
+                                + min(1.0, std_dev / 30)) / 3
+
+    return {
+        'overall_engagement': {
+            'average': engagement_mean,
+            'median': median,
+            'std_dev': std_dev,
+            'min': total['engagement_min'],
+            'max': total['engagement_max'],
+            'trend': trend
+        },
+        'risk_distribution': {
+            'counts': risk_counts,
+            'percentages': {level: (count / n) * 100 for level, count in risk_counts.items()}
+        },
+        'time_analytics': {
+            'total_learning_time': {
+                'sum': total['total_time_sum'],
+                'average': total['total_time_sum'] / n,
+                'distribution': {label: int(count) for label, count in zip(TIME_LABELS, total['time_counts'])}
+            },
+            'average_session_length': {
+                'overall': total['session_sum'] / n,
+                'by_user_type': {
+                    label: total['profile_session_sums'][code] / total['profile_counts'][code]
+                    for code, label in enumerate(labels['profile_type'])
+                    if total['profile_counts'][code]
+                }
+            },
+            'daily_engagement': {
+                'average': total['daily_time_sum'] / n,
+                'peak_hours': peak_hours
+            }
+        },
+        'interaction_patterns': {
+            'average_interaction': interaction_mean,
+            'interaction_distribution': {
+                label: int(count) for label, count in zip(INTERACTION_LABELS, total['interaction_counts'])
+            },
+            'engagement_correlation': correlation
+        },
+        'prediction_accuracy': {
+            'overall_accuracy': adjusted_accuracy,
+            'precision': adjusted_accuracy * rng.uniform(0.95, 1.05),
+            'recall': adjusted_accuracy * rng.uniform(0.9, 1.0),
+            'f1_score': adjusted_accuracy * rng.uniform(0.92, 1.02)
+        }
+    }
+
+
+def calculate_metrics_parallel(data, risk_thresholds, workers=None, shards=None,
+                               sketch_k=200, seed=None, trend=0.0, rng=None):
+    """Shard learners across a process pool and merge partial aggregates
+
+    Columns are placed in shared memory once, so each task only carries its row
+    range. The median comes from merged KLL sketches (see KLLSketch for the error
+    bound); trend is fitted from history by the caller. Everything else matches
+    calculate_metrics exactly. rng (a random.Random) drives the simulated
+    precision/recall figures and defaults to one seeded from seed.
+    """
+    arrays, labels = _encode(data)
+    n = len(arrays['engagement_score'])
+    if n == 0:
+        raise ValueError("No learners to analyse")
+    workers = workers or os.cpu_count() or 1
+    shards = max(1, min(n, shards or workers * 4))
+    bounds = np.linspace(0, n, shards + 1).astype(int)
+    risk_edges = [risk_thresholds['low'], risk_thresholds['medium']]
+    # One seed per shard sketch plus one for the merged sketch
+    *seeds, merge_seed = np.random.SeedSequence(seed).generate_state(shards + 1).tolist()
+
+    if workers == 1:
+        partials = [
+            _partial({field: values[start:stop] for field, values in arrays.items()},
+                     labels, risk_edges, sketch_k, shard_seed)
+            for start, stop, shard_seed in zip(bounds[:-1], bounds[1:], seeds)
+        ]
+    else:
+        blocks = []
+        try:
+            specs = {}
+            for field, values in arrays.items():
+                block = shared_memory.SharedMemory(create=True, size=max(1, values.nbytes))
+                blocks.append(block)
+                np.ndarray(values.shape, dtype=values.dtype, buffer=block.buf)[:] = values
+                specs[field] = (block.name, values.dtype.str, len(values))
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [
+                    executor.submit(_partial_from_shared, specs, int(start), int(stop),
+                                    labels, risk_edges, sketch_k, shard_seed)
+                    for start, stop, shard_seed in zip(bounds[:-1], bounds[1:], seeds)
+                ]
+                partials = [future.result() for future in futures]
+        finally:
+            for block in blocks:
+                block.close()
+                block.unlink()
+
+    total = _merge(partials, merge_seed)
+    return _finalize(total, labels, total['sketch'].quantile(0.5), trend, rng or random.Random(seed))
@@ -0,0 +1,201 @@
+import argparse
+import os
+import sys
+from typing import Any, Dict, List, Optional
+
+from auth_manager import LOGIN_QUERY, STATS_COLUMNS, get_pool
+
+
+_UNIQUE_INDEX_CHECK = """
+    SELECT 1 FROM pg_index i
+    JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = i.indkey[0]
+    WHERE i.indrelid = '{table}'::regclass AND a.attname = '{column}'
+      AND i.indisunique AND i.indnatts = 1
+"""
+
+# (version, description, SQL). Append new migrations; never edit applied ones.
+MIGRATIONS = [
+    (1, "Create users and user_stats", """
+        CREATE TABLE IF NOT EXISTS users (
+            id SERIAL PRIMARY KEY,
+            email TEXT NOT NULL UNIQUE,
+            password_hash TEXT NOT NULL,
+            name TEXT,
+            created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        );
+
+        -- Stats rows are rewritten in place often; spare page room keeps updates HOT
+        CREATE TABLE IF NOT EXISTS user_stats (
+            user_id INTEGER PRIMARY KEY REFERENCES users (id) ON DELETE CASCADE,
+            engagement_score DOUBLE PRECISION NOT NULL DEFAULT 0,
+            daily_time DOUBLE PRECISION NOT NULL DEFAULT 0,
+            streak INTEGER NOT NULL DEFAULT 0,
+            dropout_risk DOUBLE PRECISION NOT NULL DEFAULT 0,
+            course_completion_rate DOUBLE PRECISION NOT NULL DEFAULT 0,
+            total_study_hours DOUBLE PRECISION NOT NULL DEFAULT 0,
+            assignments_completed INTEGER NOT NULL DEFAULT 0,
+            assignments_total INTEGER NOT NULL DEFAULT 0,
+            updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        ) WITH (fillfactor = 80);
+    """),
+    (2, "Ensure login hot-path indexes and fill factors", f"""
+        -- Tables created before this module may lack these; skip if an equivalent index exists
+        DO $$
+        BEGIN
+            IF NOT EXISTS ({_UNIQUE_INDEX_CHECK.format(table='users', column='email')}) THEN
+                CREATE UNIQUE INDEX users_email_key ON users (email) WITH (fillfactor = 90);
+            END IF;
+            IF NOT EXISTS ({_UNIQUE_INDEX_CHECK.format(table='user_stats', column='user_id')}) THEN
+                ALTER TABLE user_stats ADD CONSTRAINT user_stats_pkey PRIMARY KEY (user_id);
+            END IF;
+        END
+        $$;
+
+        ALTER TABLE user_stats SET (fillfactor = 80);
+    """),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+# Columns every login depends on: (table, column, must be unique)
+REQUIRED_INDEXES = [
+    ('users', 'email', True),
+    ('user_stats', 'user_id', True),
+]
+
+
+def _connection():
+    return get_pool(os.getenv('DATABASE_URL')).connection()
+
+
+def _ensure_migrations_table(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+    """)
+
+
+def current_version() -> int:
+    """Highest applied migration version (0 for an empty database)"""
+    with _connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT to_regclass('schema_migrations')")
+            if cursor.fetchone()[0] is None:
+                return 0
+            cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_migrations")
+            return cursor.fetchone()[0]
+
+
+def migrate(target: Optional[int] = None) -> List[int]:
+    """Apply pending migrations in order, each in its own transaction; returns applied versions"""
+    target = LATEST_VERSION if target is None else target
+    applied = []
+    for version, description, sql in MIGRATIONS:
+        if version > target:
+            break
+        with _connection() as conn:
+            with conn.cursor() as cursor:
+                # Serialize concurrent deploys; the lock is released at commit
+                cursor.execute("SELECT pg_advisory_xact_lock(hashtext('schema_migrations'))")
+                _ensure_migrations_table(cursor)
+                cursor.execute("SELECT 1 FROM schema_migrations WHERE version = %s", (version,))
+                if cursor.fetchone():
+                    continue
+                cursor.execute(sql)
+                cursor.execute(
+                    "INSERT INTO schema_migrations (version, description) VALUES (%s, %s)",
+                    (version, description)
+                )
+        applied.append(version)
+    return applied
+
+
+def _has_index(cursor, table: str, column: str, unique: bool) -> Optional[bool]:
+    """Whether a single-column index leads with the column (None if the table is missing)"""
+    cursor.execute("SELECT to_regclass(%s)", (table,))
+    if cursor.fetchone()[0] is None:
+        return None
+    cursor.execute("""
+        SELECT EXISTS (
+            SELECT 1 FROM pg_index i
+            JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = i.indkey[0]
+            WHERE i.indrelid = to_regclass(%s) AND a.attname = %s
+              AND (i.indisunique OR NOT %s)
+        )
+    """, (table, column, unique))
+    return cursor.fetchone()[0]
+
+
+def _explain(cursor, query: str, params, analyze: bool) -> List[str]:
+    prefix = "EXPLAIN (ANALYZE, BUFFERS) " if analyze else "EXPLAIN "
+    cursor.execute(prefix + query, params)
+    return [row[0] for row in cursor.fetchall()]
+
+
+def check(email: str = 'someone@example.com', analyze: bool = False) -> Dict[str, Any]:
+    """Report schema version, missing hot-path indexes and plans for the login queries"""
+    report = {
+        'version': current_version(),
+        'latest_version': LATEST_VERSION,
+        'missing_tables': [],
+        'missing_indexes': [],
+        'plans': {}
+    }
+    with _connection() as conn:
+        with conn.cursor() as cursor:
+            for table, column, unique in REQUIRED_INDEXES:
+                found = _has_index(cursor, table, column, unique)
+                if found is None:
+                    if table not in report['missing_tables']:
+                        report['missing_tables'].append(table)
+                elif not found:
+                    kind = 'unique index' if unique else 'index'
+                    report['missing_indexes'].append(f"{kind} on {table}({column})")
+
+            if not report['missing_tables']:
+                report['plans']['login'] = _explain(cursor, LOGIN_QUERY, (email,), analyze)
+                report['plans']['user_stats'] = _explain(
+                    cursor, f"SELECT {STATS_COLUMNS} FROM user_stats WHERE user_id = %s", (0,), analyze
+                )
+            # EXPLAIN ANALYZE executes the query; never keep anything it did
+            conn.rollback()
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the users/user_stats schema")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    migrate_parser = subparsers.add_parser('migrate', help="Apply pending migrations")
+    migrate_parser.add_argument('--target', type=int, default=None)
+    check_parser = subparsers.add_parser('check', help="Report missing indexes and login query plans")
+    check_parser.add_argument('--email', default='someone@example.com', help="Email used for the login plan")
+    check_parser.add_argument('--analyze', action='store_true', help="Run EXPLAIN ANALYZE (executes the queries)")
+    args = parser.parse_args(argv)
+
+    if args.command == 'migrate':
+        applied = migrate(args.target)
+        print(f"Applied migrations: {applied}" if applied else "Schema already up to date")
+        print(f"Schema version: {current_version()}")
+        return 0
+
+    report = check(args.email, args.analyze)
+    print(f"Schema version: {report['version']} (latest {report['latest_version']})")
+    for table in report['missing_tables']:
+        print(f"MISSING TABLE: {table}")
+    for index in report['missing_indexes']:
+        print(f"MISSING INDEX: {index}")
+    for name, plan in report['plans'].items():
+        print(f"\n{name} query plan:")
+        for line in plan:
+            print(f"  {line}")
+        if any('Seq Scan' in line for line in plan):
+            print("  WARNING: sequential scan (expected only on very small tables)")
+    healthy = not (report['missing_tables'] or report['missing_indexes'])
+    return 0 if healthy and report['version'] >= LATEST_VERSION else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,57 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from data_simulator import DataSimulator
+from simulation_random import FrozenClock
+
+
+START = datetime(2026, 1, 5, 10)
+
+
+@pytest.fixture
+def clock():
+    return FrozenClock(START)
+
+
+def test_accessors_agree(clock):
+    user_id = DataSimulator(seed=3, clock=clock).users[0]['id']
+    single = DataSimulator(seed=3, clock=clock).get_user_by_id(user_id)
+    batch = DataSimulator(seed=3, clock=clock).get_users_data([user_id])[0]
+    assert single.to_dict() == batch.to_dict()
+
+
+def test_advancing_clock_recomputes_derived_fields(clock):
+    simulator = DataSimulator(seed=3, clock=clock)
+    before = simulator.get_current_user_data()
+    assert simulator.get_current_user_data().to_dict() == before.to_dict()
+
+    clock.advance(days=5)
+    after = simulator.get_current_user_data()
+    assert after['last_active'] != before['last_active']
+    assert after['last_active'] == f"{int((clock() - after['last_login']).total_seconds() // 86400)} days ago"
+    assert after['dropout_risk'] > before['dropout_risk']
+
+
+def test_explicit_now_is_honoured(clock):
+    simulator = DataSimulator(seed=3, clock=clock)
+    user_id = simulator.users[0]['id']
+    current = simulator.get_users_data([user_id])[0]
+    later = simulator.get_users_data([user_id], now=START + timedelta(days=9))[0]
+    assert later['last_active'].endswith('days ago')
+    assert later['last_active'] != current['last_active']
+
+
+def test_live_updates_shift_interaction_score_up_or_down(clock):
+    simulator = DataSimulator(seed=1, clock=clock)
+    user_id = simulator.users[0]['id']
+    scores = [simulator.base_metrics[user_id]['interaction_score']]
+    for _ in range(40):
+        simulator.update_real_time_data()
+        scores.append(simulator.base_metrics[user_id]['interaction_score'])
+
+    changes = [after - before for before, after in zip(scores, scores[1:]) if after != before]
+    assert changes
+    assert all(-0.1 <= change <= 0.2 for change in changes)
+    assert any(change < 0 for change in changes)
+    assert max(scores) <= 1.0
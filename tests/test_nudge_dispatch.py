@@ -0,0 +1,53 @@
+import asyncio
+import random
+from datetime import datetime, timedelta
+
+from nudge_dispatch import DispatchPipeline, SimulatedChannel
+from nudge_system import NudgeSystem
+from simulation_random import FrozenClock
+
+
+def nudge(user_id, nudge_type='reminder'):
+    return {'nudge_id': f"nudge:{user_id}:{nudge_type}", 'user_id': user_id, 'type': nudge_type,
+            'priority': 'high', 'channel': 'push_notification'}
+
+
+def channel(failure_rate):
+    return SimulatedChannel('push_notification', latency=0, per_nudge_latency=0, jitter=0,
+                            failure_rate=failure_rate, rng=random.Random(0))
+
+
+async def dispatch(system, failure_rate, k=10):
+    async with DispatchPipeline([channel(failure_rate)], max_retries=1, backoff=0, linger=0) as pipeline:
+        return await system.adispatch_nudges(pipeline, k=k)
+
+
+def test_failed_sends_are_requeued_without_using_the_quota():
+    clock = FrozenClock(datetime(2026, 1, 5, 12))
+    system = NudgeSystem(seed=0, clock=clock)
+    system.scheduler.quiet_hours = False
+    for user_id in range(3):
+        system.scheduler.schedule(nudge(user_id))
+
+    failed = asyncio.run(dispatch(system, failure_rate=1.0))
+    assert len(failed) == 3
+    assert not any(result['success'] for _, result in failed)
+    assert len(system.scheduler) == 3
+    assert system.scheduler.pop_due(now=clock()) == []  # backed off, not due yet
+
+    clock.advance(minutes=10)
+    delivered = asyncio.run(dispatch(system, failure_rate=0.0))
+    assert sorted(n['user_id'] for n, result in delivered if result['success']) == [0, 1, 2]
+    assert len(system.scheduler) == 0
+
+
+def test_requeue_releases_rate_limit_and_cooldown():
+    clock = FrozenClock(datetime(2026, 1, 5, 12))
+    system = NudgeSystem(seed=0, clock=clock)
+    scheduler = system.scheduler
+    scheduler.max_per_learner = 1
+    scheduler.schedule(nudge(7), preferred_time='evening')
+    [popped] = scheduler.pop_due()
+
+    scheduler.requeue(popped, delay=timedelta(0))
+    assert scheduler.pop_due() == [popped]
@@ -0,0 +1,24 @@
+from datetime import datetime
+
+from data_simulator import DataSimulator
+from nudge_system import NudgeSystem
+from simulation_random import FrozenClock
+
+
+TRIGGER = {'condition': 'engagement_low', 'threshold': 40, 'priority': 'high', 'reason': 'Low engagement'}
+
+
+def test_generated_nudges_are_copies_of_the_deduplicated_one():
+    clock = FrozenClock(datetime(2026, 1, 5, 12))
+    system = NudgeSystem(seed=0, clock=clock)
+    learner = DataSimulator(seed=0, clock=clock).get_current_user_data()
+
+    first = system._make_nudge(learner, 'reminder', TRIGGER)
+    first['status'] = 'sent'
+    first['delivery'] = {'channel': 'email'}
+    again = system._make_nudge(learner, 'reminder', TRIGGER)
+
+    assert again['nudge_id'] == first['nudge_id']
+    assert again['created_at'] == first['created_at']
+    assert again['status'] == 'pending'
+    assert 'delivery' not in again
@@ -0,0 +1,47 @@
+import pytest
+
+from data_simulator import DataSimulator
+from engagement_analytics import EngagementAnalytics
+
+
+# Fields that legitimately differ: the sharded median is a sketch estimate and
+# the simulated precision/recall figures are random draws
+APPROXIMATE = {('overall_engagement', 'median'), ('prediction_accuracy',)}
+
+
+@pytest.fixture(scope='module')
+def cohort():
+    simulator = DataSimulator(seed=0)
+    return simulator.population_user_data(simulator.generate_population(5000, seed=0), seed=0)
+
+
+def assert_matches(parallel, exact, path=()):
+    if path in APPROXIMATE:
+        return
+    if isinstance(exact, dict):
+        assert list(parallel) == list(exact), path
+        for key in exact:
+            assert_matches(parallel[key], exact[key], path + (key,))
+    elif isinstance(exact, list):
+        assert [label for label, _ in parallel] == [label for label, _ in exact], path
+        assert parallel == pytest.approx(exact), path
+    else:
+        assert parallel == pytest.approx(exact, nan_ok=True), path
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_parallel_matches_calculate_metrics(cohort, workers):
+    analytics = EngagementAnalytics(seed=0, cache_size=0)
+    exact = analytics.calculate_metrics(cohort)
+    parallel = analytics.calculate_metrics_parallel(cohort, workers=workers, shards=5)
+    assert_matches(parallel, exact)
+    assert parallel['overall_engagement']['median'] == pytest.approx(
+        exact['overall_engagement']['median'], abs=5
+    )
+
+
+def test_category_order_follows_first_appearance(cohort):
+    analytics = EngagementAnalytics(seed=0, cache_size=0)
+    parallel = analytics.calculate_metrics_parallel(cohort, workers=1)
+    first_seen = list(dict.fromkeys(str(label) for label in cohort['profile_type']))
+    assert list(parallel['time_analytics']['average_session_length']['by_user_type']) == first_seen
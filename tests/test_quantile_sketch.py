@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from quantile_sketch import KLLSketch
+
+
+DISTRIBUTIONS = {
+    'uniform': lambda rng, n: rng.uniform(0, 100, n),
+    'normal': lambda rng, n: rng.normal(60, 15, n),
+    'lognormal': lambda rng, n: rng.lognormal(3, 1, n),
+}
+QS = np.arange(1, 100) / 100
+
+
+def worst_rank_error(sketch, data):
+    """Largest gap between requested and exact rank over the 1st..99th percentiles"""
+    exact = np.sort(data)
+    ranks = np.searchsorted(exact, sketch.quantiles(QS), side='left') / len(exact)
+    return float(np.max(np.abs(ranks - QS)))
+
+
+def sharded_sketch(k, data, seed, shards=4):
+    """Feed shards through update, update_many and merge, as the analytics paths do"""
+    sketches = []
+    for index, shard in enumerate(np.array_split(data, shards)):
+        sketch = KLLSketch(k, seed=seed * shards + index)
+        if index % 2:
+            sketch.update_many(shard)
+        else:
+            for value in shard[:1000]:
+                sketch.update(value)
+            sketch.update_many(shard[1000:])
+        sketches.append(sketch)
+    return KLLSketch.merged(sketches)
+
+
+@pytest.mark.parametrize('k', [50, 100, 200, 400])
+@pytest.mark.parametrize('seed', [0, 1, 2])
+@pytest.mark.parametrize('distribution', sorted(DISTRIBUTIONS))
+def test_rank_error_within_bound(k, seed, distribution):
+    data = DISTRIBUTIONS[distribution](np.random.default_rng(seed), 50000)
+    sketch = sharded_sketch(k, data, seed)
+    assert sketch.count == data.size
+    assert worst_rank_error(sketch, data) <= sketch.rank_error
+
+
+@pytest.mark.parametrize('k', [100, 200])
+def test_streaming_updates_within_bound(k):
+    data = np.random.default_rng(7).normal(60, 15, 20000)
+    sketch = KLLSketch(k, seed=7)
+    for value in data:
+        sketch.update(value)
+    assert worst_rank_error(sketch, data) <= sketch.rank_error
+
+
+def test_memory_stays_bounded():
+    sketch = KLLSketch(200, seed=0)
+    sketch.update_many(np.random.default_rng(0).uniform(size=500000))
+    assert sketch.size <= 3 * 200 + 16
+
+
+def test_extremes_are_exact():
+    data = np.random.default_rng(3).lognormal(3, 1, 10000)
+    sketch = sharded_sketch(100, data, 3)
+    assert sketch.quantile(0) == data.min()
+    assert sketch.quantile(1) == data.max()
+
+
+@pytest.mark.parametrize('k', [8, 64, 150, 1000])
+def test_rank_error_defined_for_any_k(k):
+    assert KLLSketch(k).rank_error == pytest.approx(KLLSketch.RANK_ERROR_FACTOR / k)
+
+
+def test_same_seed_same_quantiles():
+    data = np.random.default_rng(5).uniform(size=100000)
+    first, second = KLLSketch(200, seed=11), KLLSketch(200, seed=11)
+    first.update_many(data)
+    second.update_many(data)
+    assert first.quantiles(QS) == second.quantiles(QS)
@@ -0,0 +1,182 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+class TimeSeriesStore:
+    """Per-learner, per-metric ring buffers in preallocated NumPy arrays
+
+    Each learner owns `capacity` slots shared by every metric, so memory is
+    bounded at capacity * (len(metrics) * 4 + 8) bytes per learner no matter how
+    long the dashboard runs. Old points are overwritten once a buffer is full.
+    """
+
+    def __init__(self, metrics, capacity=90, initial_learners=16, ewma_halflife=7.0):
+        """Create an empty store for the named metrics"""
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.metrics = list(metrics)
+        self.metric_index = {metric: i for i, metric in enumerate(self.metrics)}
+        self.capacity = capacity
+        self.ewma_alpha = 1 - 0.5 ** (1 / ewma_halflife)
+        self.rows = {}  # learner id -> row
+        learners = max(1, initial_learners)
+        self.values = np.full((len(self.metrics), learners, capacity), np.nan, dtype=np.float32)
+        self.timestamps = np.zeros((learners, capacity), dtype=np.int64)
+        self.heads = np.zeros(learners, dtype=np.int64)  # next slot to write
+        self.counts = np.zeros(learners, dtype=np.int64)
+        self.ewma = np.full((len(self.metrics), learners), np.nan)
+        # EWMA as it was before the newest point, so update_last can redo the last step
+        self.ewma_before_last = np.full((len(self.metrics), learners), np.nan)
+
+    def _grow(self):
+        learners = self.heads.size
+        self.values = np.concatenate([self.values, np.full_like(self.values, np.nan)], axis=1)
+        self.timestamps = np.concatenate([self.timestamps, np.zeros_like(self.timestamps)])
+        self.heads = np.concatenate([self.heads, np.zeros(learners, dtype=np.int64)])
+        self.counts = np.concatenate([self.counts, np.zeros(learners, dtype=np.int64)])
+        self.ewma = np.concatenate([self.ewma, np.full_like(self.ewma, np.nan)], axis=1)
+        self.ewma_before_last = np.concatenate(
+            [self.ewma_before_last, np.full_like(self.ewma_before_last, np.nan)], axis=1
+        )
+
+    def _row(self, learner_id, create=False):
+        row = self.rows.get(learner_id)
+        if row is None:
+            if not create:
+                raise KeyError(f"No history for learner {learner_id}")
+            row = len(self.rows)
+            if row >= self.heads.size:
+                self._grow()
+            self.rows[learner_id] = row
+        return row
+
+    def __contains__(self, learner_id):
+        return learner_id in self.rows
+
+    def __len__(self):
+        return len(self.rows)
+
+    def append(self, learner_id, timestamp, values):
+        """Record one point (timestamp in epoch seconds); metrics missing from values are NaN"""
+        row = self._row(learner_id, create=True)
+        slot = self.heads[row]
+        self.timestamps[row, slot] = int(timestamp)
+        for metric, i in self.metric_index.items():
+            value = values.get(metric, np.nan)
+            self.values[i, row, slot] = value
+            self.ewma_before_last[i, row] = self.ewma[i, row]
+            self._update_ewma(i, row, value)
+        self.heads[row] = (slot + 1) % self.capacity
+        self.counts[row] = min(self.counts[row] + 1, self.capacity)
+
+    def update_last(self, learner_id, values):
+        """Overwrite metrics of the most recent point (e.g. today's running totals)
+
+        The EWMA is recomputed from its state before that point, as if the
+        new value had been appended in the first place.
+        """
+        row = self._row(learner_id)
+        if self.counts[row] == 0:
+            raise KeyError(f"No points recorded for learner {learner_id}")
+        slot = (self.heads[row] - 1) % self.capacity
+        for metric, value in values.items():
+            i = self.metric_index[metric]
+            self.values[i, row, slot] = value
+            self.ewma[i, row] = self.ewma_before_last[i, row]
+            self._update_ewma(i, row, value)
+
+    def _update_ewma(self, i, row, value):
+        if np.isnan(value):
+            return
+        previous = self.ewma[i, row]
+        self.ewma[i, row] = value if np.isnan(previous) else previous + self.ewma_alpha * (value - previous)
+
+    def _order(self, row, last):
+        """Slot indices of the newest `last` points, oldest first"""
+        count = int(self.counts[row])
+        last = count if last is None else min(last, count)
+        end = int(self.heads[row])
+        return (np.arange(end - last, end)) % self.capacity
+
+    def series(self, learner_id, metric, last=None):
+        """Values of one metric, oldest first"""
+        row = self._row(learner_id)
+        return self.values[self.metric_index[metric], row, self._order(row, last)].astype(float)
+
+    def times(self, learner_id, last=None):
+        """Timestamps (epoch seconds), oldest first"""
+        row = self._row(learner_id)
+        return self.timestamps[row, self._order(row, last)]
+
+    def latest_ewma(self, learner_id, metric):
+        """Exponentially weighted mean maintained on append (O(1) to read)"""
+        return float(self.ewma[self.metric_index[metric], self._row(learner_id)])
+
+    def window_stats(self, learner_id, metric, window):
+        """Mean/min/max over the newest `window` points"""
+        values = self.series(learner_id, metric, last=window)
+        if values.size == 0 or np.isnan(values).all():
+            return {'mean': np.nan, 'min': np.nan, 'max': np.nan}
+        return {'mean': np.nanmean(values), 'min': np.nanmin(values), 'max': np.nanmax(values)}
+
+    def rolling(self, learner_id, metric, window, how='mean'):
+        """Rolling mean/min/max over every window-point span, oldest first"""
+        values = self.series(learner_id, metric)
+        if values.size < window:
+            return np.array([])
+        windows = sliding_window_view(values, window)
+        reducers = {'mean': np.nanmean, 'min': np.nanmin, 'max': np.nanmax}
+        return reducers[how](windows, axis=1)
+
+    def ewma_series(self, learner_id, metric, halflife):
+        """Exponentially weighted moving average of the stored points"""
+        values = self.series(learner_id, metric)
+        alpha = 1 - 0.5 ** (1 / halflife)
+        result = np.empty_like(values)
+        current = np.nan
+        for i, value in enumerate(values):
+            if not np.isnan(value):
+                current = value if np.isnan(current) else current + alpha * (value - current)
+            result[i] = current
+        return result
+
+    def downsample(self, learner_id, metric, bucket_seconds, how='mean'):
+        """Aggregate points into fixed-width time buckets; returns (bucket starts, values)"""
+        times = self.times(learner_id)
+        values = self.series(learner_id, metric)
+        if times.size == 0:
+            return times, values
+        buckets = times // bucket_seconds
+        starts, inverse = np.unique(buckets, return_inverse=True)
+        valid = ~np.isnan(values)
+        if how == 'sum':
+            result = np.bincount(inverse, weights=np.where(valid, values, 0), minlength=starts.size)
+        elif how == 'mean':
+            sums = np.bincount(inverse, weights=np.where(valid, values, 0), minlength=starts.size)
+            counts = np.bincount(inverse, weights=valid, minlength=starts.size)
+            result = np.divide(sums, counts, out=np.full(starts.size, np.nan), where=counts > 0)
+        elif how in ('min', 'max'):
+            fill = np.inf if how == 'min' else -np.inf
+            result = np.full(starts.size, fill)
+            reduce = np.minimum if how == 'min' else np.maximum
+            reduce.at(result, inverse[valid], values[valid])
+            result[np.isinf(result)] = np.nan
+        else:
+            raise ValueError(f"Unknown aggregation: {how}")
+        return starts * bucket_seconds, result
+
+    def matrix(self, learner_ids, metric, last):
+        """(learners x last) array of the newest points, right-aligned and NaN-padded
+
+        This is the layout trend_engine expects.
+        """
+        result = np.full((len(learner_ids), last), np.nan)
+        i = self.metric_index[metric]
+        for out_row, learner_id in enumerate(learner_ids):
+            row = self.rows.get(learner_id)
+            if row is None:
+                continue
+            order = self._order(row, last)
+            if order.size:
+                result[out_row, last - order.size:] = self.values[i, row, order]
+        return result
@@ -0,0 +1,77 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def series_from_history(histories, field='engagement_score'):
+    """Stack per-user daily records (e.g. DataSimulator.get_historical_data) into a 2D array
+
+    Rows are users, columns are days, oldest first. Shorter histories are
+    right-aligned on the most recent day and padded with NaN.
+    """
+    histories = [history or [] for history in histories]
+    days = max((len(history) for history in histories), default=0)
+    series = np.full((len(histories), days), np.nan)
+    for row, history in enumerate(histories):
+        if history:
+            series[row, days - len(history):] = [day[field] for day in history]
+    return series
+
+
+def least_squares_slopes(series, weights=None):
+    """Ordinary (or weighted) least-squares slope per row, in units per day
+
+    NaN entries are ignored; rows with fewer than two observations get NaN.
+    weights, if given, is a 1D array with one weight per column.
+    """
+    y = np.atleast_2d(np.asarray(series, dtype=float))
+    x = np.arange(y.shape[1], dtype=float)
+    column_weights = np.ones_like(x) if weights is None else np.asarray(weights, dtype=float)
+    slopes = np.full(y.shape[0], np.nan)
+    if y.shape[1] < 2:
+        return slopes
+
+    # Complete rows share one centred design vector, so their slopes are a single matrix-vector product
+    complete = ~np.isnan(y).any(axis=1)
+    dx = x - np.average(x, weights=column_weights)
+    slopes[complete] = y[complete] @ (column_weights * dx) / np.sum(column_weights * dx * dx)
+
+    if not complete.all():
+        partial = y[~complete]
+        observed = ~np.isnan(partial)
+        w = observed * column_weights
+        partial = np.where(observed, partial, 0.0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            x_mean = (w * x).sum(axis=1) / w.sum(axis=1)
+            y_mean = (w * partial).sum(axis=1) / w.sum(axis=1)
+        row_dx = x - x_mean[:, None]
+        sxx = (w * row_dx * row_dx).sum(axis=1)
+        sxy = (w * row_dx * (partial - y_mean[:, None])).sum(axis=1)
+        partial_slopes = np.full(len(partial), np.nan)
+        np.divide(sxy, sxx, out=partial_slopes, where=(sxx > 0) & (observed.sum(axis=1) >= 2))
+        slopes[~complete] = partial_slopes
+    return slopes
+
+
+def exponential_weights(days, halflife):
+    """Weights that halve every halflife days going back from the most recent day"""
+    age = np.arange(days - 1, -1, -1, dtype=float)
+    return 0.5 ** (age / halflife)
+
+
+def engagement_slopes(series, window=None, halflife=None):
+    """Current trend per user: over the last window days, optionally exponentially weighted"""
+    series = np.atleast_2d(np.asarray(series, dtype=float))
+    if window is not None:
+        series = series[:, -window:]
+    weights = exponential_weights(series.shape[1], halflife) if halflife else None
+    return least_squares_slopes(series, weights)
+
+
+def rolling_slopes(series, window):
+    """Slope of every window-day span for every user: shape (users, days - window + 1)"""
+    series = np.atleast_2d(np.asarray(series, dtype=float))
+    if not 2 <= window <= series.shape[1]:
+        raise ValueError("window must be between 2 and the number of days")
+    windows = sliding_window_view(series, window, axis=1)
+    users, spans = windows.shape[:2]
+    return least_squares_slopes(windows.reshape(users * spans, window)).reshape(users, spans)
@@ -0,0 +1,160 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class CacheBackend:
+    """Shared cache store used behind the in-process LRU (e.g. one Redis for every worker)"""
+
+    def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl: float):
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def publish_invalidation(self, namespace: str, key: Hashable):
+        """Tell other processes' local caches to drop a key (no-op without a shared bus)"""
+
+    def subscribe_invalidations(self, namespace: str, callback: Callable[[Hashable], None]):
+        """Call callback(key) when another process invalidates a key in namespace"""
+
+
+class RedisCacheBackend(CacheBackend):
+    """Redis-backed shared cache; values are stored as JSON with a server-side expiry"""
+
+    def __init__(self, url: str, prefix: str = 'undergrad:'):
+        try:
+            import redis
+        except ImportError as e:
+            raise ImportError("RedisCacheBackend requires the 'redis' package") from e
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[Any]:
+        raw = self.client.get(self.prefix + key)
+        return None if raw is None else json.loads(raw)
+
+    def set(self, key: str, value: Any, ttl: float):
+        self.client.set(self.prefix + key, json.dumps(value), px=max(1, int(ttl * 1000)))
+
+    def delete(self, key: str):
+        self.client.delete(self.prefix + key)
+
+    def _channel(self, namespace: str) -> str:
+        return f"{self.prefix}invalidate:{namespace}"
+
+    def publish_invalidation(self, namespace: str, key: Hashable):
+        self.client.publish(self._channel(namespace), json.dumps(key))
+
+    def subscribe_invalidations(self, namespace: str, callback: Callable[[Hashable], None]):
+        """Listen on a pub/sub channel in a daemon thread
+
+        Pub/sub is fire-and-forget: a process that is disconnected when a
+        message is published misses it and serves its local copy until the
+        TTL expires, so the TTL stays the worst-case staleness bound.
+        """
+        def handle(message):
+            key = json.loads(message['data'])
+            # JSON turns tuple keys into lists
+            callback(tuple(key) if isinstance(key, list) else key)
+
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(**{self._channel(namespace): handle})
+        pubsub.run_in_thread(sleep_time=1.0, daemon=True)
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after a fixed time-to-live"""
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 60.0,
+                 backend: Optional[CacheBackend] = None, namespace: str = ''):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.backend = backend
+        self.namespace = namespace
+        self._data = OrderedDict()  # key -> (expires_at, value), least recently used first
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'backend_hits': 0, 'evictions': 0,
+                       'expirations': 0, 'invalidations': 0, 'remote_invalidations': 0}
+        if backend is not None:
+            backend.subscribe_invalidations(namespace, self._drop_remote)
+
+    def _backend_key(self, key: Hashable) -> str:
+        return f"{self.namespace}:{key}"
+
+    def get(self, key: Hashable, default=None):
+        """Return the cached value, consulting the shared backend on a local miss"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._data.move_to_end(key)
+                    self._stats['hits'] += 1
+                    return entry[1]
+                del self._data[key]
+                self._stats['expirations'] += 1
+            self._stats['misses'] += 1
+
+        if self.backend is not None:
+            value = self.backend.get(self._backend_key(key))
+            if value is not None:
+                with self._lock:
+                    self._stats['backend_hits'] += 1
+                self._store(key, value)
+                return value
+        return default
+
+    def _store(self, key: Hashable, value: Any):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def set(self, key: Hashable, value: Any):
+        """Store a value locally and in the shared backend"""
+        self._store(key, value)
+        if self.backend is not None:
+            self.backend.set(self._backend_key(key), value, self.ttl)
+
+    def invalidate(self, key: Hashable):
+        """Drop a key locally, in the shared backend and in other processes' local caches"""
+        with self._lock:
+            self._data.pop(key, None)
+            self._stats['invalidations'] += 1
+        if self.backend is not None:
+            self.backend.delete(self._backend_key(key))
+            self.backend.publish_invalidation(self.namespace, key)
+
+    def _drop_remote(self, key: Hashable):
+        with self._lock:
+            self._data.pop(key, None)
+            self._stats['remote_invalidations'] += 1
+
+    def clear(self):
+        """Drop every local entry (the shared backend keeps its own expiry)"""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and occupancy for monitoring"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._data)
+        lookups = stats['hits'] + stats['misses']
+        stats['maxsize'] = self.maxsize
+        stats['ttl'] = self.ttl
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
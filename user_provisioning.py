@@ -0,0 +1,186 @@
+import argparse
+import csv
+import io
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional
+
+import bcrypt
+
+from auth_manager import AuthManager
+
+
+STATS_COPY_COLUMNS = (
+    'user_id', 'engagement_score', 'daily_time', 'streak', 'dropout_risk',
+    'course_completion_rate', 'total_study_hours', 'assignments_completed', 'assignments_total'
+)
+
+
+def _hash_password(password: str, rounds: int):
+    """Hash one password, returning (hash, error) so one bad row never aborts the batch"""
+    try:
+        salt = bcrypt.gensalt(rounds=rounds)
+        return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8'), None
+    except (ValueError, TypeError) as e:
+        return None, f"Password could not be hashed: {e}"
+
+
+def _copy_value(value) -> str:
+    """Escape a value for COPY ... FROM STDIN text format"""
+    if value is None:
+        return '\\N'
+    return (str(value)
+            .replace('\\', '\\\\')
+            .replace('\t', '\\t')
+            .replace('\n', '\\n')
+            .replace('\r', '\\r'))
+
+
+def _copy_buffer(rows) -> io.StringIO:
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write('\t'.join(_copy_value(value) for value in row))
+        buffer.write('\n')
+    buffer.seek(0)
+    return buffer
+
+
+class BulkProvisioner:
+    """Provision whole cohorts of users in one transaction using COPY"""
+
+    def __init__(self, auth_manager: Optional[AuthManager] = None,
+                 workers: Optional[int] = None, rounds: Optional[int] = None):
+        self.auth_manager = auth_manager or AuthManager()
+        self.workers = workers or os.cpu_count() or 1
+        self.rounds = rounds or self.auth_manager.hasher.rounds
+
+    def _validate(self, users: Iterable[Dict[str, Any]]):
+        """Split input into valid rows and per-row failures (row numbers are 1-based)"""
+        valid = []
+        failures = []
+        seen = set()
+
+        for row_number, user in enumerate(users, start=1):
+            email = (user.get('email') or '').strip()
+            password = user.get('password') or ''
+            name = (user.get('name') or '').strip() or email.split('@')[0].title()
+
+            if '@' not in email:
+                failures.append({'row': row_number, 'email': email, 'error': 'Invalid email address'})
+            elif not password:
+                failures.append({'row': row_number, 'email': email, 'error': 'Missing password'})
+            elif email in seen:
+                failures.append({'row': row_number, 'email': email, 'error': 'Duplicate email in batch'})
+            else:
+                seen.add(email)
+                valid.append({'row': row_number, 'email': email, 'password': password, 'name': name})
+
+        return valid, failures
+
+    def _hash_all(self, users: List[Dict[str, Any]]):
+        """Hash passwords in parallel; bcrypt releases the GIL so threads use every core"""
+        passwords = [user.pop('password') for user in users]
+        rounds = [self.rounds] * len(passwords)
+        with ThreadPoolExecutor(self.workers, thread_name_prefix='bulk-bcrypt') as executor:
+            return list(executor.map(_hash_password, passwords, rounds))
+
+    def _load(self, users: List[Dict[str, Any]]):
+        """Load users and their stats in a single transaction; returns {email: user_id}"""
+        with self.auth_manager.get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    CREATE TEMP TABLE provisioning_users (
+                        email TEXT, password_hash TEXT, name TEXT
+                    ) ON COMMIT DROP
+                """)
+                cursor.copy_expert(
+                    "COPY provisioning_users (email, password_hash, name) FROM STDIN",
+                    _copy_buffer((u['email'], u['password_hash'], u['name']) for u in users)
+                )
+                # Existing accounts are skipped rather than failing the whole COPY
+                cursor.execute("""
+                    INSERT INTO users (email, password_hash, name)
+                    SELECT email, password_hash, name FROM provisioning_users
+                    ON CONFLICT (email) DO NOTHING
+                    RETURNING id, email
+                """)
+                created = {email: user_id for user_id, email in cursor.fetchall()}
+
+                stats_rows = []
+                for user_id in created.values():
+                    stats = self.auth_manager._generate_sample_stats()
+                    stats_rows.append([user_id] + [stats[column] for column in STATS_COPY_COLUMNS[1:]])
+                cursor.copy_expert(
+                    f"COPY user_stats ({', '.join(STATS_COPY_COLUMNS)}) FROM STDIN",
+                    _copy_buffer(stats_rows)
+                )
+        return created
+
+    def provision(self, users: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        """Create users from dicts with 'email', 'password' and optional 'name' keys"""
+        started = time.perf_counter()
+        valid, failures = self._validate(users)
+        requested = len(valid) + len(failures)
+
+        hash_started = time.perf_counter()
+        hashed = []
+        for user, (password_hash, error) in zip(valid, self._hash_all(valid)):
+            if error:
+                failures.append({'row': user['row'], 'email': user['email'], 'error': error})
+            else:
+                user['password_hash'] = password_hash
+                hashed.append(user)
+        hash_seconds = time.perf_counter() - hash_started
+
+        load_started = time.perf_counter()
+        created = self._load(hashed) if hashed else {}
+        load_seconds = time.perf_counter() - load_started
+
+        for user in hashed:
+            if user['email'] not in created:
+                failures.append({'row': user['row'], 'email': user['email'], 'error': 'User already exists'})
+        failures.sort(key=lambda failure: failure['row'])
+
+        elapsed = time.perf_counter() - started
+        return {
+            'requested': requested,
+            'created': len(created),
+            'failed': len(failures),
+            'failures': failures,
+            'user_ids': created,
+            'elapsed_seconds': elapsed,
+            'hash_seconds': hash_seconds,
+            'load_seconds': load_seconds,
+            'users_per_second': len(created) / elapsed if elapsed > 0 else 0.0
+        }
+
+    def provision_csv(self, path: str) -> Dict[str, Any]:
+        """Create users from a CSV file with an email,password[,name] header"""
+        with open(path, newline='', encoding='utf-8') as f:
+            return self.provision(csv.DictReader(f))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk-provision users from a CSV file")
+    parser.add_argument('csv_path', help="CSV with an email,password[,name] header")
+    parser.add_argument('--workers', type=int, default=None, help="bcrypt threads (default: CPU count)")
+    parser.add_argument('--rounds', type=int, default=None, help="bcrypt cost factor (default: BCRYPT_ROUNDS)")
+    parser.add_argument('--show-failures', type=int, default=20, help="Number of failed rows to print")
+    args = parser.parse_args(argv)
+
+    report = BulkProvisioner(workers=args.workers, rounds=args.rounds).provision_csv(args.csv_path)
+
+    print(f"Requested: {report['requested']}  Created: {report['created']}  Failed: {report['failed']}")
+    print(f"Hashing: {report['hash_seconds']:.2f}s  Loading: {report['load_seconds']:.2f}s  "
+          f"Total: {report['elapsed_seconds']:.2f}s  ({report['users_per_second']:.0f} users/s)")
+    for failure in report['failures'][:args.show_failures]:
+        print(f"  row {failure['row']} ({failure['email'] or '<blank>'}): {failure['error']}")
+    if report['failed'] > args.show_failures:
+        print(f"  ... and {report['failed'] - args.show_failures} more")
+    return 0 if report['created'] or not report['requested'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())